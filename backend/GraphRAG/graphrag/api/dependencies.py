@@ -1,6 +1,6 @@
 from fastapi import Depends
 from ..db.graph_db import Neo4jWrapper
-from ..db.vector_db import QdrantWrapper
+from ..db.vector_db import QdrantWrapper, AsyncQdrantWrapper, get_shared_async_qdrant
 from ..embeddings.embedding import EmbeddingService
 from ..engine.rag_engine import GraphRAGEngine
 from ..engine.entity_extraction import EntityExtractor
@@ -20,6 +20,10 @@ def get_vector_db():
     db = QdrantWrapper()
     yield db
 
+def get_async_vector_db():
+    # Shared per process; closed by the application shutdown hook
+    return get_shared_async_qdrant()
+
 def get_embedding_service():
     service = EmbeddingService()
     yield service
@@ -27,12 +31,14 @@ def get_embedding_service():
 def get_rag_engine(
     graph_db: Neo4jWrapper = Depends(get_graph_db),
     vector_db: QdrantWrapper = Depends(get_vector_db),
-    embedding_service: EmbeddingService = Depends(get_embedding_service)
+    embedding_service: EmbeddingService = Depends(get_embedding_service),
+    async_vector_db: AsyncQdrantWrapper = Depends(get_async_vector_db)
 ):
     engine = GraphRAGEngine(
         graph_db=graph_db,
         vector_db=vector_db,
-        embedding_service=embedding_service
+        embedding_service=embedding_service,
+        async_vector_db=async_vector_db
     )
     yield engine
 
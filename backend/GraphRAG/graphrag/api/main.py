@@ -1,8 +1,11 @@
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from .routes import router as main_router
 from .composio_routes import router as composio_router
 from GraphRAG.graphrag.config import get_settings
+from ..db.graph_db import check_neo4j_health, close_shared_drivers, close_shared_async_drivers
+from ..db.vector_db import close_shared_async_qdrant
 
 settings = get_settings()
 
@@ -26,6 +29,17 @@ app.include_router(main_router)
 app.include_router(composio_router)
 
 @app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy"} 
\ No newline at end of file
+def health_check():
+    """Health check endpoint (sync, so FastAPI runs the blocking connectivity check in its threadpool)"""
+    neo4j = check_neo4j_health()
+    healthy = neo4j["status"] == "healthy"
+    return JSONResponse(
+        status_code=200 if healthy else 503,
+        content={"status": "healthy" if healthy else "unhealthy", "neo4j": neo4j}
+    )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await close_shared_async_drivers()
+    await close_shared_async_qdrant()
+    close_shared_drivers() 
\ No newline at end of file
@@ -60,7 +60,7 @@ async def query_graph(
     Query the GraphRAG engine with natural language
     """
     try:
-        results = rag_engine.retrieve_with_context(
+        results = await rag_engine.aretrieve_with_context(
             query_text=request.query,
             filters=None,
             max_hops=2
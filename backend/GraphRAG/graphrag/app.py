@@ -1,22 +1,29 @@
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 from .api.routes import router
 from .db.vector_db import QdrantWrapper
-from .config import get_settings
+from .db.collection_registry import CollectionRegistry
+from .db.graph_db import close_shared_drivers, close_shared_async_drivers
+from .db.vector_db import close_shared_async_qdrant
+from .embeddings.embedding import EmbeddingService
 
 app = FastAPI(title="GraphRAG API")
 
-# Initialize vector database collection on startup
+# Provision per-node-type collections for the active embedding model on startup
 @app.on_event("startup")
 async def startup_event():
-    settings = get_settings()
-    vector_db = QdrantWrapper()
+    registry = CollectionRegistry(QdrantWrapper(), EmbeddingService())
     try:
-        vector_db.create_collection(
-            collection_name="documents",
-            vector_size=384  # Size for all-MiniLM-L6-v2 model
-        )
+        actions = await run_in_threadpool(registry.ensure_all)
+        print(f"Vector collections: {actions}")
     except Exception as e:
-        print(f"Warning: Collection might already exist: {str(e)}")
+        print(f"Warning: Could not provision vector collections: {str(e)}")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await close_shared_async_drivers()
+    await close_shared_async_qdrant()
+    close_shared_drivers()
 
 # Include API routes
 app.include_router(router, prefix="/api/v1")
@@ -1,20 +1,47 @@
 from pydantic_settings import BaseSettings
 from pydantic import Field
 from functools import lru_cache
-from typing import List
+from typing import Any, Dict, List
 
 class Settings(BaseSettings):
     # Neo4j Configuration
     NEO4J_URI: str = Field(default="bolt://localhost:7687", alias="NEO4J_URI")
     NEO4J_USER: str = Field(default="neo4j", alias="NEO4J_USERNAME")
     NEO4J_PASSWORD: str = Field(default="password", alias="NEO4J_PASSWORD")
+    NEO4J_MAX_POOL_SIZE: int = Field(default=50, alias="NEO4J_MAX_POOL_SIZE")
+    NEO4J_CONNECTION_ACQUISITION_TIMEOUT: float = Field(default=30.0, alias="NEO4J_CONNECTION_ACQUISITION_TIMEOUT")
+    NEO4J_MAX_CONNECTION_LIFETIME: float = Field(default=3600.0, alias="NEO4J_MAX_CONNECTION_LIFETIME")
+    # Idle pooled connections older than this are pinged before reuse (seconds)
+    NEO4J_LIVENESS_CHECK_TIMEOUT: float = Field(default=60.0, alias="NEO4J_LIVENESS_CHECK_TIMEOUT")
     
     # Qdrant Configuration
     QDRANT_URL: str = Field(default="http://localhost:6333", alias="QDRANT_URL")
     QDRANT_API_KEY: str = Field(default=None, alias="QDRANT_API_KEY")
+    # Vector storage defaults for new collections; override per collection in QDRANT_COLLECTION_OPTIONS
+    # Quantization: "none", "scalar" (int8) or "product"
+    QDRANT_QUANTIZATION: str = Field(default="none", alias="QDRANT_QUANTIZATION")
+    QDRANT_QUANTIZATION_ALWAYS_RAM: bool = Field(default=True, alias="QDRANT_QUANTIZATION_ALWAYS_RAM")
+    QDRANT_SCALAR_QUANTILE: float = Field(default=0.99, alias="QDRANT_SCALAR_QUANTILE")
+    # Product quantization compression ratio: x4, x8, x16, x32 or x64
+    QDRANT_PRODUCT_COMPRESSION: str = Field(default="x16", alias="QDRANT_PRODUCT_COMPRESSION")
+    QDRANT_ON_DISK_VECTORS: bool = Field(default=False, alias="QDRANT_ON_DISK_VECTORS")
+    QDRANT_ON_DISK_PAYLOAD: bool = Field(default=False, alias="QDRANT_ON_DISK_PAYLOAD")
+    QDRANT_HNSW_M: int = Field(default=16, alias="QDRANT_HNSW_M")
+    QDRANT_HNSW_EF_CONSTRUCT: int = Field(default=100, alias="QDRANT_HNSW_EF_CONSTRUCT")
+    # JSON, e.g. {"Message": {"quantization": "scalar", "on_disk_vectors": true}}
+    QDRANT_COLLECTION_OPTIONS: Dict[str, Dict[str, Any]] = Field(default_factory=dict, alias="QDRANT_COLLECTION_OPTIONS")
     
     # Embedding Configuration
     EMBEDDING_MODEL: str = Field(default="sentence-transformers/all-MiniLM-L6-v2", alias="EMBEDDING_MODEL")
+    # Version of the embedding model weights, part of every embedding cache key;
+    # bump it when the weights behind EMBEDDING_MODEL change so stale vectors miss
+    EMBEDDING_MODEL_VERSION: str = Field(default="1", alias="EMBEDDING_MODEL_VERSION")
+    EMBEDDING_CACHE_SIZE: int = Field(default=10000, alias="EMBEDDING_CACHE_SIZE")
+    # Expiry of shared (Redis) embedding cache entries in seconds; 0 disables expiry
+    EMBEDDING_CACHE_TTL: int = Field(default=7 * 24 * 3600, alias="EMBEDDING_CACHE_TTL")
+    EMBEDDING_CACHE_REDIS: bool = Field(default=True, alias="EMBEDDING_CACHE_REDIS")
+    # Threads running model inference for async callers; bounds concurrent forward passes
+    EMBEDDING_WORKERS: int = Field(default=2, alias="EMBEDDING_WORKERS")
 
     # Extra fields for compatibility with environment
     DEEPSEEK_API_KEY: str = Field(default=None, alias="DEEPSEEK_API_KEY")
@@ -0,0 +1,270 @@
+"""
+Registry of per-node-type Qdrant collections.
+
+Collections are derived from graph_schema.NODE_TYPES (every type with an
+`embedding_id` property gets one) and sized from the active embedding model.
+Callers always address a collection by its alias (the node type, e.g. "Person").
+The alias points at a physical collection named after the model fingerprint
+("Person__<fingerprint>"). When the model or its dimension changes, migrate()
+re-embeds the points into a new physical collection and swaps the alias
+atomically, so searches keep working throughout.
+"""
+import hashlib
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from qdrant_client.http import models
+
+from .graph_schema import NODE_TYPES
+from .vector_db import QdrantWrapper, DEFAULT_KEYWORD_INDEXES, INDEXED_AT_FIELD
+
+# graph_schema property type -> Qdrant payload index type
+SCHEMA_INDEX_TYPES = {
+    "string": models.PayloadSchemaType.KEYWORD,
+    "list[string]": models.PayloadSchemaType.KEYWORD,
+    "datetime": models.PayloadSchemaType.DATETIME,
+    "float": models.PayloadSchemaType.FLOAT,
+    "int": models.PayloadSchemaType.INTEGER,
+    "boolean": models.PayloadSchemaType.BOOL,
+}
+# Free-text properties get a full-text index and are what migrations re-embed
+TEXT_FIELDS = ("text", "content", "name", "title", "description", "summary", "address")
+# Catch-up passes look back this much further than the previous pass started (clock skew)
+CATCH_UP_SKEW = timedelta(seconds=5)
+
+def vectorized_node_types(node_types: Dict[str, Dict[str, str]] = NODE_TYPES) -> List[str]:
+    """Node types that have a vector collection (those with an embedding_id property)."""
+    return [label for label, properties in node_types.items() if "embedding_id" in properties]
+
+def model_fingerprint(model_version: str, dimension: int) -> str:
+    return hashlib.sha256(f"{model_version}:{dimension}".encode("utf-8")).hexdigest()[:12]
+
+def payload_indexes_for(properties: Dict[str, str]) -> Dict[str, models.PayloadSchemaType]:
+    """Payload index per schema property; json and untyped lists are not indexed."""
+    indexes = {name: models.PayloadSchemaType.KEYWORD for name in DEFAULT_KEYWORD_INDEXES}
+    indexes[INDEXED_AT_FIELD] = models.PayloadSchemaType.DATETIME
+    for name, prop_type in properties.items():
+        if name in TEXT_FIELDS:
+            indexes[name] = models.PayloadSchemaType.TEXT
+        elif prop_type in SCHEMA_INDEX_TYPES:
+            indexes[name] = SCHEMA_INDEX_TYPES[prop_type]
+    return indexes
+
+def default_embed_text(payload: Dict[str, Any]) -> str:
+    """Text to re-embed a point from during migration."""
+    return " ".join(str(payload[f]) for f in TEXT_FIELDS if payload.get(f))
+
+class CollectionRegistry:
+    def __init__(self, vector_db: QdrantWrapper, embedding_service, node_types: Dict[str, Dict[str, str]] = NODE_TYPES):
+        self.vector_db = vector_db
+        self.embedding_service = embedding_service
+        self.node_types = node_types
+
+    @property
+    def client(self):
+        return self.vector_db.client
+
+    def specs(self) -> Dict[str, Dict[str, Any]]:
+        """alias -> {"collection", "dimension", "payload_indexes"} for every vectorized node type."""
+        dimension = self.embedding_service.dimension
+        fingerprint = model_fingerprint(self.embedding_service.model_version, dimension)
+        return {
+            label: {
+                "collection": f"{label}__{fingerprint}",
+                "dimension": dimension,
+                "payload_indexes": payload_indexes_for(self.node_types[label]),
+            }
+            for label in vectorized_node_types(self.node_types)
+        }
+
+    def current_targets(self) -> Dict[str, str]:
+        """alias -> physical collection it points at."""
+        return {a.alias_name: a.collection_name for a in self.client.get_aliases().aliases}
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        targets = self.current_targets()
+        return {
+            alias: {
+                "expected": spec["collection"],
+                "current": targets.get(alias),
+                "up_to_date": targets.get(alias) == spec["collection"],
+            }
+            for alias, spec in self.specs().items()
+        }
+
+    def ensure_all(self, migrate: bool = False) -> Dict[str, str]:
+        """Provision every registered collection. Returns alias -> action taken."""
+        return {alias: self.ensure(alias, migrate=migrate) for alias in self.specs()}
+
+    def ensure(self, alias: str, migrate: bool = False) -> str:
+        """
+        Make `alias` point at a collection for the active model. Returns one of
+        "ok", "created", "migrated" or "stale" (model changed but migrate=False).
+        """
+        spec = self.specs()[alias]
+        current = self.current_targets().get(alias)
+        if current == spec["collection"]:
+            self._provision(spec)
+            return "ok"
+        if current is None and not self.client.collection_exists(alias):
+            self._provision(spec)
+            self._swap_alias(alias, spec["collection"], None)
+            return "created"
+        if not migrate:
+            logging.warning(f"[QDRANT] {alias} is built for a different embedding model; run migrate('{alias}')")
+            return "stale"
+        self.migrate(alias)
+        return "migrated"
+
+    def migrate(self, alias: str, embed_text: Callable[[Dict[str, Any]], str] = default_embed_text,
+                batch_size: int = 256, drop_old: bool = True, catch_up_rounds: int = 3) -> int:
+        """
+        Re-embed every point behind `alias` into the collection for the active model,
+        then repoint the alias. Returns the number of points migrated.
+
+        Writers keep using the old collection while this runs. After the bulk pass,
+        catch-up passes re-copy points upserted since the previous pass (by their
+        `indexed_at` stamp) and remove points deleted from the source, until a pass
+        finds nothing or catch_up_rounds is reached; then the alias is swapped.
+
+        Points without text to re-embed cannot move to the new model and are never
+        dropped: the old collection is kept instead. A legacy collection literally
+        named `alias` (created before aliases) must make way for the alias, so its
+        skipped points are first copied verbatim into `<alias>__unmigrated`.
+        """
+        spec = self.specs()[alias]
+        source = self.current_targets().get(alias)
+        legacy = source is None and self.client.collection_exists(alias)
+        if legacy:
+            source = alias
+        if source is None or source == spec["collection"]:
+            return 0
+        target = spec["collection"]
+        self._provision(spec)
+
+        copied: Set[Any] = set()
+        skipped: Dict[Any, Any] = {}
+        stamps: Dict[Any, Any] = {}
+        since = datetime.now(timezone.utc)
+        self._copy_points(source, target, embed_text, batch_size, copied, skipped, stamps)
+        for _ in range(catch_up_rounds):
+            round_start = datetime.now(timezone.utc)
+            changed = self._copy_points(source, target, embed_text, batch_size, copied, skipped, stamps,
+                                        updated_since=since - CATCH_UP_SKEW)
+            changed += self._remove_deleted(source, target, batch_size, copied, skipped)
+            since = round_start
+            if not changed:
+                break
+
+        if legacy:
+            if skipped:
+                self._preserve_unmigrated(alias, list(skipped.values()))
+            self.client.delete_collection(alias)
+            self._swap_alias(alias, target, None)
+        else:
+            self._swap_alias(alias, target, source)
+            if skipped:
+                logging.warning(f"[QDRANT] {len(skipped)} points of {alias} have no text to re-embed; "
+                                f"keeping {source} instead of dropping it")
+            elif drop_old:
+                self.client.delete_collection(source)
+        logging.info(f"[QDRANT] Migrated {len(copied)} points for {alias}: {source} -> {target}")
+        return len(copied)
+
+    def _copy_points(self, source: str, target: str, embed_text, batch_size: int,
+                     copied: Set[Any], skipped: Dict[Any, Any], stamps: Dict[Any, Any],
+                     updated_since: Optional[datetime] = None) -> int:
+        """
+        Re-embed source points (all, or those upserted since updated_since) into target.
+        Points whose `indexed_at` stamp was already processed are skipped. Updates
+        copied/skipped/stamps in place and returns how many points were processed.
+        """
+        scroll_filter = None
+        if updated_since is not None:
+            scroll_filter = models.Filter(must=[models.FieldCondition(
+                key=INDEXED_AT_FIELD, range=models.DatetimeRange(gte=updated_since)
+            )])
+        processed = 0
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=source, limit=batch_size, offset=offset,
+                with_payload=True, with_vectors=True, scroll_filter=scroll_filter
+            )
+            batch = []
+            no_text = []
+            for point in points:
+                payload = point.payload or {}
+                if point.id in stamps and stamps[point.id] == payload.get(INDEXED_AT_FIELD):
+                    continue
+                stamps[point.id] = payload.get(INDEXED_AT_FIELD)
+                (batch if embed_text(payload) else no_text).append((point, payload))
+            if batch:
+                vectors = self.embedding_service.get_embeddings([embed_text(payload) for _, payload in batch])
+                self.vector_db.upsert_embeddings(
+                    target, [p.id for p, _ in batch], vectors, [payload for _, payload in batch]
+                )
+                for point, _ in batch:
+                    copied.add(point.id)
+                    skipped.pop(point.id, None)
+            # A point that lost its text must not keep a stale vector in the target
+            stale = [point.id for point, _ in no_text if point.id in copied]
+            if stale:
+                self.client.delete(collection_name=target, points_selector=models.PointIdsList(points=stale))
+                copied.difference_update(stale)
+            for point, _ in no_text:
+                skipped[point.id] = point
+            processed += len(batch) + len(no_text)
+            if offset is None:
+                return processed
+
+    def _remove_deleted(self, source: str, target: str, batch_size: int,
+                        copied: Set[Any], skipped: Dict[Any, Any]) -> int:
+        """Delete from target (and forget) points no longer in source. Returns the count."""
+        present = set()
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=source, limit=batch_size, offset=offset,
+                with_payload=False, with_vectors=False
+            )
+            present.update(point.id for point in points)
+            if offset is None:
+                break
+        gone = [point_id for point_id in copied if point_id not in present]
+        if gone:
+            self.client.delete(collection_name=target, points_selector=models.PointIdsList(points=gone))
+            copied.difference_update(gone)
+        for point_id in [point_id for point_id in skipped if point_id not in present]:
+            del skipped[point_id]
+        return len(gone)
+
+    def _preserve_unmigrated(self, alias: str, points: List[Any]):
+        """Copy points that could not be re-embedded, with their old vectors, out of a legacy collection."""
+        backup = f"{alias}__unmigrated"
+        self.vector_db.ensure_collection(backup, len(points[0].vector), keyword_indexes=())
+        self.vector_db.upsert_embeddings(
+            backup, [p.id for p in points], [p.vector for p in points], [p.payload or {} for p in points]
+        )
+        logging.warning(f"[QDRANT] {len(points)} points of {alias} have no text to re-embed; copied to {backup}")
+
+    def _provision(self, spec: Dict[str, Any]):
+        created = self.vector_db.ensure_collection(spec["collection"], spec["dimension"], keyword_indexes=())
+        if not created:
+            return
+        # Schema-derived indexes (including user_id/node_type) on a fresh collection
+        for field_name, field_schema in spec["payload_indexes"].items():
+            self.client.create_payload_index(
+                collection_name=spec["collection"], field_name=field_name, field_schema=field_schema
+            )
+
+    def _swap_alias(self, alias: str, new_collection: str, old_collection: Optional[str]):
+        """Repoint alias in one atomic request."""
+        operations: List[Any] = []
+        if old_collection is not None:
+            operations.append(models.DeleteAliasOperation(delete_alias=models.DeleteAlias(alias_name=alias)))
+        operations.append(models.CreateAliasOperation(
+            create_alias=models.CreateAlias(collection_name=new_collection, alias_name=alias)
+        ))
+        self.client.update_collection_aliases(change_aliases_operations=operations)
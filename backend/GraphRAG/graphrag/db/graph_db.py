@@ -1,25 +1,163 @@
-from neo4j import GraphDatabase
+import atexit
+import logging
+import threading
+import time
+from neo4j import GraphDatabase, AsyncGraphDatabase
 from backend.GraphRAG.graphrag.config import get_settings
 from backend.GraphRAG.graphrag.db.graph_schema import NODE_TYPES, RELATIONSHIP_TYPES
 
+# --- Process-wide driver registry ---
+# A neo4j driver owns a connection pool and is thread-safe, so one driver per
+# (uri, user) is shared by every Neo4jWrapper in the process instead of paying
+# a TLS handshake and a fresh pool on every sync call.
+_drivers = {}
+_drivers_lock = threading.Lock()
+
+def get_shared_driver(uri: str = None, user: str = None, password: str = None):
+    """Return the pooled driver for the given (or configured) credentials, creating it on first use."""
+    settings = get_settings()
+    uri = uri or settings.NEO4J_URI
+    user = user or settings.NEO4J_USER
+    password = password or settings.NEO4J_PASSWORD
+    key = (uri, user)
+    driver = _drivers.get(key)
+    if driver is not None:
+        return driver
+    with _drivers_lock:
+        driver = _drivers.get(key)
+        if driver is None:
+            driver = GraphDatabase.driver(
+                uri,
+                auth=(user, password),
+                max_connection_pool_size=settings.NEO4J_MAX_POOL_SIZE,
+                connection_acquisition_timeout=settings.NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+                max_connection_lifetime=settings.NEO4J_MAX_CONNECTION_LIFETIME,
+                liveness_check_timeout=settings.NEO4J_LIVENESS_CHECK_TIMEOUT,
+            )
+            _drivers[key] = driver
+            logging.info(f"Created shared Neo4j driver for {uri} (pool size {settings.NEO4J_MAX_POOL_SIZE})")
+        return driver
+
+def check_neo4j_health() -> dict:
+    """Verify connectivity of every shared driver. Returns {"status", "drivers": {uri: {...}}}."""
+    if not _drivers:
+        get_shared_driver()
+    report = {}
+    healthy = True
+    for (uri, user), driver in list(_drivers.items()):
+        start = time.perf_counter()
+        try:
+            driver.verify_connectivity()
+            report[uri] = {"status": "healthy", "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+        except Exception as e:
+            healthy = False
+            report[uri] = {"status": "unhealthy", "error": str(e)}
+    return {"status": "healthy" if healthy else "unhealthy", "drivers": report}
+
+def close_shared_drivers():
+    """Close every shared driver. Call on application shutdown; drivers are recreated lazily if used again."""
+    with _drivers_lock:
+        drivers = list(_drivers.values())
+        _drivers.clear()
+    for driver in drivers:
+        try:
+            driver.close()
+        except Exception as e:
+            logging.warning(f"Error closing Neo4j driver: {e}")
+
+atexit.register(close_shared_drivers)
+
+# Async drivers are bound to the event loop they are first used on; in the API
+# process that is the single server loop, so they are shared the same way.
+_async_drivers = {}
+
+def get_shared_async_driver(uri: str = None, user: str = None, password: str = None):
+    """Return the pooled async driver for the given (or configured) credentials, creating it on first use."""
+    settings = get_settings()
+    uri = uri or settings.NEO4J_URI
+    user = user or settings.NEO4J_USER
+    password = password or settings.NEO4J_PASSWORD
+    key = (uri, user)
+    with _drivers_lock:
+        driver = _async_drivers.get(key)
+        if driver is None:
+            driver = AsyncGraphDatabase.driver(
+                uri,
+                auth=(user, password),
+                max_connection_pool_size=settings.NEO4J_MAX_POOL_SIZE,
+                connection_acquisition_timeout=settings.NEO4J_CONNECTION_ACQUISITION_TIMEOUT,
+                max_connection_lifetime=settings.NEO4J_MAX_CONNECTION_LIFETIME,
+                liveness_check_timeout=settings.NEO4J_LIVENESS_CHECK_TIMEOUT,
+            )
+            _async_drivers[key] = driver
+            logging.info(f"Created shared async Neo4j driver for {uri}")
+        return driver
+
+async def close_shared_async_drivers():
+    """Close every shared async driver. Await on application shutdown, on the loop that used them."""
+    with _drivers_lock:
+        drivers = list(_async_drivers.values())
+        _async_drivers.clear()
+    for driver in drivers:
+        try:
+            await driver.close()
+        except Exception as e:
+            logging.warning(f"Error closing async Neo4j driver: {e}")
+
+class AsyncNeo4jWrapper:
+    """Read-path counterpart of Neo4jWrapper for async handlers, on the neo4j async driver."""
+    def __init__(self, driver=None):
+        self._owns_driver = driver is not None
+        self.driver = driver or get_shared_async_driver()
+
+    async def close(self):
+        if self._owns_driver:
+            await self.driver.close()
+
+    async def run_query(self, query: str, parameters: dict = None):
+        async with self.driver.session() as session:
+            result = await session.run(query, parameters or {})
+            return [record async for record in result]
+
 class Neo4jWrapper:
-    def __init__(self):
-        settings = get_settings()
-        self.driver = GraphDatabase.driver(
-            settings.NEO4J_URI,
-            auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD)
-        )
-    
+    def __init__(self, driver=None):
+        """
+        Wrap a Neo4j driver. By default the process-wide pooled driver is borrowed;
+        pass a driver explicitly to use (and own) a dedicated one.
+        """
+        self._owns_driver = driver is not None
+        self.driver = driver or get_shared_driver()
+
     def close(self):
-        self.driver.close()
+        # The shared driver outlives individual wrappers; see close_shared_drivers()
+        if self._owns_driver:
+            self.driver.close()
     
-    def create_node(self, label: str, properties: dict):
-        # Validate node type and properties
+    @staticmethod
+    def validate_node(label: str, properties: dict):
+        """Raise ValueError if the label or any property is not in the graph schema."""
         if label not in NODE_TYPES:
             raise ValueError(f"Unknown node type: {label}")
         for prop in properties:
             if prop not in NODE_TYPES[label]:
                 raise ValueError(f"Invalid property '{prop}' for node type '{label}'")
+
+    @staticmethod
+    def validate_relationship(from_label: str, to_label: str, rel_type: str, rel_props: dict = None):
+        """Raise ValueError if the relationship type, endpoints or properties are not in the graph schema."""
+        if rel_type not in RELATIONSHIP_TYPES:
+            raise ValueError(f"Unknown relationship type: {rel_type}")
+        valid_sources = RELATIONSHIP_TYPES[rel_type]["valid_sources"]
+        valid_targets = RELATIONSHIP_TYPES[rel_type]["valid_targets"]
+        if from_label not in valid_sources or to_label not in valid_targets:
+            raise ValueError(f"Invalid source/target for relationship {rel_type}: {from_label} -> {to_label}")
+        for prop in (rel_props or {}):
+            if prop not in RELATIONSHIP_TYPES[rel_type]["properties"]:
+                raise ValueError(f"Invalid property '{prop}' for relationship type '{rel_type}'")
+
+    def create_node(self, label: str, properties: dict):
+        # Validate node type and properties
+        self.validate_node(label, properties)
         with self.driver.session() as session:
             query = (
                 f"CREATE (n:{label} $properties) "
@@ -33,12 +171,8 @@ class Neo4jWrapper:
         Create a node if it doesn't exist, or update it if it does.
         Uses the 'id' property as the unique identifier.
         """
-        if label not in NODE_TYPES:
-            raise ValueError(f"Unknown node type: {label}")
-        for prop in properties:
-            if prop not in NODE_TYPES[label]:
-                raise ValueError(f"Invalid property '{prop}' for node type '{label}'")
-        
+        self.validate_node(label, properties)
+
         with self.driver.session() as session:
             query = (
                 f"MERGE (n:{label} {{id: $id}}) "
@@ -48,6 +182,46 @@ class Neo4jWrapper:
             result = session.run(query, id=properties['id'], properties=properties)
             return result.single()
     
+    def upsert_node(self, label: str, properties: dict, owner_label: str = None,
+                    owner_id: str = None, rel_type: str = None, strict: bool = True):
+        """
+        Upsert a node by 'id' and, optionally, its ownership relationship in one
+        statement and one write transaction:
+
+            MERGE (n:label {id}) SET n += properties
+            MERGE (owner:owner_label {id: owner_id})-[:rel_type]->(n)   (if the owner exists)
+
+        The owner node is matched, never created, so a missing owner leaves the node
+        unlinked as before. Pass strict=False to skip per-property schema validation
+        for nodes carrying dynamic properties (e.g. flattened resume fields).
+        Returns the node.
+        """
+        if strict:
+            self.validate_node(label, properties)
+        elif label not in NODE_TYPES:
+            raise ValueError(f"Unknown node type: {label}")
+        query = (
+            f"MERGE (n:{label} {{id: $id}}) "
+            "SET n += $properties "
+        )
+        params = {"id": properties["id"], "properties": properties}
+        if owner_id and rel_type:
+            self.validate_relationship(owner_label, label, rel_type)
+            query += (
+                "WITH n "
+                f"OPTIONAL MATCH (o:{owner_label} {{id: $owner_id}}) "
+                f"FOREACH (_ IN CASE WHEN o IS NULL THEN [] ELSE [1] END | MERGE (o)-[:{rel_type}]->(n)) "
+            )
+            params["owner_id"] = owner_id
+        query += "RETURN n"
+
+        def _work(tx):
+            record = tx.run(query, **params).single()
+            return record["n"] if record else None
+
+        with self.driver.session() as session:
+            return session.execute_write(_work)
+
     def node_exists(self, label: str, match_props: dict) -> bool:
         """
         Check if a node exists with the given properties.
@@ -79,15 +253,7 @@ class Neo4jWrapper:
     def create_relationship(self, from_label: str, to_label: str, rel_type: str, 
                           from_props: dict, to_props: dict, rel_props: dict = None):
         # Validate relationship type and properties
-        if rel_type not in RELATIONSHIP_TYPES:
-            raise ValueError(f"Unknown relationship type: {rel_type}")
-        valid_sources = RELATIONSHIP_TYPES[rel_type]["valid_sources"]
-        valid_targets = RELATIONSHIP_TYPES[rel_type]["valid_targets"]
-        if from_label not in valid_sources or to_label not in valid_targets:
-            raise ValueError(f"Invalid source/target for relationship {rel_type}: {from_label} -> {to_label}")
-        for prop in (rel_props or {}):
-            if prop not in RELATIONSHIP_TYPES[rel_type]["properties"]:
-                raise ValueError(f"Invalid property '{prop}' for relationship type '{rel_type}'")
+        self.validate_relationship(from_label, to_label, rel_type, rel_props)
         with self.driver.session() as session:
             query = (
                 f"MATCH (a:{from_label}), (b:{to_label}) "
@@ -106,16 +272,8 @@ class Neo4jWrapper:
         """
         Create a relationship if it doesn't exist, or update it if it does.
         """
-        if rel_type not in RELATIONSHIP_TYPES:
-            raise ValueError(f"Unknown relationship type: {rel_type}")
-        valid_sources = RELATIONSHIP_TYPES[rel_type]["valid_sources"]
-        valid_targets = RELATIONSHIP_TYPES[rel_type]["valid_targets"]
-        if from_label not in valid_sources or to_label not in valid_targets:
-            raise ValueError(f"Invalid source/target for relationship {rel_type}: {from_label} -> {to_label}")
-        for prop in (rel_props or {}):
-            if prop not in RELATIONSHIP_TYPES[rel_type]["properties"]:
-                raise ValueError(f"Invalid property '{prop}' for relationship type '{rel_type}'")
-        
+        self.validate_relationship(from_label, to_label, rel_type, rel_props)
+
         with self.driver.session() as session:
             query = (
                 f"MATCH (a:{from_label}), (b:{to_label}) "
@@ -130,6 +288,88 @@ class Neo4jWrapper:
                                rel_props=rel_props or {})
             return result.single()
 
+    def create_nodes(self, label: str, rows: list) -> list:
+        """
+        Create many nodes of one label with a single UNWIND statement.
+        Each row is a property dict and must contain 'id'. Returns the created ids.
+        """
+        for properties in rows:
+            self.validate_node(label, properties)
+        if not rows:
+            return []
+        with self.driver.session() as session:
+            query = (
+                "UNWIND $rows AS row "
+                f"CREATE (n:{label}) "
+                "SET n = row "
+                "RETURN n.id AS id"
+            )
+            result = session.run(query, rows=rows)
+            return [record["id"] for record in result]
+
+    def upsert_nodes(self, label: str, rows: list) -> list:
+        """
+        MERGE many nodes of one label by 'id' and SET their properties with a single
+        UNWIND statement. Each row is a property dict containing 'id'. Returns the ids.
+        """
+        for properties in rows:
+            self.validate_node(label, properties)
+        if not rows:
+            return []
+        with self.driver.session() as session:
+            query = (
+                "UNWIND $rows AS row "
+                f"MERGE (n:{label} {{id: row.id}}) "
+                "SET n += row "
+                "RETURN n.id AS id"
+            )
+            result = session.run(query, rows=rows)
+            return [record["id"] for record in result]
+
+    def update_nodes(self, label: str, rows: list) -> int:
+        """
+        Update properties on many existing nodes of one label with a single UNWIND
+        statement. Each row is {"id": ..., "properties": {...}}. Returns the number matched.
+        """
+        for row in rows:
+            self.validate_node(label, row.get("properties") or {})
+        if not rows:
+            return 0
+        with self.driver.session() as session:
+            query = (
+                "UNWIND $rows AS row "
+                f"MATCH (n:{label} {{id: row.id}}) "
+                "SET n += row.properties "
+                "RETURN count(n) AS updated"
+            )
+            record = session.run(query, rows=rows).single()
+            return record["updated"] if record else 0
+
+    def create_relationships(self, from_label: str, to_label: str, rel_type: str, rows: list) -> int:
+        """
+        Create many relationships of one type with a single UNWIND statement.
+        Each row is a dict with 'from_id', 'to_id' and optional 'properties'.
+        Returns the number of relationships created.
+        """
+        for row in rows:
+            self.validate_relationship(from_label, to_label, rel_type, row.get("properties"))
+        if not rows:
+            return 0
+        params = [
+            {"from_id": row["from_id"], "to_id": row["to_id"], "properties": row.get("properties") or {}}
+            for row in rows
+        ]
+        with self.driver.session() as session:
+            query = (
+                "UNWIND $rows AS row "
+                f"MATCH (a:{from_label} {{id: row.from_id}}), (b:{to_label} {{id: row.to_id}}) "
+                f"CREATE (a)-[r:{rel_type}]->(b) "
+                "SET r = row.properties "
+                "RETURN count(r) AS created"
+            )
+            record = session.run(query, rows=params).single()
+            return record["created"] if record else 0
+
     def update_node(self, label: str, match_props: dict, update_props: dict):
         with self.driver.session() as session:
             set_clause = ", ".join([f"n.{k} = $update_{k}" for k in update_props.keys()])
@@ -1,186 +1,349 @@
-from qdrant_client import QdrantClient
+import asyncio
+from datetime import datetime, timezone
+from qdrant_client import QdrantClient, AsyncQdrantClient
 from qdrant_client.http import models
 from ..config import get_settings
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence, Union
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 
-PERSON_VECTOR_SIZE = 768  # Adjust as needed
-ORG_VECTOR_SIZE = 768
-MSG_VECTOR_SIZE = 768
-EVENT_VECTOR_SIZE = 768
-LOC_VECTOR_SIZE = 768
+# Per-node-type collections and their dimensions live in collection_registry.py
 
-class QdrantWrapper:
-    def __init__(self):
-        settings = get_settings()
-        self.client = QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY)
+Vector = Union[np.ndarray, Sequence[float]]
 
-    def create_person_collection(self):
-        self.client.recreate_collection(
-            collection_name="Person",
-            vectors_config=models.VectorParams(size=PERSON_VECTOR_SIZE, distance=models.Distance.COSINE),
-            payload_schema={
-                "id": models.PayloadSchemaType.KEYWORD,
-                "name": models.PayloadSchemaType.TEXT,
-                "email": models.PayloadSchemaType.KEYWORD,
-                "phone": models.PayloadSchemaType.KEYWORD,
-                "title": models.PayloadSchemaType.TEXT,
-                "organization_id": models.PayloadSchemaType.KEYWORD,
-                "first_contact_date": models.PayloadSchemaType.DATETIME,
-                "last_contact_date": models.PayloadSchemaType.DATETIME,
-                "source": models.PayloadSchemaType.KEYWORD,
-                "embedding_id": models.PayloadSchemaType.KEYWORD,
-            }
-        )
+# Payload fields every knowledge collection is filtered on
+DEFAULT_KEYWORD_INDEXES = ("user_id", "node_type")
+RANGE_OPERATORS = ("gt", "gte", "lt", "lte")
+# Write timestamp stamped on every upserted payload; collection migrations catch up on it
+INDEXED_AT_FIELD = "indexed_at"
 
-    def create_organization_collection(self):
-        self.client.recreate_collection(
-            collection_name="Organization",
-            vectors_config=models.VectorParams(size=ORG_VECTOR_SIZE, distance=models.Distance.COSINE),
-            payload_schema={
-                "id": models.PayloadSchemaType.KEYWORD,
-                "name": models.PayloadSchemaType.TEXT,
-                "type": models.PayloadSchemaType.KEYWORD,
-                "website": models.PayloadSchemaType.KEYWORD,
-                "description": models.PayloadSchemaType.TEXT,
-                "location": models.PayloadSchemaType.TEXT,
-                "embedding_id": models.PayloadSchemaType.KEYWORD,
-            }
-        )
-    
-    def create_task_collection(self):
-        self.client.recreate_collection(
-            collection_name="Task",
-            vectors_config=models.VectorParams(size=MSG_VECTOR_SIZE, distance=models.Distance.COSINE),
-            payload_schema={
-                "id": models.PayloadSchemaType.KEYWORD,
-                "title": models.PayloadSchemaType.TEXT,
-                "status": models.PayloadSchemaType.KEYWORD,
-                "created_date": models.PayloadSchemaType.DATETIME,
-                "source_type": models.PayloadSchemaType.KEYWORD,
-                "description": models.PayloadSchemaType.TEXT,
-                "priority": models.PayloadSchemaType.KEYWORD,
-                "due_date": models.PayloadSchemaType.DATETIME,
-                "completion_date": models.PayloadSchemaType.DATETIME,
-                "horizon": models.PayloadSchemaType.KEYWORD,
-                "recurrence": models.PayloadSchemaType.KEYWORD,
-                "estimated_time": models.PayloadSchemaType.FLOAT,
-                "tags": models.PayloadSchemaType.KEYWORD,
-                "confidence_score": models.PayloadSchemaType.FLOAT,
-                "assignee_id": models.PayloadSchemaType.KEYWORD,
-                "creator_id": models.PayloadSchemaType.KEYWORD,
-                "is_actionable": models.PayloadSchemaType.BOOL,
-                "reminder_date": models.PayloadSchemaType.DATETIME,
-                "embedding_id": models.PayloadSchemaType.KEYWORD,
-            }
-        )
+def _stamp(payloads: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    now = datetime.now(timezone.utc).isoformat()
+    return [{**(payload or {}), INDEXED_AT_FIELD: now} for payload in payloads]
 
-    def create_channel_collection(self):
-        self.client.recreate_collection(
-            collection_name="Channel",
-            vectors_config=models.VectorParams(size=MSG_VECTOR_SIZE, distance=models.Distance.COSINE),
-            payload_schema={
-                "id": models.PayloadSchemaType.KEYWORD,
-                "name": models.PayloadSchemaType.TEXT,
-                "type": models.PayloadSchemaType.KEYWORD,
-                "provider": models.PayloadSchemaType.KEYWORD,
-                "is_connected": models.PayloadSchemaType.BOOL,
-                "connection_status": models.PayloadSchemaType.KEYWORD,
-                "last_synced": models.PayloadSchemaType.DATETIME,
-                "credentials_id": models.PayloadSchemaType.KEYWORD,
-                "settings": models.PayloadSchemaType.JSON,
-                "embedding_id": models.PayloadSchemaType.KEYWORD,
-            }
-        )
+def build_payload_filter(filters: Optional[Dict[str, Any]]) -> Optional[models.Filter]:
+    """
+    Translate a simple filter dict into a Qdrant payload filter (all conditions ANDed):
+    scalar -> exact match, list/tuple/set -> match any, {"gte": .., "lt": ..} -> range.
+    None values are ignored.
+    """
+    if not filters:
+        return None
+    conditions = []
+    for key, value in filters.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple, set)):
+            condition = models.FieldCondition(key=key, match=models.MatchAny(any=list(value)))
+        elif isinstance(value, dict) and value and set(value) <= set(RANGE_OPERATORS):
+            condition = models.FieldCondition(key=key, range=models.Range(**value))
+        else:
+            condition = models.FieldCondition(key=key, match=models.MatchValue(value=value))
+        conditions.append(condition)
+    return models.Filter(must=conditions) if conditions else None
 
-    def create_thread_collection(self):
-        self.client.recreate_collection(
-            collection_name="Thread",
-            vectors_config=models.VectorParams(size=MSG_VECTOR_SIZE, distance=models.Distance.COSINE),
-            payload_schema={
-                "id": models.PayloadSchemaType.KEYWORD,
-                "title": models.PayloadSchemaType.TEXT,
-                "status": models.PayloadSchemaType.KEYWORD,
-                "created_date": models.PayloadSchemaType.DATETIME,
-                "last_updated": models.PayloadSchemaType.DATETIME,
-                "channel_id": models.PayloadSchemaType.KEYWORD,
-                "external_id": models.PayloadSchemaType.KEYWORD,
-                "participants_count": models.PayloadSchemaType.INTEGER,
-                "message_count": models.PayloadSchemaType.INTEGER,
-                "embedding_id": models.PayloadSchemaType.KEYWORD,
-            }
-        )
+def collection_storage_config(collection_name: str) -> Dict[str, Any]:
+    """Storage/index options for a collection: Settings defaults plus QDRANT_COLLECTION_OPTIONS overrides."""
+    settings = get_settings()
+    options = {
+        "quantization": settings.QDRANT_QUANTIZATION,
+        "quantization_always_ram": settings.QDRANT_QUANTIZATION_ALWAYS_RAM,
+        "scalar_quantile": settings.QDRANT_SCALAR_QUANTILE,
+        "product_compression": settings.QDRANT_PRODUCT_COMPRESSION,
+        "on_disk_vectors": settings.QDRANT_ON_DISK_VECTORS,
+        "on_disk_payload": settings.QDRANT_ON_DISK_PAYLOAD,
+        "hnsw_m": settings.QDRANT_HNSW_M,
+        "hnsw_ef_construct": settings.QDRANT_HNSW_EF_CONSTRUCT,
+    }
+    options.update(settings.QDRANT_COLLECTION_OPTIONS.get(collection_name, {}))
+    return options
 
-    def create_message_collection(self):
-        self.client.recreate_collection(
-            collection_name="Message",
-            vectors_config=models.VectorParams(size=MSG_VECTOR_SIZE, distance=models.Distance.COSINE),
-            payload_schema={
-                "id": models.PayloadSchemaType.KEYWORD,
-                "content": models.PayloadSchemaType.TEXT,
-                "sender_id": models.PayloadSchemaType.KEYWORD,
-                "channel_id": models.PayloadSchemaType.KEYWORD,
-                "thread_id": models.PayloadSchemaType.KEYWORD,
-                "timestamp": models.PayloadSchemaType.DATETIME,
-                "read_status": models.PayloadSchemaType.KEYWORD,
-                "has_attachments": models.PayloadSchemaType.BOOL,
-                "sentiment": models.PayloadSchemaType.FLOAT,
-                "intent": models.PayloadSchemaType.KEYWORD,
-                "is_actionable": models.PayloadSchemaType.BOOL,
-                "reply_to_id": models.PayloadSchemaType.KEYWORD,
-                "embedding_id": models.PayloadSchemaType.KEYWORD,
-            }
-        )
+def quantization_config(options: Dict[str, Any]):
+    """Build the Qdrant quantization config for the configured mode (None when disabled)."""
+    mode = (options.get("quantization") or "none").lower()
+    if mode == "none":
+        return None
+    if mode == "scalar":
+        return models.ScalarQuantization(scalar=models.ScalarQuantizationConfig(
+            type=models.ScalarType.INT8,
+            quantile=options["scalar_quantile"],
+            always_ram=options["quantization_always_ram"],
+        ))
+    if mode == "product":
+        return models.ProductQuantization(product=models.ProductQuantizationConfig(
+            compression=models.CompressionRatio(options["product_compression"]),
+            always_ram=options["quantization_always_ram"],
+        ))
+    raise ValueError(f"Unknown Qdrant quantization mode: {mode}")
 
-    def create_event_collection(self):
-        self.client.recreate_collection(
-            collection_name="Event",
-            vectors_config=models.VectorParams(size=EVENT_VECTOR_SIZE, distance=models.Distance.COSINE),
-            payload_schema={
-                "id": models.PayloadSchemaType.KEYWORD,
-                "title": models.PayloadSchemaType.TEXT,
-                "description": models.PayloadSchemaType.TEXT,
-                "start_time": models.PayloadSchemaType.DATETIME,
-                "end_time": models.PayloadSchemaType.DATETIME,
-                "location": models.PayloadSchemaType.TEXT,
-                "embedding_id": models.PayloadSchemaType.KEYWORD,
-            }
-        )
+def vector_params(collection_name: str, size: int,
+                  distance: models.Distance = models.Distance.COSINE) -> models.VectorParams:
+    options = collection_storage_config(collection_name)
+    return models.VectorParams(size=size, distance=distance, on_disk=options["on_disk_vectors"])
 
-    def create_location_collection(self):
-        self.client.recreate_collection(
-            collection_name="Location",
-            vectors_config=models.VectorParams(size=LOC_VECTOR_SIZE, distance=models.Distance.COSINE),
-            payload_schema={
-                "id": models.PayloadSchemaType.KEYWORD,
-                "name": models.PayloadSchemaType.TEXT,
-                "address": models.PayloadSchemaType.TEXT,
-                "coordinates": models.PayloadSchemaType.GEO,
-                "type": models.PayloadSchemaType.KEYWORD,
-                "embedding_id": models.PayloadSchemaType.KEYWORD,
-            }
+def storage_options(collection_name: str) -> Dict[str, Any]:
+    """Keyword arguments for create_collection: HNSW build params, quantization, payload storage."""
+    options = collection_storage_config(collection_name)
+    return {
+        "hnsw_config": models.HnswConfigDiff(m=options["hnsw_m"], ef_construct=options["hnsw_ef_construct"]),
+        "quantization_config": quantization_config(options),
+        "on_disk_payload": options["on_disk_payload"],
+    }
+
+def _payload_selector(with_payload):
+    """Map include/exclude dicts to Qdrant payload selectors; bools and field lists pass through."""
+    if isinstance(with_payload, dict):
+        if "exclude" in with_payload:
+            return models.PayloadSelectorExclude(exclude=list(with_payload["exclude"]))
+        return models.PayloadSelectorInclude(include=list(with_payload.get("include", [])))
+    if isinstance(with_payload, (list, tuple)):
+        return list(with_payload)
+    return with_payload
+
+def search_request(collection_name: str, query_vector: Vector, limit: int = 5,
+                   filters: Optional[Dict[str, Any]] = None,
+                   score_threshold: Optional[float] = None,
+                   hnsw_ef: Optional[int] = None,
+                   exact: bool = False,
+                   with_payload: Union[bool, Sequence[str], Dict[str, Sequence[str]]] = True,
+                   with_vectors: bool = False) -> Dict[str, Any]:
+    """Keyword arguments for client.search, shared by the sync and async wrappers."""
+    search_params = None
+    if hnsw_ef is not None or exact:
+        search_params = models.SearchParams(hnsw_ef=hnsw_ef, exact=exact)
+    return {
+        "collection_name": collection_name,
+        "query_vector": _as_list([query_vector])[0],
+        "query_filter": build_payload_filter(filters),
+        "limit": limit,
+        "score_threshold": score_threshold,
+        "search_params": search_params,
+        "with_payload": _payload_selector(with_payload),
+        "with_vectors": with_vectors,
+    }
+
+# Shared pool for fanning one query out to several collections
+_search_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="qdrant-search")
+
+# (url, collection) -> dimension, for collections already verified in this process
+_provisioned_collections: Dict[tuple, int] = {}
+_provisioned_lock = threading.Lock()
+
+def _as_list(vectors) -> list:
+    """Qdrant's client takes plain lists; convert numpy vectors/matrices at this boundary."""
+    if isinstance(vectors, np.ndarray):
+        return vectors.astype(np.float32, copy=False).tolist()
+    return [v.tolist() if isinstance(v, np.ndarray) else v for v in vectors]
+
+class QdrantWrapper:
+    def __init__(self):
+        settings = get_settings()
+        self.url = settings.QDRANT_URL
+        self.client = QdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY)
+
+    def ensure_collection(self, collection_name: str, dimension: int,
+                          distance: models.Distance = models.Distance.COSINE,
+                          keyword_indexes: Sequence[str] = DEFAULT_KEYWORD_INDEXES) -> bool:
+        """
+        Idempotently provision a collection. Creates it only when missing and never
+        drops data; an existing collection with a different vector size raises
+        ValueError. Keyword payload indexes are created for keyword_indexes so
+        filtered searches only scan matching points. The result is cached per
+        process. Returns True if it was created.
+        """
+        key = (self.url, collection_name)
+        with _provisioned_lock:
+            known = _provisioned_collections.get(key)
+        if known is not None:
+            if known != dimension:
+                raise ValueError(f"Collection {collection_name} has dimension {known}, expected {dimension}")
+            return False
+        created = False
+        if self.client.collection_exists(collection_name):
+            existing = self.client.get_collection(collection_name).config.params.vectors
+            size = getattr(existing, "size", None)
+            if size is not None and size != dimension:
+                raise ValueError(
+                    f"Collection {collection_name} has dimension {size}, expected {dimension}; "
+                    f"migrate it instead of recreating"
+                )
+        else:
+            self.client.create_collection(
+                collection_name=collection_name,
+                vectors_config=vector_params(collection_name, dimension, distance),
+                **storage_options(collection_name)
+            )
+            created = True
+            logging.info(f"[QDRANT] Created collection {collection_name} (dim={dimension})")
+        for field_name in keyword_indexes:
+            # No-op if the index already exists
+            self.client.create_payload_index(
+                collection_name=collection_name,
+                field_name=field_name,
+                field_schema=models.PayloadSchemaType.KEYWORD
+            )
+        with _provisioned_lock:
+            _provisioned_collections[key] = dimension
+        return created
+
+    def update_storage_config(self, collection_name: str):
+        """
+        Apply the current Settings storage options to an existing collection
+        (quantization, on-disk vectors/payload, HNSW). Qdrant rebuilds in the background.
+        """
+        options = collection_storage_config(collection_name)
+        storage = storage_options(collection_name)
+        return self.client.update_collection(
+            collection_name=collection_name,
+            vectors_config={"": models.VectorParamsDiff(on_disk=options["on_disk_vectors"])},
+            hnsw_config=storage["hnsw_config"],
+            quantization_config=storage["quantization_config"] or models.Disabled.DISABLED,
+            collection_params=models.CollectionParamsDiff(on_disk_payload=options["on_disk_payload"]),
         )
 
-    def upsert_embedding(self, collection: str, id: str, vector: List[float], payload: Dict[str, Any]):
+    def upsert_embedding(self, collection: str, id: str, vector: Vector, payload: Dict[str, Any]):
         self.client.upsert(
             collection_name=collection,
             points=models.Batch(
                 ids=[id],
-                vectors=[vector],
-                payloads=[payload]
+                vectors=_as_list([vector]),
+                payloads=_stamp([payload])
             )
         )
 
+    def upsert_embeddings(self, collection: str, ids: List[str], vectors: Union[np.ndarray, List[Vector]],
+                          payloads: List[Dict[str, Any]], wait: bool = True):
+        """Upsert many points in one request."""
+        if not ids:
+            return None
+        return self.client.upsert(
+            collection_name=collection,
+            points=models.Batch(
+                ids=list(ids),
+                vectors=_as_list(vectors),
+                payloads=_stamp(payloads)
+            ),
+            wait=wait
+        )
+
     def get_embedding(self, collection: str, id: str):
         result = self.client.retrieve(collection_name=collection, ids=[id])
         return result
     
-    def search_vectors(self, collection_name: str, query_vector: List[float], limit: int = 5):
-        search_result = self.client.search(
-            collection_name=collection_name,
-            query_vector=query_vector,
-            limit=limit
+    def search_vectors(self, collection_name: str, query_vector: Vector, limit: int = 5,
+                       filters: Optional[Dict[str, Any]] = None,
+                       score_threshold: Optional[float] = None,
+                       hnsw_ef: Optional[int] = None,
+                       exact: bool = False,
+                       with_payload: Union[bool, Sequence[str], Dict[str, Sequence[str]]] = True,
+                       with_vectors: bool = False):
+        """
+        Nearest-neighbour search restricted to points whose payload matches filters.
+
+        Args:
+            score_threshold: Drop hits below this score server-side
+            hnsw_ef: Search beam width (higher = better recall, slower); None uses the collection default
+            exact: Brute-force search instead of HNSW
+            with_payload: True/False, a list of fields to include, or {"include": [...]} / {"exclude": [...]}
+            with_vectors: Return stored vectors with each hit
+        """
+        return self.client.search(**search_request(
+            collection_name, query_vector, limit, filters, score_threshold,
+            hnsw_ef, exact, with_payload, with_vectors
+        ))
+
+    def search_collections(self, collection_limits: Dict[str, int], query_vector: Vector,
+                           filters: Optional[Dict[str, Any]] = None, **search_kwargs) -> Dict[str, list]:
+        """
+        Run the same query against several collections concurrently.
+        collection_limits maps collection (or alias) -> limit. A collection that
+        fails (e.g. not provisioned yet) yields an empty list instead of failing the fan-out.
+        """
+        query_vector = _as_list([query_vector])[0]
+
+        def search_one(collection_name, limit):
+            try:
+                return self.search_vectors(collection_name, query_vector, limit=limit, filters=filters, **search_kwargs)
+            except Exception as e:
+                logging.warning(f"[QDRANT] Search in {collection_name} failed: {e}")
+                return []
+
+        futures = {
+            name: _search_executor.submit(search_one, name, limit)
+            for name, limit in collection_limits.items() if limit > 0
+        }
+        return {name: future.result() for name, future in futures.items()}
+
+class AsyncQdrantWrapper:
+    """Search/upsert counterpart of QdrantWrapper for async handlers, on AsyncQdrantClient."""
+    def __init__(self):
+        settings = get_settings()
+        self.url = settings.QDRANT_URL
+        self.client = AsyncQdrantClient(url=settings.QDRANT_URL, api_key=settings.QDRANT_API_KEY)
+
+    async def close(self):
+        await self.client.close()
+
+    async def upsert_embeddings(self, collection: str, ids: List[str], vectors: Union[np.ndarray, List[Vector]],
+                                payloads: List[Dict[str, Any]], wait: bool = True):
+        if not ids:
+            return None
+        return await self.client.upsert(
+            collection_name=collection,
+            points=models.Batch(ids=list(ids), vectors=_as_list(vectors), payloads=_stamp(payloads)),
+            wait=wait
         )
-        return search_result 
+
+    async def search_vectors(self, collection_name: str, query_vector: Vector, limit: int = 5,
+                             filters: Optional[Dict[str, Any]] = None, **search_kwargs):
+        """Same parameters as QdrantWrapper.search_vectors."""
+        return await self.client.search(**search_request(
+            collection_name, query_vector, limit, filters, **search_kwargs
+        ))
+
+    async def search_collections(self, collection_limits: Dict[str, int], query_vector: Vector,
+                                 filters: Optional[Dict[str, Any]] = None, **search_kwargs) -> Dict[str, list]:
+        """Concurrent fan-out with asyncio.gather; failing collections yield empty lists."""
+        names = [name for name, limit in collection_limits.items() if limit > 0]
+        results = await asyncio.gather(*(
+            self.search_vectors(name, query_vector, limit=collection_limits[name], filters=filters, **search_kwargs)
+            for name in names
+        ), return_exceptions=True)
+        merged = {}
+        for name, result in zip(names, results):
+            if isinstance(result, Exception):
+                logging.warning(f"[QDRANT] Search in {name} failed: {result}")
+                result = []
+            merged[name] = result
+        return merged
+
+# --- Process-wide async client registry ---
+# AsyncQdrantClient owns an HTTP connection pool, so one wrapper per URL is shared
+# by every request instead of opening (and leaking) a pool per engine.
+_async_wrappers = {}
+_async_wrappers_lock = threading.Lock()
+
+def get_shared_async_qdrant() -> AsyncQdrantWrapper:
+    """Process-wide AsyncQdrantWrapper for the configured URL; its HTTP pool is reused across requests."""
+    url = get_settings().QDRANT_URL
+    with _async_wrappers_lock:
+        wrapper = _async_wrappers.get(url)
+        if wrapper is None:
+            wrapper = _async_wrappers[url] = AsyncQdrantWrapper()
+        return wrapper
+
+async def close_shared_async_qdrant():
+    """Close the shared async Qdrant clients. Await on application shutdown."""
+    with _async_wrappers_lock:
+        wrappers = list(_async_wrappers.values())
+        _async_wrappers.clear()
+    for wrapper in wrappers:
+        try:
+            await wrapper.close()
+        except Exception as e:
+            logging.warning(f"Error closing async Qdrant client: {e}")
 
 if __name__ == "__main__":
     print("Testing Qdrant connectivity...")
@@ -189,4 +352,4 @@ if __name__ == "__main__":
         collections = db.client.get_collections()
         print("Connection successful! Collections:", collections)
     except Exception as e:
-        print("Connection failed:", e) 
\ No newline at end of file
+        print("Connection failed:", e)
@@ -1,37 +1,83 @@
 import logging
-from typing import List, Dict, Any, Union, Optional
+import warnings
+from typing import List, Dict, Any, Union, Optional, Tuple
 import asyncio
-import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 from sentence_transformers import SentenceTransformer
 from ..config import get_settings
+from .embedding_cache import EmbeddingCache, embedding_cache, normalize_text
+
+# Loaded models are shared by every EmbeddingService in the process
+_models: Dict[str, SentenceTransformer] = {}
+_models_lock = threading.Lock()
+
+# Bounded pool for inference requested from async code, so concurrent requests
+# queue for a few forward passes instead of oversubscribing the CPU/GPU
+_inference_executor = ThreadPoolExecutor(
+    max_workers=get_settings().EMBEDDING_WORKERS, thread_name_prefix="embedding"
+)
+
+def _load_model(model_name: str) -> SentenceTransformer:
+    with _models_lock:
+        model = _models.get(model_name)
+        if model is None:
+            logging.info(f"Loading embedding model: {model_name}")
+            model = SentenceTransformer(model_name)
+            _models[model_name] = model
+        return model
+
+def _select_top_k(scores: np.ndarray, top_k: int) -> np.ndarray:
+    """Indices of the top k scores, best first, via a partial sort."""
+    k = min(top_k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind="stable")]
 
 class EmbeddingService:
-    """Service to generate vector embeddings from text (async, batch, normalized, versioned)"""
+    """
+    Service to generate vector embeddings from text (async, batch, normalized, versioned).
+
+    Vectors are contiguous float32 numpy arrays throughout; convert with .tolist()
+    only where a JSON/API boundary requires plain lists.
+    """
     
     def __init__(
         self, 
         model_name: str = "all-MiniLM-L6-v2",
-        cache_size: int = 1000,
-        embedding_dim: int = 384
+        cache_size: Optional[int] = None,
+        embedding_dim: int = 384,
+        cache: Optional[EmbeddingCache] = None,
+        model_version: Optional[str] = None
     ):
         """
         Initialize the embedding service.
         
         Args:
             model_name: Name of the SentenceTransformers model to use
-            cache_size: Maximum number of embeddings to cache
+            cache_size: Deprecated and ignored; the shared cache is sized by EMBEDDING_CACHE_SIZE
             embedding_dim: Dimension of the embedding vectors
+            cache: Embedding cache to use (defaults to the process-wide shared cache)
+            model_version: Version of the model weights for cache keys (defaults to EMBEDDING_MODEL_VERSION)
         """
+        if cache_size is not None:
+            warnings.warn(
+                "EmbeddingService(cache_size=...) is ignored; set EMBEDDING_CACHE_SIZE instead",
+                DeprecationWarning, stacklevel=2
+            )
         self.model_name = model_name
         self.embedding_dim = embedding_dim
-        self.cache_size = cache_size
+        self.configured_version = model_version or get_settings().EMBEDDING_MODEL_VERSION
         
-        # Lazy-loaded model (initialized on first use)
+        # Lazy-loaded model (initialized on first use, shared per process)
         self._model = None
+        self._dimension = None
         
-        # Simple in-memory cache
-        self._cache = {}
+        # Content-addressed cache shared by every service using the same model
+        self.cache = cache or embedding_cache
         
         logging.info(f"Initialized embedding service with model: {model_name}")
     
@@ -39,9 +85,16 @@ class EmbeddingService:
     def model(self):
         """Lazy-load the model only when first needed"""
         if self._model is None:
-            logging.info(f"Loading embedding model: {self.model_name}")
-            self._model = SentenceTransformer(self.model_name)
+            self._model = _load_model(self.model_name)
         return self._model
+
+    @property
+    def dimension(self) -> int:
+        """Vector dimension from model metadata (no inference)."""
+        if self._dimension is None:
+            get_dimension = getattr(self.model, "get_sentence_embedding_dimension", None)
+            self._dimension = (get_dimension() if get_dimension else None) or self.embedding_dim
+        return self._dimension
     
     @property
     def model_version(self) -> str:
@@ -54,23 +107,47 @@ class EmbeddingService:
             pass
         return self.model_name
 
+    @property
+    def cache_model_id(self) -> str:
+        """
+        Model identity for cache keys: name, configured version and dimension. Read
+        from configuration only, so that a cache hit never has to load the model.
+        """
+        return f"{self.model_name}:{self.configured_version}:{self.embedding_dim}"
+
     def embedding_metadata(self) -> Dict[str, Any]:
         """Return metadata about the embedding model/config for tracking/versioning."""
         return {
             "model_name": self.model_name,
             "model_version": self.model_version,
-            "embedding_dim": self.embedding_dim
+            "embedding_dim": self.dimension
         }
     
-    def _generate_cache_key(self, text: str) -> str:
-        """Generate a deterministic cache key for a text"""
-        # Use hash for efficient storage
-        return hashlib.md5(text.encode('utf-8')).hexdigest()
-    
+    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+        """
+        Cached, synchronous batch embedding returning a (len(texts), dim) float32 matrix.
+        Only texts missing from both cache tiers are encoded, in a single forward pass.
+        """
+        if not texts:
+            return np.empty((0, self.embedding_dim), dtype=np.float32)
+        model_id = self.cache_model_id
+        cached = self.cache.get_many(model_id, texts)
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if missing:
+            embeddings = self._embed_batch([texts[i] for i in missing])
+            self.cache.set_many(model_id, [texts[i] for i in missing], embeddings)
+            for i, embedding in zip(missing, embeddings):
+                cached[i] = embedding
+        return np.vstack(cached).astype(np.float32, copy=False)
+
+    def get_embedding(self, text: str) -> np.ndarray:
+        """Cached, synchronous embedding of a single text."""
+        return self.get_embeddings([text])[0]
+
     async def embed(
         self, 
         text: Union[str, List[str]]
-    ) -> Union[List[float], List[List[float]]]:
+    ) -> np.ndarray:
         """
         Generate normalized embeddings for text(s) (async, batch, cached).
         
@@ -78,58 +155,16 @@ class EmbeddingService:
             text: Single text or list of texts to embed
             
         Returns:
-            Vector embedding(s) as list of floats
+            A float32 vector for a single text, or a (n, dim) float32 matrix for a list
         """
-        # Determine if input is single text or batch
         is_single = isinstance(text, str)
         texts = [text] if is_single else text
-        
-        # Check cache for each text
-        results = []
-        texts_to_embed = []
-        text_indices = []
-        
-        for i, t in enumerate(texts):
-            cache_key = self._generate_cache_key(t)
-            if cache_key in self._cache:
-                # Use cached embedding
-                results.append(self._cache[cache_key])
-            else:
-                # Mark for embedding
-                texts_to_embed.append(t)
-                text_indices.append(i)
-        
-        # Generate embeddings for texts not in cache
-        if texts_to_embed:
-            # Use asyncio to avoid blocking
-            loop = asyncio.get_event_loop()
-            embeddings = await loop.run_in_executor(
-                None,
-                self._embed_batch,
-                texts_to_embed
-            )
-            
-            # Update cache with new embeddings
-            for text, embedding in zip(texts_to_embed, embeddings):
-                cache_key = self._generate_cache_key(text)
-                self._cache[cache_key] = embedding
-                
-                # Simple cache size management (LRU not implemented here)
-                if len(self._cache) > self.cache_size:
-                    # Remove a random item (in production, use LRU)
-                    self._cache.pop(next(iter(self._cache)))
-            
-            # Insert new embeddings into results at correct positions
-            for i, embedding in zip(text_indices, embeddings):
-                # Extend results list if needed
-                while len(results) <= i:
-                    results.append(None)
-                results[i] = embedding
-        
-        # Return single embedding or list based on input type
+        # Run inference on the bounded pool to avoid blocking the event loop
+        loop = asyncio.get_running_loop()
+        results = await loop.run_in_executor(_inference_executor, self.get_embeddings, texts)
         return results[0] if is_single else results
     
-    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
         """Generate normalized embeddings for a batch of texts (synchronous)"""
         # Preprocess texts
         processed_texts = [self._preprocess_text(t) for t in texts]
@@ -137,38 +172,74 @@ class EmbeddingService:
         # Generate embeddings
         embeddings = self.model.encode(
             processed_texts,
-            convert_to_tensor=False,  # Return as list
+            convert_to_numpy=True,
             normalize_embeddings=True  # Always normalize for cosine similarity
         )
         
-        # Convert to Python lists
-        return embeddings.tolist()
+        return np.ascontiguousarray(embeddings, dtype=np.float32)
     
     def _preprocess_text(self, text: str) -> str:
         """Preprocess text before embedding"""
-        # Simple preprocessing
-        processed = text.strip()
-        
-        # Truncate very long texts (model has token limits)
-        if len(processed) > 10000:
-            processed = processed[:10000]
-            
-        return processed
+        # Same normalization as the cache key, truncated for model token limits
+        return normalize_text(text)
     
     def calculate_similarity(
         self, 
-        embedding1: List[float], 
-        embedding2: List[float]
+        embedding1: np.ndarray, 
+        embedding2: np.ndarray
     ) -> float:
         """Calculate cosine similarity between two normalized embeddings"""
         # Since embeddings are normalized, dot product = cosine similarity
-        return sum(a * b for a, b in zip(embedding1, embedding2))
+        return float(np.dot(
+            np.asarray(embedding1, dtype=np.float32),
+            np.asarray(embedding2, dtype=np.float32)
+        ))
     
+    @staticmethod
+    def top_k_similar(
+        query_embedding: np.ndarray,
+        candidate_embeddings: np.ndarray,
+        top_k: int = 5
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score a (n, dim) candidate matrix against a query in one BLAS call and
+        return (indices, scores) of the top k, best first.
+        """
+        scores = np.asarray(candidate_embeddings, dtype=np.float32) @ np.asarray(query_embedding, dtype=np.float32)
+        top = _select_top_k(scores, top_k)
+        return top, scores[top]
+
+    def rank_texts(
+        self,
+        query_embedding: np.ndarray,
+        candidate_texts: List[str],
+        top_k: int = 5,
+        chunk_size: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Synchronous top-k over candidate texts. With chunk_size set, candidates are
+        embedded and scored chunk by chunk and only the running top k is kept, so
+        memory stays at O(chunk_size * dim) regardless of the candidate count.
+        """
+        if not chunk_size or chunk_size >= len(candidate_texts):
+            return self.top_k_similar(query_embedding, self.get_embeddings(candidate_texts), top_k)
+        best_indices = np.empty(0, dtype=np.int64)
+        best_scores = np.empty(0, dtype=np.float32)
+        for start in range(0, len(candidate_texts), chunk_size):
+            chunk = self.get_embeddings(candidate_texts[start:start + chunk_size])
+            indices, scores = self.top_k_similar(query_embedding, chunk, top_k)
+            merged_indices = np.concatenate([best_indices, indices + start])
+            merged_scores = np.concatenate([best_scores, scores])
+            keep = _select_top_k(merged_scores, top_k)
+            best_indices, best_scores = merged_indices[keep], merged_scores[keep]
+        return best_indices, best_scores
+
     async def find_similar_texts(
         self,
         query_text: str,
         candidate_texts: List[str],
-        top_k: int = 5
+        top_k: int = 5,
+        chunk_size: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Find the most similar texts to a query.
@@ -177,40 +248,30 @@ class EmbeddingService:
             query_text: The text to compare against
             candidate_texts: List of texts to compare with
             top_k: Number of top results to return
+            chunk_size: Embed and score candidates in chunks of this size (bounded memory)
             
         Returns:
             List of dicts with text and similarity score
         """
-        # Get embeddings
+        if not candidate_texts:
+            return []
         query_embedding = await self.embed(query_text)
-        candidate_embeddings = await self.embed(candidate_texts)
-        
-        # Calculate similarities
-        similarities = [
-            self.calculate_similarity(query_embedding, emb)
-            for emb in candidate_embeddings
-        ]
-        
-        # Sort by similarity (descending)
-        results = sorted(
-            [
-                {"text": text, "similarity": similarity}
-                for text, similarity in zip(candidate_texts, similarities)
-            ],
-            key=lambda x: x["similarity"],
-            reverse=True
+        loop = asyncio.get_running_loop()
+        indices, scores = await loop.run_in_executor(
+            _inference_executor, self.rank_texts, query_embedding, candidate_texts, top_k, chunk_size
         )
-        
-        # Return top k
-        return results[:top_k]
+        return [
+            {"text": candidate_texts[i], "similarity": float(score)}
+            for i, score in zip(indices, scores)
+        ]
 
     # Deprecated: use async embed instead
     def generate_embedding(self, text: str) -> list:
         import warnings
-        warnings.warn("Use await embed(text) instead. This is a sync, non-cached, non-versioned fallback.", DeprecationWarning)
-        return self.model.encode([text], normalize_embeddings=True)[0].tolist()
+        warnings.warn("Use get_embedding(text) or await embed(text) instead.", DeprecationWarning)
+        return self.get_embedding(text).tolist()
     
     def generate_embeddings(self, texts: list[str]) -> list:
         import warnings
-        warnings.warn("Use await embed(texts) instead. This is a sync, non-cached, non-versioned fallback.", DeprecationWarning)
-        return self.model.encode(texts, normalize_embeddings=True).tolist() 
\ No newline at end of file
+        warnings.warn("Use get_embeddings(texts) or await embed(texts) instead.", DeprecationWarning)
+        return self.get_embeddings(texts).tolist() 
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+Content-addressed embedding cache shared by every embedding code path.
+
+Keys are a SHA-256 digest of the model identity and the normalized text, so
+they are stable across processes and restarts. The identity (model name,
+EMBEDDING_MODEL_VERSION and dimension) comes from configuration rather than the
+loaded model, so a cache hit never loads the model; the price is that changed
+weights under the same name need an EMBEDDING_MODEL_VERSION bump. Lookups go
+through an in-process LRU first and then Redis, where vectors are stored as raw
+float32 bytes rather than pickled Python lists.
+"""
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from backend.data_services.redis_cache import RedisCache
+from ..config import get_settings
+
+MAX_TEXT_LENGTH = 10000
+REDIS_KEY_PREFIX = "emb:"
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a text for both embedding and cache keys."""
+    text = unicodedata.normalize("NFC", text or "")
+    return " ".join(text.split())[:MAX_TEXT_LENGTH]
+
+def make_cache_key(model_id: str, text: str) -> str:
+    """Stable digest of model identity and normalized text."""
+    digest = hashlib.sha256(f"{model_id}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+    return f"{REDIS_KEY_PREFIX}{digest}"
+
+class EmbeddingCache:
+    """Two-tier (local LRU + Redis) cache of float32 embedding vectors."""
+    def __init__(self, max_size: int = 10000, ttl: Optional[int] = 7 * 24 * 3600, shared=None):
+        """
+        Args:
+            max_size: Entries kept in the in-process LRU tier
+            ttl: Expiry for entries in the shared tier (None keeps them forever)
+            shared: Redis client for the shared tier; None disables it
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared = shared
+        self.local = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {"local_hits": 0, "shared_hits": 0, "misses": 0, "shared_errors": 0}
+
+    def get_many(self, model_id: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Return cached vectors aligned with texts (None for misses)."""
+        keys = [make_cache_key(model_id, t) for t in texts]
+        results = [None] * len(keys)
+        pending = []
+        with self.lock:
+            for i, key in enumerate(keys):
+                vector = self.local.get(key)
+                if vector is not None:
+                    self.local.move_to_end(key)
+                    results[i] = vector
+                    self.counters["local_hits"] += 1
+                else:
+                    pending.append(i)
+        if pending and self.shared is not None:
+            try:
+                values = self.shared.mget([keys[i] for i in pending])
+            except Exception as e:
+                logging.warning(f"[EMBEDDING_CACHE] Shared tier unavailable: {e}")
+                values = [None] * len(pending)
+                with self.lock:
+                    self.counters["shared_errors"] += 1
+            still_missing = []
+            for i, raw in zip(pending, values):
+                if raw is None:
+                    still_missing.append(i)
+                    continue
+                vector = np.frombuffer(raw, dtype=np.float32)
+                results[i] = vector
+                self._set_local(keys[i], vector)
+            with self.lock:
+                self.counters["shared_hits"] += len(pending) - len(still_missing)
+            pending = still_missing
+        with self.lock:
+            self.counters["misses"] += len(pending)
+        return results
+
+    def set_many(self, model_id: str, texts: List[str], vectors) -> None:
+        """Store vectors for texts in both tiers."""
+        items = {}
+        for text, vector in zip(texts, vectors):
+            key = make_cache_key(model_id, text)
+            vector = np.asarray(vector, dtype=np.float32)
+            self._set_local(key, vector)
+            items[key] = vector.tobytes()
+        if not items or self.shared is None:
+            return
+        try:
+            pipe = self.shared.pipeline(transaction=False)
+            for key, raw in items.items():
+                if self.ttl:
+                    pipe.setex(key, self.ttl, raw)
+                else:
+                    pipe.set(key, raw)
+            pipe.execute()
+        except Exception as e:
+            logging.warning(f"[EMBEDDING_CACHE] Failed to write shared tier: {e}")
+            with self.lock:
+                self.counters["shared_errors"] += 1
+
+    def _set_local(self, key: str, vector: np.ndarray):
+        with self.lock:
+            if key in self.local:
+                self.local.move_to_end(key)
+            elif len(self.local) >= self.max_size:
+                self.local.popitem(last=False)
+            self.local[key] = vector
+
+    def clear(self):
+        """Drop the local tier (the shared tier is left to its TTL)."""
+        with self.lock:
+            self.local.clear()
+
+    def stats(self) -> Dict[str, float]:
+        with self.lock:
+            counters = dict(self.counters)
+            size = len(self.local)
+        lookups = counters["local_hits"] + counters["shared_hits"] + counters["misses"]
+        hits = counters["local_hits"] + counters["shared_hits"]
+        return {
+            **counters,
+            "local_size": size,
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+def _build_default_cache() -> EmbeddingCache:
+    settings = get_settings()
+    shared = None
+    if settings.EMBEDDING_CACHE_REDIS:
+        try:
+            shared = RedisCache().client
+        except Exception as e:
+            logging.warning(f"[EMBEDDING_CACHE] Redis disabled for embedding cache: {e}")
+    return EmbeddingCache(
+        max_size=settings.EMBEDDING_CACHE_SIZE,
+        ttl=settings.EMBEDDING_CACHE_TTL or None,
+        shared=shared,
+    )
+
+embedding_cache = _build_default_cache()
@@ -1,9 +1,11 @@
+import numpy as np
+
 from .embedding import EmbeddingService
 
 # Create a singleton instance
 _embedding_service = EmbeddingService()
 
-def get_embedding(text: str) -> list:
+def get_embedding(text: str) -> np.ndarray:
     """
     Get embedding for a single text using the singleton EmbeddingService instance.
     
@@ -11,7 +13,7 @@ def get_embedding(text: str) -> list:
         text: The text to generate embedding for
         
     Returns:
-        List of floats representing the embedding vector
+        float32 numpy array representing the embedding vector
     """
-    # Use the synchronous method since we're in a non-async context
-    return _embedding_service._embed_batch([text])[0] 
\ No newline at end of file
+    # Use the synchronous cached method since we're in a non-async context
+    return _embedding_service.get_embedding(text) 
\ No newline at end of file
@@ -15,8 +15,12 @@ class GraphRAGContextBuilder:
         """
         Query GraphRAG and format results for agent consumption.
         """
-        # Query GraphRAG for context
-        results = self.graph_rag_engine.retrieve_with_context(query_text=query, filters={"user_id": user_id})
+        # Query GraphRAG for context; the User node for the fallback is fetched alongside retrieval
+        results = self.graph_rag_engine.retrieve_with_context(
+            query_text=query,
+            filters={"user_id": user_id},
+            extras={"user_profile": lambda: self.graph_rag_engine.graph_db.get_node("User", {"id": user_id})}
+        )
         print("[DEBUG] Results from retrieve_with_context:", results)
         print("[DEBUG] Type of results:", type(results))
         # Filter for agent/task relevance
@@ -26,7 +30,7 @@ class GraphRAGContextBuilder:
         # If no results, do a fallback semantic search on the User node
         if not relevant.get("results"):
             print("[DEBUG] No results found, performing fallback semantic search on User node.")
-            user_nodes = self.graph_rag_engine.graph_db.get_node("User", {"id": user_id})
+            user_nodes = results.get("extras", {}).get("user_profile")
             if user_nodes:
                 user_doc = user_nodes[0]
                 # Add the user node as a result
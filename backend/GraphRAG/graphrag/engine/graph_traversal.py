@@ -1,11 +1,99 @@
 from typing import List, Dict, Any, Optional
 
+RELATED_TASKS_BULK_QUERY = """
+UNWIND $entity_ids AS entity_id
+MATCH (entity) WHERE entity.id = entity_id
+CALL {
+    WITH entity
+    MATCH (entity)-[:RELATED_TO]-(task:Task)
+    RETURN task
+    UNION
+    WITH entity
+    MATCH (entity)<-[:MENTIONED_IN]-(:Message)<-[:EXTRACTED_FROM]-(task:Task)
+    RETURN task
+}
+WITH entity_id, task
+WHERE $statuses IS NULL OR task.status IN $statuses
+RETURN entity_id, collect(DISTINCT task) AS tasks
+"""
+
+class _Frontier:
+    """State of a hop-by-hop traversal: visited ids, collected nodes/relationships and the current frontier."""
+    def __init__(self, seed_node_ids: List[str], max_nodes: int):
+        self.max_nodes = max_nodes
+        self.visited = set(seed_node_ids)
+        self.nodes = []
+        self.relationships = []
+        self.seen_relationships = set()
+        self.frontier = list(dict.fromkeys(seed_node_ids))
+
+    def next_params(self) -> Optional[Dict[str, Any]]:
+        """Query parameters for the next hop, or None when the walk is done."""
+        remaining = self.max_nodes - len(self.nodes)
+        if not self.frontier or remaining <= 0:
+            return None
+        return {"frontier": self.frontier, "visited": list(self.visited), "limit": remaining}
+
+    def absorb(self, records):
+        next_frontier = []
+        for record in records:
+            m = record.get('m')
+            r = record.get('r')
+            if r is not None:
+                rel_key = getattr(r, 'element_id', None) or id(r)
+                if rel_key not in self.seen_relationships:
+                    self.seen_relationships.add(rel_key)
+                    self.relationships.append(r)
+            if m is not None and m['id'] not in self.visited:
+                self.visited.add(m['id'])
+                self.nodes.append(m)
+                next_frontier.append(m['id'])
+                if len(self.nodes) >= self.max_nodes:
+                    break
+        self.frontier = next_frontier
+
+    def result(self) -> Dict[str, Any]:
+        return {"nodes": self.nodes, "relationships": self.relationships}
+
 class GraphTraversal:
-    def __init__(self, graph_db):
+    def __init__(self, graph_db, async_graph_db=None):
+        """async_graph_db (an AsyncNeo4jWrapper) is only needed for the a* coroutine methods."""
         self.graph_db = graph_db
+        self.async_graph_db = async_graph_db
         self.max_nodes_per_hop = 25
 
     def traverse_from_seeds(
+        self,
+        seed_node_ids: List[str],
+        max_hops: int = 2,
+        max_nodes_per_hop: int = 25,
+        relationship_types: Optional[List[str]] = None,
+        node_types: Optional[List[str]] = None,
+        mode: str = "frontier"
+    ) -> Dict[str, Any]:
+        """
+        Multi-hop traversal from seed nodes, with relationship/node type filtering and cycle avoidance.
+
+        mode="frontier" (default) expands every node of the current hop with one Cypher
+        query, so the number of round trips is max_hops rather than the number of
+        visited nodes. mode="per_node" is the original breadth-first walk that issues
+        one query per visited node.
+        """
+        if mode == "per_node":
+            return self._traverse_per_node(
+                seed_node_ids, max_hops, max_nodes_per_hop, relationship_types, node_types
+            )
+        self.max_nodes_per_hop = max_nodes_per_hop
+        walk = _Frontier(seed_node_ids, max_nodes_per_hop)
+        query = self._frontier_query(relationship_types, node_types)
+        for hop in range(max_hops):
+            params = walk.next_params()
+            if params is None:
+                break
+            walk.absorb(self.graph_db.run_query(query, params))
+        return walk.result()
+
+    async def atraverse_from_seeds(
         self,
         seed_node_ids: List[str],
         max_hops: int = 2,
@@ -13,9 +101,42 @@ class GraphTraversal:
         relationship_types: Optional[List[str]] = None,
         node_types: Optional[List[str]] = None
     ) -> Dict[str, Any]:
+        """Frontier traversal on the async graph wrapper (same queries and result shape)."""
+        walk = _Frontier(seed_node_ids, max_nodes_per_hop)
+        query = self._frontier_query(relationship_types, node_types)
+        for hop in range(max_hops):
+            params = walk.next_params()
+            if params is None:
+                break
+            walk.absorb(await self.async_graph_db.run_query(query, params))
+        return walk.result()
+
+    def _frontier_query(self, relationship_types: Optional[List[str]], node_types: Optional[List[str]]) -> str:
         """
-        Breadth-first multi-hop traversal from seed nodes, with relationship/node type filtering and cycle avoidance.
+        Expand one hop from every frontier node in a single query. Each source node
+        contributes at most $limit neighbours and the hop as a whole is capped at $limit.
         """
+        relationship_filter = self._build_relationship_filter(relationship_types)
+        node_filter = self._build_node_filter(node_types)
+        return f"""
+        UNWIND $frontier AS node_id
+        MATCH (n)-[r{relationship_filter}]-(m{node_filter})
+        WHERE n.id = node_id AND NOT m.id IN $visited
+        WITH node_id, collect({{m: m, r: r}})[..$limit] AS expansions
+        UNWIND expansions AS e
+        RETURN e.m AS m, e.r AS r
+        LIMIT $limit
+        """
+
+    def _traverse_per_node(
+        self,
+        seed_node_ids: List[str],
+        max_hops: int,
+        max_nodes_per_hop: int,
+        relationship_types: Optional[List[str]],
+        node_types: Optional[List[str]]
+    ) -> Dict[str, Any]:
+        """Breadth-first traversal issuing one expansion query per visited node."""
         visited = set()
         nodes = []
         relationships = []
@@ -74,20 +195,46 @@ class GraphTraversal:
 
     def find_related_tasks(self, entity_id: str, status_filter: Optional[List[str]] = None):
         """Find tasks related to a specific entity (by RELATED_TO or EXTRACTED_FROM)."""
-        status_clause = ""
-        if status_filter:
-            status_list = ", ".join([f"'{s}'" for s in status_filter])
-            status_clause = f"AND task.status IN [{status_list}]"
-        query = f"""
+        query = """
         MATCH (entity)-[:RELATED_TO]-(task:Task)
-        WHERE entity.id = $entity_id {status_clause}
+        WHERE entity.id = $entity_id AND ($statuses IS NULL OR task.status IN $statuses)
         RETURN task
         UNION
         MATCH (entity)<-[:MENTIONED_IN]-(msg:Message)<-[:EXTRACTED_FROM]-(task:Task)
-        WHERE entity.id = $entity_id {status_clause}
+        WHERE entity.id = $entity_id AND ($statuses IS NULL OR task.status IN $statuses)
         RETURN task
         """
-        return self.graph_db.run_query(query, {"entity_id": entity_id})
+        return self.graph_db.run_query(query, {"entity_id": entity_id, "statuses": status_filter or None})
+
+    def find_related_tasks_bulk(self, entity_ids: List[str], status_filter: Optional[List[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Find related tasks for many entities in one query. Returns {entity_id: [{"task": task}, ...]}
+        containing only entities that have at least one matching task.
+        """
+        if not entity_ids:
+            return {}
+        return self._task_map(self.graph_db.run_query(RELATED_TASKS_BULK_QUERY, {
+            "entity_ids": list(dict.fromkeys(entity_ids)),
+            "statuses": status_filter or None
+        }))
+
+    async def afind_related_tasks_bulk(self, entity_ids: List[str], status_filter: Optional[List[str]] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """find_related_tasks_bulk on the async graph wrapper."""
+        if not entity_ids:
+            return {}
+        return self._task_map(await self.async_graph_db.run_query(RELATED_TASKS_BULK_QUERY, {
+            "entity_ids": list(dict.fromkeys(entity_ids)),
+            "statuses": status_filter or None
+        }))
+
+    @staticmethod
+    def _task_map(results) -> Dict[str, List[Dict[str, Any]]]:
+        task_map = {}
+        for record in results:
+            tasks = record.get('tasks')
+            if tasks:
+                task_map[record.get('entity_id')] = [{"task": task} for task in tasks]
+        return task_map
 
     def find_task_dependencies(self, task_id: str):
         """Find tasks that the given task depends on (DEPENDS_ON)."""
@@ -1,3 +1,5 @@
+import asyncio
+import atexit
 import uuid
 from typing import List, Dict, Any, Optional
 import threading
@@ -6,10 +8,13 @@ from collections import OrderedDict
 from backend.data_services.redis_cache import RedisCache
 from backend.data_services.cold_storage import store_in_cold_storage, retrieve_from_cold_storage
 
-from ..db.graph_db import Neo4jWrapper
-from ..db.vector_db import QdrantWrapper
+from ..db.graph_db import Neo4jWrapper, AsyncNeo4jWrapper
+from ..db.vector_db import QdrantWrapper, AsyncQdrantWrapper, get_shared_async_qdrant
 from ..embeddings.embedding import EmbeddingService
+from ..embeddings.embedding_cache import embedding_cache
+from ..db.collection_registry import vectorized_node_types
 from .graph_traversal import GraphTraversal
+from .retrieval_planner import RetrievalPlanner
 import logging
 
 class LRUCache:
@@ -51,7 +56,6 @@ class LRUCache:
 
 # Initialize caches
 node_cache = LRUCache(max_size=10000, ttl=1800)  # 30 min
-embedding_cache = LRUCache(max_size=5000, ttl=3600)  # 60 min
 redis_cache = RedisCache()
 
 # --- Node Caching ---
@@ -76,13 +80,8 @@ def get_node_with_cache(node_id, node_type, graph_db):
 
 # --- Embedding Caching ---
 def get_embedding_with_cache(text, embedding_service):
-    text_hash = str(hash(text))
-    cached_embedding = embedding_cache.get(text_hash)
-    if cached_embedding is not None:
-        return cached_embedding
-    embedding = embedding_service.generate_embedding(text)
-    embedding_cache.set(text_hash, embedding)
-    return embedding
+    # Keyed by model and normalized text in the shared embedding cache
+    return embedding_service.get_embedding(text)
 
 # --- High-level Operation Cache ---
 def get_operation_cache(key):
@@ -159,7 +158,7 @@ def create_relationship_with_cache(source_id, source_type, target_id, target_typ
 def get_node(node_id, node_type, graph_db):
     return get_node_with_cache(node_id, node_type, graph_db)
 
-# --- Pruning, Archiving, and Batch Write Stubs ---
+# --- Pruning and Archiving ---
 PRUNING_THRESHOLDS = {
     "Message": {"archive_after": 90, "remove_after": 365},
     "Task": {"archive_after": 60, "remove_after": 180},
@@ -215,32 +214,174 @@ def get_node_with_archive_support(node_id, node_type, graph_db):
         update_node_access_timestamp(node_id, graph_db)
     return node
 
-# --- Batch Write Queue (Stub) ---
+# --- Batch Write Queue ---
 class WriteQueue:
-    def __init__(self, max_size=10000):
+    """
+    Write-behind queue that turns many small graph writes into a few UNWIND statements.
+
+    Operations are grouped by type (and label / relationship type) and flushed when
+    batch_size operations are waiting or flush_interval seconds have passed. push()
+    blocks while max_size operations are pending (backpressure) and close() flushes
+    everything that is left.
+
+    Operation formats:
+        node_upsert:          {"label", "properties"}  (properties must include "id")
+        relationship_create:  {"from_label", "to_label", "rel_type", "from_id", "to_id", "properties"?}
+        property_update:      {"label", "id", "properties"}
+    """
+    OPERATION_TYPES = ("node_upsert", "relationship_create", "property_update")
+    REQUIRED_KEYS = {
+        "node_upsert": ("label", "properties"),
+        "relationship_create": ("from_label", "to_label", "rel_type", "from_id", "to_id"),
+        "property_update": ("label", "id", "properties"),
+    }
+
+    def __init__(self, graph_db=None, max_size=10000, batch_size=500, flush_interval=1.0):
         self.queue = []
         self.max_size = max_size
-    def push(self, op):
-        self.queue.append(op)
-        if len(self.queue) >= self.max_size:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._graph_db = graph_db
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self.stats = {"queued": 0, "written": 0, "failed": 0, "flushes": 0}
+
+    @property
+    def graph_db(self):
+        if self._graph_db is None:
+            self._graph_db = Neo4jWrapper()
+        return self._graph_db
+
+    def push(self, op, timeout=None):
+        """Queue an operation, blocking while the queue is full. Raises TimeoutError on timeout."""
+        if op.get("type") not in self.OPERATION_TYPES:
+            raise ValueError(f"Unknown write operation type: {op.get('type')}")
+        data = op.get("data")
+        missing = [k for k in self.REQUIRED_KEYS[op["type"]] if not isinstance(data, dict) or k not in data]
+        if missing:
+            raise ValueError(f"{op['type']} operation is missing {', '.join(missing)}")
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("WriteQueue is closed")
+            self._ensure_worker()
+            deadline = time.time() + timeout if timeout is not None else None
+            while len(self.queue) >= self.max_size:
+                self._cond.notify_all()
+                remaining = deadline - time.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("WriteQueue is full")
+                self._cond.wait(remaining)
+            self.queue.append(op)
+            self.stats["queued"] += 1
+            if len(self.queue) >= self.batch_size:
+                self._cond.notify_all()
+
+    def _ensure_worker(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, daemon=True, name="graph-write-queue")
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                # A full queue means producers are blocked, so flush without waiting
+                if not self._closed and len(self.queue) < min(self.batch_size, self.max_size):
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+                if not self.queue:
+                    continue
             self.process_batch()
+
     def process_batch(self):
-        # Group and process batched operations (stub)
-        self.queue.clear()
+        """Write up to batch_size queued operations. Returns the number of operations taken."""
+        with self._flush_lock:
+            with self._cond:
+                batch = self.queue[:self.batch_size]
+                del self.queue[:self.batch_size]
+                self._cond.notify_all()
+            if not batch:
+                return 0
+            groups, malformed = self._group(batch)
+            if malformed:
+                self.stats["failed"] += malformed
+                logging.error(f"WriteQueue dropped {malformed} malformed operations")
+            for key, rows in groups:
+                try:
+                    self._write_group(key, rows)
+                    self.stats["written"] += len(rows)
+                except Exception as e:
+                    self.stats["failed"] += len(rows)
+                    logging.error(f"WriteQueue failed to write {len(rows)} {key} operations: {e}")
+            self.stats["flushes"] += 1
+            return len(batch)
+
+    @staticmethod
+    def _group(batch):
+        """
+        Group operations into (key, rows), nodes first so relationships can match them.
+        Returns (groups, malformed); an op that cannot be grouped is counted, not raised,
+        so it cannot take the rest of the batch (or the flush thread) down with it.
+        """
+        groups = OrderedDict()
+        malformed = 0
+        for op in batch:
+            try:
+                data = op["data"]
+                if op["type"] == "node_upsert":
+                    key = ("node_upsert", data["label"])
+                    row = data["properties"]
+                elif op["type"] == "relationship_create":
+                    key = ("relationship_create", data["from_label"], data["to_label"], data["rel_type"])
+                    row = {"from_id": data["from_id"], "to_id": data["to_id"], "properties": data.get("properties") or {}}
+                else:
+                    key = ("property_update", data["label"])
+                    row = {"id": data["id"], "properties": data["properties"]}
+            except (KeyError, TypeError) as e:
+                malformed += 1
+                logging.error(f"WriteQueue skipping malformed {op.get('type')} operation: missing {e}")
+                continue
+            groups.setdefault(key, []).append(row)
+        order = {t: i for i, t in enumerate(WriteQueue.OPERATION_TYPES)}
+        return sorted(groups.items(), key=lambda item: order[item[0][0]]), malformed
+
+    def _write_group(self, key, rows):
+        if key[0] == "node_upsert":
+            self.graph_db.upsert_nodes(key[1], rows)
+        elif key[0] == "relationship_create":
+            self.graph_db.create_relationships(key[1], key[2], key[3], rows)
+        else:
+            self.graph_db.update_nodes(key[1], rows)
+
+    def flush(self):
+        """Write everything currently queued."""
+        while self.process_batch():
+            pass
+
+    def close(self):
+        """Stop the flush thread and write whatever is left."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
 
 write_queue = WriteQueue()
+atexit.register(write_queue.close)
 
-def queue_write_operation(operation_type, data):
+def queue_write_operation(operation_type, data, timeout=None):
     write_queue.push({
         "type": operation_type,
         "data": data,
         "timestamp": time.time()
-    })
+    }, timeout=timeout)
 
 # --- Monitoring and Scheduled Jobs ---
 cache_metrics = {
     'node_cache': {'get': {'hit': 0, 'miss': 0}},
-    'embedding_cache': {'get': {'hit': 0, 'miss': 0}},
     'redis_cache': {'get': {'hit': 0, 'miss': 0}},
 }
 
@@ -259,6 +400,11 @@ def log_cache_stats():
         total = hits + misses
         hit_rate = (hits / total) * 100 if total > 0 else 0
         logging.info(f"Cache {cache_type} hit rate: {hit_rate:.2f}% ({hits} hits, {misses} misses)")
+    stats = embedding_cache.stats()
+    logging.info(
+        f"Cache embedding_cache hit rate: {stats['hit_rate'] * 100:.2f}% "
+        f"({stats['local_hits']} local, {stats['shared_hits']} shared, {stats['misses']} misses)"
+    )
 
 # Schedule pruning/archiving job every 24 hours
 def schedule_pruning_job(graph_db, interval_hours=24):
@@ -271,6 +417,25 @@ def schedule_pruning_job(graph_db, interval_hours=24):
 # Example: start scheduled job (in production, call this from app startup)
 # schedule_pruning_job(graph_db_instance)
 
+def merge_typed_hits(hits_by_type: Dict[str, List[Dict]], quotas: Dict[str, int], limit: int) -> List[Dict]:
+    """
+    Merge per-collection hits into one ranking. Scores are min-max normalized
+    within each type so one collection's score distribution cannot crowd out
+    the others; each type contributes at most its quota. Ties fall back to the raw score.
+    """
+    merged = []
+    for node_type, hits in hits_by_type.items():
+        hits = sorted(hits, key=lambda h: h["score"], reverse=True)[:quotas.get(node_type, 0)]
+        if not hits:
+            continue
+        high, low = hits[0]["score"], hits[-1]["score"]
+        spread = high - low
+        for hit in hits:
+            normalized = (hit["score"] - low) / spread if spread > 0 else 1.0
+            merged.append({**hit, "node_type": node_type, "normalized_score": normalized})
+    merged.sort(key=lambda h: (h["normalized_score"], h["score"]), reverse=True)
+    return merged[:limit]
+
 class GraphRAGEngine:
     def __init__(
         self,
@@ -279,7 +444,10 @@ class GraphRAGEngine:
         embedding_service: Optional[EmbeddingService] = None,
         collection_name: str = "muntu_knowledge",
         similarity_threshold: float = 0.7,
-        max_results: int = 10
+        max_results: int = 10,
+        async_graph_db: Optional[AsyncNeo4jWrapper] = None,
+        async_vector_db: Optional[AsyncQdrantWrapper] = None,
+        stage_timeouts: Optional[Dict[str, float]] = None
     ):
         self.graph_db = graph_db or Neo4jWrapper()
         self.vector_db = vector_db or QdrantWrapper()
@@ -287,20 +455,36 @@ class GraphRAGEngine:
         self.collection_name = collection_name
         self.similarity_threshold = similarity_threshold
         self.max_results = max_results
-        self.graph_traversal = GraphTraversal(self.graph_db)
+        self.graph_traversal = GraphTraversal(self.graph_db, async_graph_db)
+        self._async_vector_db = async_vector_db
+        self.retrieval_planner = RetrievalPlanner(self, stage_timeouts)
         self._initialize_collection()
 
+    @property
+    def async_graph_db(self) -> AsyncNeo4jWrapper:
+        """Async graph wrapper for the a* methods, created on first use."""
+        return self._async_traversal().async_graph_db
+
+    def _async_traversal(self) -> GraphTraversal:
+        if self.graph_traversal.async_graph_db is None:
+            self.graph_traversal.async_graph_db = AsyncNeo4jWrapper()
+        return self.graph_traversal
+
+    @property
+    def async_vector_db(self) -> AsyncQdrantWrapper:
+        """Async vector wrapper for the a* methods, created on first use."""
+        if self._async_vector_db is None:
+            self._async_vector_db = get_shared_async_qdrant()
+        return self._async_vector_db
+
     def _initialize_collection(self) -> None:
-        # For simplicity, always try to create the collection (Qdrant will not overwrite if exists)
-        sample_embedding = self.embedding_service.model.encode(["Sample text"])[0]
-        dimension = len(sample_embedding)
+        # Create-if-missing, verified once per process; never drops existing data
         try:
-            self.vector_db.client.recreate_collection(
-                collection_name=self.collection_name,
-                vectors_config={"size": dimension, "distance": "Cosine"}
-            )
-        except Exception:
-            pass
+            self.vector_db.ensure_collection(self.collection_name, self.embedding_service.dimension)
+        except ValueError:
+            raise
+        except Exception as e:
+            logging.warning(f"Could not verify Qdrant collection {self.collection_name}: {e}")
 
     def store_document(
         self,
@@ -343,20 +527,177 @@ class GraphRAGEngine:
             }
         )
         return doc_id
-    
+
+    def store_documents(
+        self,
+        documents: List[Dict[str, Any]],
+        chunk_size: int = 256
+    ) -> Dict[str, Any]:
+        """
+        Bulk version of store_document for backfills.
+
+        Each document is a dict with the same fields store_document takes:
+        'text', 'metadata', 'node_type' and optional 'relationships'.
+        Embeddings are computed in one batched model call, nodes are written with
+        one UNWIND statement per node type and vectors are upserted in chunks of
+        chunk_size points. A failure only fails the items it touched.
+
+        Returns:
+            {"ids": [doc_id or None, ...], "failed": [{"index", "stage", "error"}, ...]}
+            where ids is aligned with the input list. An item whose node and vector
+            were stored but whose relationships failed keeps its id and is also
+            listed in failed with stage 'relationships'.
+        """
+        ids: List[Optional[str]] = [None] * len(documents)
+        failed: List[Dict[str, Any]] = []
+        prepared = []
+
+        def fail(indices, stage, error):
+            for i in indices:
+                failed.append({"index": i, "stage": stage, "error": str(error)})
+
+        # Validate and build node properties
+        for i, doc in enumerate(documents):
+            try:
+                text = doc.get("text") or ""
+                metadata = doc.get("metadata") or {}
+                node_type = doc["node_type"]
+                doc_id = str(uuid.uuid4())
+                properties = {"id": doc_id, **metadata}
+                if node_type == "Message":
+                    properties["content"] = text
+                elif node_type in ["Document"]:
+                    properties["text"] = text
+                self.graph_db.validate_node(node_type, properties)
+                for rel in doc.get("relationships") or []:
+                    self.graph_db.validate_relationship(
+                        node_type, rel["target_type"], rel["rel_type"], rel.get("properties")
+                    )
+                prepared.append({
+                    "index": i,
+                    "id": doc_id,
+                    "text": text,
+                    "embed_text": text or metadata.get("name", ""),
+                    "metadata": metadata,
+                    "node_type": node_type,
+                    "properties": properties,
+                    "relationships": doc.get("relationships") or [],
+                })
+            except Exception as e:
+                fail([i], "validate", e)
+
+        if not prepared:
+            return {"ids": ids, "failed": failed}
+
+        # One batched forward pass for all documents
+        try:
+            embeddings = self.embedding_service._embed_batch([p["embed_text"] for p in prepared])
+        except Exception as e:
+            fail([p["index"] for p in prepared], "embed", e)
+            return {"ids": ids, "failed": failed}
+        for p, embedding in zip(prepared, embeddings):
+            p["embedding"] = embedding
+
+        # One UNWIND per node type
+        written = []
+        by_type: Dict[str, List[Dict]] = {}
+        for p in prepared:
+            by_type.setdefault(p["node_type"], []).append(p)
+        for node_type, group in by_type.items():
+            try:
+                self.graph_db.create_nodes(node_type, [p["properties"] for p in group])
+                written.extend(group)
+            except Exception as e:
+                fail([p["index"] for p in group], "graph", e)
+
+        # One UNWIND per (node type, target type, relationship type)
+        rel_groups: Dict[tuple, List[Dict]] = {}
+        for p in written:
+            for rel in p["relationships"]:
+                key = (p["node_type"], rel["target_type"], rel["rel_type"])
+                rel_groups.setdefault(key, []).append({
+                    "index": p["index"],
+                    "from_id": p["id"],
+                    "to_id": rel["target_id"],
+                    "properties": rel.get("properties", {}),
+                })
+        rel_failed = set()
+        for (from_label, to_label, rel_type), rows in rel_groups.items():
+            try:
+                self.graph_db.create_relationships(from_label, to_label, rel_type, rows)
+            except Exception as e:
+                indices = {row["index"] for row in rows} - rel_failed
+                rel_failed |= indices
+                fail(sorted(indices), "relationships", e)
+
+        # Multi-point upserts, one request per chunk
+        for start in range(0, len(written), chunk_size):
+            chunk = written[start:start + chunk_size]
+            try:
+                self.vector_db.upsert_embeddings(
+                    collection=self.collection_name,
+                    ids=[p["id"] for p in chunk],
+                    vectors=[p["embedding"] for p in chunk],
+                    payloads=[
+                        {"text": p["text"], "node_type": p["node_type"], **p["metadata"]}
+                        for p in chunk
+                    ]
+                )
+            except Exception as e:
+                fail([p["index"] for p in chunk], "vector", e)
+                continue
+            for p in chunk:
+                ids[p["index"]] = p["id"]
+
+        failed.sort(key=lambda f: f["index"])
+        return {"ids": ids, "failed": failed}
+
     def semantic_search(self, query_text: str, filters: Optional[Dict] = None) -> List[Dict]:
         # Use embedding cache for query embedding
         query_embedding = get_embedding_with_cache(query_text, self.embedding_service)
+        # Filters (e.g. user_id, node_type) are applied inside Qdrant, not after the fact
         vector_results = self.vector_db.search_vectors(
             collection_name=self.collection_name,
             query_vector=query_embedding,
-            limit=self.max_results
+            limit=self.max_results,
+            filters=filters,
+            score_threshold=self.similarity_threshold,
+            with_vectors=False
         )
-        relevant_results = [
+        return [
             {"id": r.id, "score": r.score, "payload": r.payload}
-            for r in vector_results if r.score >= self.similarity_threshold
+            for r in vector_results
         ]
-        return relevant_results
+
+    def multi_search(
+        self,
+        query_text: str,
+        node_types: Optional[List[str]] = None,
+        quotas: Optional[Dict[str, int]] = None,
+        filters: Optional[Dict] = None,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Search several per-type collections (Person, Organization, Event, ...) with one
+        embedding and concurrent Qdrant requests, then merge with per-type score
+        normalization. quotas caps hits per type (default: an even share of limit).
+        """
+        limit = limit or self.max_results
+        node_types = node_types or vectorized_node_types()
+        default_quota = max(1, limit // len(node_types)) if node_types else 0
+        quotas = {t: (quotas or {}).get(t, default_quota) for t in node_types}
+        query_embedding = get_embedding_with_cache(query_text, self.embedding_service)
+        results = self.vector_db.search_collections(
+            quotas,
+            query_embedding,
+            filters=filters,
+            score_threshold=self.similarity_threshold
+        )
+        hits_by_type = {
+            node_type: [{"id": r.id, "score": r.score, "payload": r.payload} for r in hits]
+            for node_type, hits in results.items()
+        }
+        return merge_typed_hits(hits_by_type, quotas, limit)
 
     def hybrid_search(
         self,
@@ -378,14 +719,10 @@ class GraphRAGEngine:
             seed_node_ids=seed_node_ids,
             max_hops=max_hops
         )
-        task_context = {}
-        for node in graph_context["nodes"]:
-            tasks = self.graph_traversal.find_related_tasks(
-                entity_id=node["id"],
-                status_filter=["pending", "in_progress"]
-            )
-            if tasks:
-                task_context[node["id"]] = tasks
+        task_context = self.graph_traversal.find_related_tasks_bulk(
+            entity_ids=[node["id"] for node in graph_context["nodes"]],
+            status_filter=["pending", "in_progress"]
+        )
         combined_results = {
             "results": vector_results,
             "context": graph_context,
@@ -398,32 +735,126 @@ class GraphRAGEngine:
         self,
         query_text: str,
         filters: Optional[Dict] = None,
-        max_hops: int = 2
+        max_hops: int = 2,
+        extras: Optional[Dict[str, Any]] = None
     ) -> Dict[str, Any]:
-        print(f"[DEBUG] retrieve_with_context called with query_text={query_text}, filters={filters}, max_hops={max_hops}")
+        """
+        Vector search, graph expansion and task lookups, with independent stages
+        run concurrently under per-stage timeouts (see RetrievalPlanner).
+
+        Args:
+            extras: Optional name -> callable stages run alongside retrieval
+                (e.g. a user profile fetch); their values land in result["extras"]
+
+        Returns:
+            Formatted results plus "stages" (status and timing per stage) and
+            "partial" (True when a stage timed out or failed)
+        """
         op_key = f"retrieve_with_context:{query_text}:{filters}:{max_hops}"
-        print(f"[DEBUG] Operation cache key: {op_key}")
         cached_result = get_operation_cache(op_key)
-        print(f"[DEBUG] Cached result: {cached_result}")
         if cached_result is not None:
-            print(f"[DEBUG] Returning cached result of type {type(cached_result)}")
-            return cached_result
-        hybrid_results = self.hybrid_search(
+            if not extras:
+                return cached_result
+            return self.retrieval_planner.merge_extras(cached_result, self.retrieval_planner.run_extras(extras))
+        formatted_results = self.retrieval_planner.run(
             query_text=query_text,
             filters=filters,
+            max_hops=max_hops,
+            extras=extras
+        )
+        # Partial retrievals are served once but never cached; extras are per call
+        if self._cacheable(formatted_results, extras):
+            set_operation_cache(op_key, self._without_extras(formatted_results, extras), ttl=600)
+        return formatted_results
+
+    @staticmethod
+    def _cacheable(formatted_results: Dict[str, Any], extras: Optional[Dict[str, Any]]) -> bool:
+        return all(
+            stage["status"] == "ok" for name, stage in formatted_results["stages"].items()
+            if name not in (extras or {})
+        )
+
+    @staticmethod
+    def _without_extras(formatted_results: Dict[str, Any], extras: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        stages = {name: stage for name, stage in formatted_results["stages"].items() if name not in (extras or {})}
+        return {**formatted_results, "extras": {}, "stages": stages, "partial": False}
+
+    async def asemantic_search(self, query_text: str, filters: Optional[Dict] = None) -> List[Dict]:
+        """semantic_search without blocking the event loop."""
+        query_embedding = await self.embedding_service.embed(query_text)
+        vector_results = await self.async_vector_db.search_vectors(
+            collection_name=self.collection_name,
+            query_vector=query_embedding,
+            limit=self.max_results,
+            filters=filters,
+            score_threshold=self.similarity_threshold,
+            with_vectors=False
+        )
+        return [
+            {"id": r.id, "score": r.score, "payload": r.payload}
+            for r in vector_results
+        ]
+
+    async def ahybrid_search(
+        self,
+        query_text: str,
+        filters: Optional[Dict] = None,
+        max_hops: int = 2
+    ) -> Dict[str, Any]:
+        """hybrid_search on the async Neo4j/Qdrant wrappers; shares the operation cache."""
+        op_key = f"hybrid_search:{query_text}:{filters}:{max_hops}"
+        cached_result = await asyncio.to_thread(get_operation_cache, op_key)
+        if cached_result is not None:
+            return cached_result
+        vector_results = await self.asemantic_search(query_text, filters)
+        seed_node_ids = [result["id"] for result in vector_results]
+        if not seed_node_ids:
+            result = {"results": [], "context": {"nodes": [], "relationships": []}, "task_context": {}}
+            await asyncio.to_thread(set_operation_cache, op_key, result, 600)
+            return result
+        traversal = self._async_traversal()
+        graph_context = await traversal.atraverse_from_seeds(
+            seed_node_ids=seed_node_ids,
             max_hops=max_hops
         )
-        print(f"[DEBUG] hybrid_results: {hybrid_results}")
-        print(f"[DEBUG] Type of hybrid_results: {type(hybrid_results)}")
-        formatted_results = self._format_results(hybrid_results)
-        print(f"[DEBUG] formatted_results: {formatted_results}")
-        print(f"[DEBUG] Type of formatted_results: {type(formatted_results)}")
-        # Cache the formatted results for this operation
-        set_operation_cache(op_key, formatted_results, ttl=600)
+        task_context = await traversal.afind_related_tasks_bulk(
+            entity_ids=[node["id"] for node in graph_context["nodes"]],
+            status_filter=["pending", "in_progress"]
+        )
+        combined_results = {
+            "results": vector_results,
+            "context": graph_context,
+            "task_context": task_context
+        }
+        await asyncio.to_thread(set_operation_cache, op_key, combined_results, 600)
+        return combined_results
+
+    async def aretrieve_with_context(
+        self,
+        query_text: str,
+        filters: Optional[Dict] = None,
+        max_hops: int = 2,
+        extras: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """retrieve_with_context for async handlers: no blocking I/O or inference on the event loop."""
+        op_key = f"retrieve_with_context:{query_text}:{filters}:{max_hops}"
+        cached_result = await asyncio.to_thread(get_operation_cache, op_key)
+        if cached_result is not None:
+            if not extras:
+                return cached_result
+            return self.retrieval_planner.merge_extras(cached_result, await self.retrieval_planner.arun_extras(extras))
+        formatted_results = await self.retrieval_planner.arun(
+            query_text=query_text,
+            filters=filters,
+            max_hops=max_hops,
+            extras=extras
+        )
+        if self._cacheable(formatted_results, extras):
+            cached = self._without_extras(formatted_results, extras)
+            await asyncio.to_thread(set_operation_cache, op_key, cached, 600)
         return formatted_results
 
     def _format_results(self, hybrid_results: Dict[str, Any]) -> Dict[str, Any]:
-        print(f"[DEBUG] _format_results called with hybrid_results: {hybrid_results}")
         vector_results = hybrid_results["results"]
         graph_context = hybrid_results["context"]
         node_map = {node["id"]: node for node in graph_context.get("nodes", [])}
@@ -446,7 +877,6 @@ class GraphRAGEngine:
                 "document": result,
                 "connections": connected_nodes
             })
-        print(f"[DEBUG] enriched_results: {enriched_results}")
         result_dict = {
             "results": enriched_results,
             "graph_summary": {
@@ -454,6 +884,4 @@ class GraphRAGEngine:
                 "total_relationships": len(graph_context.get("relationships", []))
             }
         } 
-        print(f"[DEBUG] result_dict: {result_dict}")
-        print(f"[DEBUG] Type of result_dict: {type(result_dict)}")
         return result_dict 
\ No newline at end of file
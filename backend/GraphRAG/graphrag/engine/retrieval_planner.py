@@ -0,0 +1,197 @@
+"""
+Retrieval planner for retrieve_with_context.
+
+Stages that do not depend on each other run concurrently:
+
+    extras (e.g. user profile) ─────────────────────────────────────────┐
+    vector search ─┬─ graph traversal ── task lookup for expanded nodes ─┼─> context
+                   └─ task lookup for the seeds ─────────────────────────┘
+
+Every stage has its own timeout, counted from when the stage was started (not
+from when the planner gets round to waiting on it), so budgets do not add up.
+A stage that misses its budget (or fails) contributes an empty value and the
+result is flagged partial, so a slow Neo4j or Qdrant degrades the context
+instead of stalling the chat turn.
+"""
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+DEFAULT_STAGE_TIMEOUTS = {
+    "vector": 3.0,
+    "traversal": 2.0,
+    "seed_tasks": 1.5,
+    "context_tasks": 1.5,
+    "extras": 2.0,
+}
+TASK_STATUSES = ["pending", "in_progress"]
+
+# Timed-out stages keep running here in the background; the turn does not wait for them
+_stage_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="retrieval")
+
+class RetrievalPlanner:
+    def __init__(self, engine, timeouts: Optional[Dict[str, float]] = None):
+        self.engine = engine
+        self.timeouts = {**DEFAULT_STAGE_TIMEOUTS, **(timeouts or {})}
+
+    def run(
+        self,
+        query_text: str,
+        filters: Optional[Dict] = None,
+        max_hops: int = 2,
+        extras: Optional[Dict[str, Callable[[], Any]]] = None
+    ) -> Dict[str, Any]:
+        """Plan on the sync engine methods, with stages on a thread pool."""
+        report = {}
+        traversal = self.engine.graph_traversal
+        pending_extras = self._submit_extras(extras)
+
+        vector_results = self._wait(report, "vector", self._submit(
+            self.engine.semantic_search, query_text, filters), [])
+        seeds = [r["id"] for r in vector_results]
+        graph_context = {"nodes": [], "relationships": []}
+        task_context = {}
+        if seeds:
+            graph_stage = self._submit(traversal.traverse_from_seeds, seed_node_ids=seeds, max_hops=max_hops)
+            seed_stage = self._submit(traversal.find_related_tasks_bulk, seeds, TASK_STATUSES)
+            graph_context = self._wait(report, "traversal", graph_stage, graph_context)
+            task_context.update(self._wait(report, "seed_tasks", seed_stage, {}))
+            expanded = self._expanded_ids(graph_context, seeds)
+            if expanded:
+                task_context.update(self._wait(report, "context_tasks", self._submit(
+                    traversal.find_related_tasks_bulk, expanded, TASK_STATUSES), {}))
+
+        extra_values = self._collect_extras(report, pending_extras)
+        return self._assemble(report, vector_results, graph_context, task_context, extra_values)
+
+    def run_extras(self, extras: Dict[str, Callable[[], Any]]) -> Dict[str, Any]:
+        """Only the extra stages (e.g. when retrieval itself was served from cache)."""
+        report = {}
+        values = self._collect_extras(report, self._submit_extras(extras))
+        return {"extras": values, "stages": report}
+
+    async def arun(
+        self,
+        query_text: str,
+        filters: Optional[Dict] = None,
+        max_hops: int = 2,
+        extras: Optional[Dict[str, Callable[[], Awaitable[Any]]]] = None
+    ) -> Dict[str, Any]:
+        """Plan on the async engine methods, with stages as asyncio tasks."""
+        report = {}
+        traversal = self.engine._async_traversal()
+        pending_extras = self._astart_extras(extras)
+
+        vector_results = await self._await(report, "vector", self._astart(
+            self.engine.asemantic_search(query_text, filters)), [])
+        seeds = [r["id"] for r in vector_results]
+        graph_context = {"nodes": [], "relationships": []}
+        task_context = {}
+        if seeds:
+            graph_stage = self._astart(traversal.atraverse_from_seeds(seed_node_ids=seeds, max_hops=max_hops))
+            seed_stage = self._astart(traversal.afind_related_tasks_bulk(seeds, TASK_STATUSES))
+            graph_context = await self._await(report, "traversal", graph_stage, graph_context)
+            task_context.update(await self._await(report, "seed_tasks", seed_stage, {}))
+            expanded = self._expanded_ids(graph_context, seeds)
+            if expanded:
+                task_context.update(await self._await(report, "context_tasks", self._astart(
+                    traversal.afind_related_tasks_bulk(expanded, TASK_STATUSES)), {}))
+
+        extra_values = await self._acollect_extras(report, pending_extras)
+        return self._assemble(report, vector_results, graph_context, task_context, extra_values)
+
+    async def arun_extras(self, extras: Dict[str, Callable[[], Awaitable[Any]]]) -> Dict[str, Any]:
+        report = {}
+        values = await self._acollect_extras(report, self._astart_extras(extras))
+        return {"extras": values, "stages": report}
+
+    @staticmethod
+    def merge_extras(result: Dict[str, Any], extras_run: Dict[str, Any]) -> Dict[str, Any]:
+        """A cached retrieval result plus a run_extras()/arun_extras() run, shaped like an uncached run."""
+        stages = {**result.get("stages", {}), **extras_run["stages"]}
+        return {
+            **result,
+            "extras": extras_run["extras"],
+            "stages": stages,
+            "partial": any(stage["status"] != "ok" for stage in stages.values()),
+        }
+
+    # A started stage is (future or task, start time); its deadline is start + its timeout
+
+    @staticmethod
+    def _submit(fn, *args, **kwargs):
+        return _stage_executor.submit(fn, *args, **kwargs), time.perf_counter()
+
+    @staticmethod
+    def _astart(awaitable):
+        return asyncio.ensure_future(awaitable), time.perf_counter()
+
+    def _submit_extras(self, extras):
+        return {name: self._submit(fn) for name, fn in (extras or {}).items()}
+
+    def _astart_extras(self, extras):
+        return {name: self._astart(fn()) for name, fn in (extras or {}).items()}
+
+    def _collect_extras(self, report, pending):
+        return {name: self._wait(report, name, stage, None, "extras") for name, stage in pending.items()}
+
+    async def _acollect_extras(self, report, pending):
+        values = {}
+        for name, stage in pending.items():
+            values[name] = await self._await(report, name, stage, None, "extras")
+        return values
+
+    def _remaining(self, name, start, timeout_key=None) -> float:
+        return max(0.0, start + self.timeouts[timeout_key or name] - time.perf_counter())
+
+    def _wait(self, report, name, stage, default, timeout_key=None):
+        future, start = stage
+        try:
+            value = future.result(timeout=self._remaining(name, start, timeout_key))
+            self._record(report, name, "ok", start)
+            return value
+        except FutureTimeoutError:
+            self._record(report, name, "timeout", start)
+        except Exception as e:
+            self._record(report, name, "error", start, e)
+        return default
+
+    async def _await(self, report, name, stage, default, timeout_key=None):
+        task, start = stage
+        try:
+            value = await asyncio.wait_for(task, timeout=self._remaining(name, start, timeout_key))
+            self._record(report, name, "ok", start)
+            return value
+        except asyncio.TimeoutError:
+            self._record(report, name, "timeout", start)
+        except Exception as e:
+            self._record(report, name, "error", start, e)
+        return default
+
+    @staticmethod
+    def _record(report, name, status, start, error=None):
+        entry = {"status": status, "ms": round((time.perf_counter() - start) * 1000, 1)}
+        if error is not None:
+            entry["error"] = str(error)
+        if status != "ok":
+            logging.warning(f"[RETRIEVAL] Stage {name} {status} after {entry['ms']}ms{': ' + str(error) if error else ''}")
+        report[name] = entry
+
+    @staticmethod
+    def _expanded_ids(graph_context: Dict[str, Any], seeds: List[str]) -> List[str]:
+        seed_set = set(seeds)
+        return [node["id"] for node in graph_context.get("nodes", []) if node["id"] not in seed_set]
+
+    def _assemble(self, report, vector_results, graph_context, task_context, extras) -> Dict[str, Any]:
+        formatted = self.engine._format_results({
+            "results": vector_results,
+            "context": graph_context,
+            "task_context": task_context,
+        })
+        formatted["task_context"] = task_context
+        formatted["extras"] = extras
+        formatted["stages"] = report
+        formatted["partial"] = any(stage["status"] != "ok" for stage in report.values())
+        return formatted
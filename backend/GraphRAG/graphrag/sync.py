@@ -29,12 +29,8 @@ def sync_user_to_graph(user_doc):
             elif isinstance(v, list) and all(isinstance(i, (str, int, float, bool)) for i in v):
                 properties[f"resume_{k}"] = v
             # Skip nested dicts or lists of dicts
-    # Upsert logic: try to find, else create
-    existing = graph_db.get_node("User", {"id": node_id})
-    if existing:
-        graph_db.update_node("User", {"id": node_id}, properties)
-    else:
-        graph_db.create_node("User", properties)
+    # Resume fields are dynamic, so only the label is validated
+    graph_db.upsert_node("User", properties, strict=False)
     graph_db.close()
 
 def delete_user_from_graph(user_id):
@@ -55,13 +51,8 @@ def sync_business_to_graph(business_doc):
         "name": business_doc.get("name"),
         "created_at": business_doc.get("created_at").isoformat() if business_doc.get("created_at") else None,
     }
-    existing = graph_db.get_node("Organization", {"id": node_id})
-    if existing:
-        graph_db.update_node("Organization", {"id": node_id}, properties)
-    else:
-        graph_db.create_node("Organization", properties)
-        # Relationship: USER_CONNECTED_TO
-        graph_db.create_relationship("User", "Organization", "USER_CONNECTED_TO", {"id": user_id}, {"id": node_id})
+    # Relationship: USER_CONNECTED_TO
+    graph_db.upsert_node("Organization", properties, owner_label="User", owner_id=user_id, rel_type="USER_CONNECTED_TO")
     graph_db.close()
 
 def delete_business_from_graph(business_id):
@@ -80,13 +71,8 @@ def sync_contact_to_graph(contact_doc):
         "email": contact_doc.get("email"),
         "created_at": contact_doc.get("created_at").isoformat() if contact_doc.get("created_at") else None,
     }
-    existing = graph_db.get_node("Person", {"id": node_id})
-    if existing:
-        graph_db.update_node("Person", {"id": node_id}, properties)
-    else:
-        graph_db.create_node("Person", properties)
-        # Relationship: USER_KNOWS
-        graph_db.create_relationship("User", "Person", "USER_KNOWS", {"id": user_id}, {"id": node_id})
+    # Relationship: USER_KNOWS
+    graph_db.upsert_node("Person", properties, owner_label="User", owner_id=user_id, rel_type="USER_KNOWS")
     graph_db.close()
 
 def delete_contact_from_graph(contact_id):
@@ -103,11 +89,7 @@ def sync_conversation_to_graph(conversation_doc):
         "status": conversation_doc.get("status"),
         "created_at": conversation_doc.get("created_at").isoformat() if conversation_doc.get("created_at") else None,
     }
-    existing = graph_db.get_node("Thread", {"id": node_id})
-    if existing:
-        graph_db.update_node("Thread", {"id": node_id}, properties)
-    else:
-        graph_db.create_node("Thread", properties)
+    graph_db.upsert_node("Thread", properties)
     graph_db.close()
 
 def delete_conversation_from_graph(conversation_id):
@@ -134,14 +116,8 @@ def sync_message_to_graph(message_doc):
         "sender_id": sender_id,
         "channel_id": str(message_doc.get("channel_id", "")),
     }
-    existing = graph_db.get_node("Message", {"id": node_id})
-    if existing:
-        graph_db.update_node("Message", {"id": node_id}, properties)
-    else:
-        graph_db.create_node("Message", properties)
-        # Relationship: AUTHORED (User or Person to Message)
-        if sender_id:
-            graph_db.create_relationship("User", "Message", "AUTHORED", {"id": sender_id}, {"id": node_id})
+    # Relationship: AUTHORED (User or Person to Message)
+    graph_db.upsert_node("Message", properties, owner_label="User", owner_id=sender_id, rel_type="AUTHORED")
     graph_db.close()
 
 def delete_message_from_graph(message_id):
@@ -160,13 +136,8 @@ def sync_event_to_graph(event_doc):
         "start_time": event_doc.get("start_time").isoformat() if event_doc.get("start_time") else None,
         "created_at": event_doc.get("created_at").isoformat() if event_doc.get("created_at") else None,
     }
-    existing = graph_db.get_node("Event", {"id": node_id})
-    if existing:
-        graph_db.update_node("Event", {"id": node_id}, properties)
-    else:
-        graph_db.create_node("Event", properties)
-        # Relationship: USER_PARTICIPATES_IN
-        graph_db.create_relationship("User", "Event", "USER_PARTICIPATES_IN", {"id": user_id}, {"id": node_id})
+    # Relationship: USER_PARTICIPATES_IN
+    graph_db.upsert_node("Event", properties, owner_label="User", owner_id=user_id, rel_type="USER_PARTICIPATES_IN")
     graph_db.close()
 
 def delete_event_from_graph(event_id):
@@ -185,13 +156,7 @@ def sync_channel_to_graph(channel_doc):
         "type": channel_doc.get("type"),
         "created_at": channel_doc.get("created_at").isoformat() if channel_doc.get("created_at") else None,
     }
-    existing = graph_db.get_node("Channel", {"id": node_id})
-    if existing:
-        graph_db.update_node("Channel", {"id": node_id}, properties)
-    else:
-        graph_db.create_node("Channel", properties)
-        if user_id:
-            graph_db.create_relationship("User", "Channel", "USER_COMMUNICATES_VIA", {"id": user_id}, {"id": node_id})
+    graph_db.upsert_node("Channel", properties, owner_label="User", owner_id=user_id, rel_type="USER_COMMUNICATES_VIA")
     graph_db.close()
 
 def delete_channel_from_graph(channel_id):
@@ -209,13 +174,7 @@ def sync_task_to_graph(task_doc):
         "title": task_doc.get("title"),
         "created_date": task_doc.get("created_at").isoformat() if task_doc.get("created_at") else None,
     }
-    existing = graph_db.get_node("Task", {"id": node_id})
-    if existing:
-        graph_db.update_node("Task", {"id": node_id}, properties)
-    else:
-        graph_db.create_node("Task", properties)
-        if user_id:
-            graph_db.create_relationship("User", "Task", "USER_MANAGES", {"id": user_id}, {"id": node_id})
+    graph_db.upsert_node("Task", properties, owner_label="User", owner_id=user_id, rel_type="USER_MANAGES")
     graph_db.close()
 
 def delete_task_from_graph(task_id):
@@ -231,11 +190,7 @@ def sync_chat_to_graph(chat_doc):
         "id": node_id,
         "created_at": chat_doc.get("created_at").isoformat() if chat_doc.get("created_at") else None,
     }
-    existing = graph_db.get_node("Thread", {"id": node_id})
-    if existing:
-        graph_db.update_node("Thread", {"id": node_id}, properties)
-    else:
-        graph_db.create_node("Thread", properties)
+    graph_db.upsert_node("Thread", properties)
     graph_db.close()
 
 def delete_chat_from_graph(chat_id):
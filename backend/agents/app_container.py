@@ -0,0 +1,69 @@
+import logging
+import threading
+from backend.agents.intent_classifier import get_intent_classifier_agent, IntentRouter
+from backend.GraphRAG.graphrag.engine.context_builder import GraphRAGContextBuilder
+from backend.GraphRAG.graphrag.engine.rag_engine import GraphRAGEngine
+from composio_openai import ComposioToolSet, Action
+
+class AppContainer:
+    """
+    Application-scoped holder for the expensive, shareable agent resources:
+    the GraphRAG engine (Neo4j driver, Qdrant client, embedding model), the
+    context builder, the Composio toolset and the intent classifier/router.
+
+    Built once at FastAPI startup; per-chat agents only borrow from it.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.graph_rag_engine = None
+        self.context_builder = None
+        self.toolset = None
+        self.email_tools = None
+        self.intent_classifier = None
+        self.intent_router = None
+
+    @property
+    def started(self) -> bool:
+        return self.graph_rag_engine is not None
+
+    def startup(self):
+        """Build the shared resources (idempotent)."""
+        with self._lock:
+            if self.started:
+                return
+            logging.info("[APP_CONTAINER] Building shared agent resources")
+            graph_rag_engine = GraphRAGEngine()
+            self.context_builder = GraphRAGContextBuilder(graph_rag_engine)
+            self.toolset = ComposioToolSet()
+            self.email_tools = self.toolset.get_tools(actions=[
+                Action.GMAIL_FETCH_EMAILS,
+                Action.GMAIL_SEND_EMAIL
+            ])
+            self.intent_classifier = get_intent_classifier_agent()
+            self.intent_router = IntentRouter(self.intent_classifier, graph_rag_engine.embedding_service)
+            # Set last so `started` only flips once everything is ready
+            self.graph_rag_engine = graph_rag_engine
+            logging.info("[APP_CONTAINER] Shared agent resources ready")
+
+    def shutdown(self):
+        """Release the shared resources. Pooled drivers are closed by close_shared_drivers()."""
+        with self._lock:
+            if self.graph_rag_engine is not None:
+                try:
+                    self.graph_rag_engine.graph_db.close()
+                except Exception as e:
+                    logging.warning(f"[APP_CONTAINER] Error closing graph connection: {e}")
+            self.graph_rag_engine = None
+            self.context_builder = None
+            self.toolset = None
+            self.email_tools = None
+            self.intent_classifier = None
+            self.intent_router = None
+
+app_container = AppContainer()
+
+def get_app_container() -> AppContainer:
+    """Return the started container, building it lazily outside the FastAPI lifecycle (scripts, tests)."""
+    if not app_container.started:
+        app_container.startup()
+    return app_container
@@ -1,6 +1,12 @@
 import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
 from dotenv import load_dotenv
 import autogen
+import numpy as np
+from backend.GraphRAG.graphrag.embeddings.embedding_cache import normalize_text
 
 # Load environment variables
 load_dotenv()
@@ -73,4 +79,145 @@ def classify_intent(classifier, message: str, context: dict = None) -> str:
     if intent not in valid_intents:
         return 'basic'
         
-    return intent 
\ No newline at end of file
+    return intent 
+
+# Labeled examples for the local nearest-centroid tier
+INTENT_EXAMPLES = {
+    "basic": [
+        "Hello, how are you?",
+        "Hi",
+        "Good morning",
+        "Thanks, that's helpful",
+        "What's the weather like?",
+        "Tell me a joke",
+        "Who are you?",
+        "Okay, sounds good",
+    ],
+    "search": [
+        "What's my work experience?",
+        "Tell me about my skills",
+        "What did I discuss with Sarah last week?",
+        "Find the document about the marketing plan",
+        "Which tasks are still pending?",
+        "Who do I know at Google?",
+        "What projects have I worked on?",
+        "Summarize my notes on the budget",
+    ],
+    "calendar": [
+        "Schedule a meeting",
+        "Set up a call",
+        "Book a meeting with John tomorrow at 3pm",
+        "What's on my calendar today?",
+        "Am I free on Friday afternoon?",
+        "Move my 2pm meeting to 4pm",
+        "Cancel my appointment on Monday",
+        "Remind me about the dentist next week",
+    ],
+}
+
+class IntentRouter:
+    """
+    Tiered intent classification:
+
+    1. local: nearest centroid of the labeled examples in embedding space,
+       used when the best intent wins clearly (similarity and margin). Short
+       messages sent with history ("okay, do it") are follow-ups whose intent
+       lives in the history, so they skip this tier
+    2. cache: recent classifications keyed by normalized message and the last
+       history turn, since the LLM reads the history ("yes, do it" depends on it)
+    3. llm: the DeepSeek classifier agent (classify_intent), cached for next time
+
+    route() returns the intent and the tier that answered.
+    """
+    def __init__(self, classifier, embedding_service, examples=INTENT_EXAMPLES,
+                 min_similarity: float = 0.5, min_margin: float = 0.05, cache_size: int = 1024,
+                 follow_up_max_words: int = 4):
+        self.classifier = classifier
+        self.embedding_service = embedding_service
+        self.examples = examples
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self.cache_size = cache_size
+        self.follow_up_max_words = follow_up_max_words
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {"local": 0, "cache": 0, "llm": 0}
+        self._labels = None
+        self._centroids = None
+
+    def route(self, message: str, context: dict = None):
+        """Return (intent, tier) where tier is "local", "cache" or "llm"."""
+        if not self._is_follow_up(message, context):
+            intent = self._classify_local(message)
+            if intent is not None:
+                return self._answer(intent, "local")
+
+        key = self._cache_key(message, context)
+        with self.lock:
+            intent = self.cache.get(key)
+            if intent is not None:
+                self.cache.move_to_end(key)
+        if intent is not None:
+            return self._answer(intent, "cache")
+
+        intent = classify_intent(self.classifier, message, context)
+        with self.lock:
+            self.cache[key] = intent
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return self._answer(intent, "llm")
+
+    def _is_follow_up(self, message: str, context: dict = None) -> bool:
+        """A short message in an ongoing conversation, which only the history-aware LLM can classify."""
+        return bool((context or {}).get('history')) and len(normalize_text(message).split()) <= self.follow_up_max_words
+
+    @staticmethod
+    def _cache_key(message: str, context: dict = None) -> str:
+        history = (context or {}).get('history') or []
+        last_turn = history[-2:] if isinstance(history, list) else history
+        digest = hashlib.sha1(repr(last_turn).encode("utf-8")).hexdigest()[:16] if last_turn else ""
+        return f"{digest}:{normalize_text(message).lower()}"
+
+    def _answer(self, intent: str, tier: str):
+        with self.lock:
+            self.counters[tier] += 1
+        return intent, tier
+
+    def _classify_local(self, message: str):
+        """Nearest-centroid intent, or None when the local tier is not confident."""
+        try:
+            self._ensure_centroids()
+            query = self._normalize_rows(self.embedding_service.get_embedding(message)[np.newaxis, :])[0]
+        except Exception as e:
+            logging.warning(f"[INTENT] Local tier unavailable: {e}")
+            return None
+        scores = self._centroids @ query
+        order = np.argsort(scores)[::-1]
+        best = float(scores[order[0]])
+        margin = best - float(scores[order[1]]) if len(order) > 1 else best
+        if best < self.min_similarity or margin < self.min_margin:
+            return None
+        return self._labels[order[0]]
+
+    def _ensure_centroids(self):
+        if self._centroids is not None:
+            return
+        labels = list(self.examples)
+        centroids = []
+        for label in labels:
+            vectors = self._normalize_rows(self.embedding_service.get_embeddings(self.examples[label]))
+            centroids.append(vectors.mean(axis=0))
+        self._centroids = self._normalize_rows(np.stack(centroids))
+        self._labels = labels
+
+    @staticmethod
+    def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+        matrix = np.asarray(matrix, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-12)
+
+    def stats(self) -> dict:
+        with self.lock:
+            counters = dict(self.counters)
+        total = sum(counters.values())
+        return {**counters, "llm_rate": counters["llm"] / total if total else 0.0}
@@ -1,34 +1,31 @@
 import os
+import logging
 from dotenv import load_dotenv
 import autogen
+from openai import OpenAI
 from backend.agents.calendar_agent import get_calendar_agent
-from backend.agents.intent_classifier import get_intent_classifier_agent, classify_intent
-from backend.agents.prompt_builder import build_personalized_prompt
-from backend.GraphRAG.graphrag.engine.context_builder import GraphRAGContextBuilder
-from backend.GraphRAG.graphrag.engine.rag_engine import GraphRAGEngine
-from composio_openai import ComposioToolSet, Action
+from backend.agents.prompt_builder import build_personalized_prompt, assemble_user_context
+from backend.agents.app_container import get_app_container
 from backend.data_services.mongo.assistant_repository import get_assistant_by_id
 from backend.agents.utils import extract_citation_targets, response_has_citation, refine_response
 from backend.data_services.mongo.user_repository import get_user_by_id
 from bson import ObjectId, errors as bson_errors
-from backend.data_services.mongo.assistant_data_service import get_user_context, format_context_for_prompt
+from backend.data_services.mongo.assistant_data_service import UserContext
 import json
 from backend.agents.search_agent import get_search_agent
 
 # Load environment variables
 load_dotenv()
 
-def get_primary_agent(assistant_id=None, user_id=None, context_builder=None):
-    """Returns a configured primary agent that can delegate tasks, using assistant config from MongoDB."""
+def get_primary_agent(assistant_id=None, user_id=None, context_builder=None, container=None):
+    """
+    Returns a configured primary agent that can delegate tasks, using assistant config from MongoDB.
+    Heavy resources (GraphRAG engine, toolset, intent classifier) come from the app container;
+    only the per-chat prompt, calendar agent and history are built here.
+    """
+    container = container or get_app_container()
     # Get MongoDB user ID
-    try:
-        mongo_user_id = str(ObjectId(user_id))
-    except (bson_errors.InvalidId, TypeError):
-        user_doc = get_user_by_id(user_id)
-        if user_doc and user_doc.get("_id"):
-            mongo_user_id = str(user_doc["_id"])
-        else:
-            mongo_user_id = str(user_id)
+    mongo_user_id = _resolve_user_id(user_id)
 
     # Get assistant configuration if provided
     assistant_config = None
@@ -53,22 +50,12 @@ def get_primary_agent(assistant_id=None, user_id=None, context_builder=None):
         }
     ]
 
-    # Initialize the calendar agent
-    calendar_agent = get_calendar_agent()
-    
-    # Initialize GraphRAG engine and context builder if not provided
+    # Reuse the shared context builder unless one was provided
     if context_builder is None:
-        graph_rag_engine = GraphRAGEngine()
-        context_builder = GraphRAGContextBuilder(graph_rag_engine)
+        context_builder = container.context_builder
 
-    # Initialize Composio ToolSet
-    toolset = ComposioToolSet()
-
-    # Fetch email-related tools
-    email_tools = toolset.get_tools(actions=[
-        Action.GMAIL_FETCH_EMAILS,
-        Action.GMAIL_SEND_EMAIL
-    ])
+    # Per-chat calendar agent (fresh time context) on the shared context builder
+    calendar_agent = get_calendar_agent(context_builder=context_builder)
 
     # Create the primary agent
     primary_agent = autogen.UserProxyAgent(
@@ -89,43 +76,55 @@ def get_primary_agent(assistant_id=None, user_id=None, context_builder=None):
     # Add calendar agent, context builder, and email tools to the primary agent's context
     primary_agent.calendar_agent = calendar_agent
     primary_agent.context_builder = context_builder
-    primary_agent.email_tools = email_tools
-    primary_agent.intent_classifier = get_intent_classifier_agent()
+    primary_agent.email_tools = container.email_tools
+    primary_agent.intent_classifier = container.intent_classifier
+    primary_agent.intent_router = container.intent_router
     primary_agent.user_id = mongo_user_id
 
     return primary_agent
 
-def process_request(agent, request, user_id="user1", assistant_id=None):
-    """Process a user request through the primary agent, using intent classification and smart delegation."""
-    # Always use the MongoDB _id for retrieval
+def _resolve_user_id(user_id):
+    """Always use the MongoDB _id for retrieval."""
     try:
         # Try to treat user_id as ObjectId
-        mongo_user_id = str(ObjectId(user_id))
+        return str(ObjectId(user_id))
     except (bson_errors.InvalidId, TypeError):
         # If not a valid ObjectId, look up by Supabase ID
         user_doc = get_user_by_id(user_id)
         if user_doc and user_doc.get("_id"):
-            mongo_user_id = str(user_doc["_id"])
-        else:
-            mongo_user_id = str(user_id)  # fallback
+            return str(user_doc["_id"])
+        return str(user_id)  # fallback
+
+def _prepare_turn(agent, request, user_id):
+    """
+    Classify the request and build what the primary LLM needs to answer it.
+
+    Returns a dict with the intent and either `messages` for the primary agent's
+    LLM or, when a sub-agent already answered (calendar), the finished `reply`.
+    """
+    mongo_user_id = _resolve_user_id(user_id)
     print(f"[DEBUG] Using MongoDB user_id for retrieval: {mongo_user_id}")
 
+    # One lazily loaded user context shared by classification, search and the prompt
+    user_context = UserContext(mongo_user_id)
+
     # Prepare context for intent classification
     context = {
         'history': agent.chat_history if hasattr(agent, 'chat_history') else [],
-        'user_info': get_user_context(mongo_user_id)
+        'user_info': user_context
     }
 
-    # Classify intent
-    intent = classify_intent(agent.intent_classifier, request, context)
-    print(f"[DEBUG] Classified intent: {intent}")
+    # Classify intent (local centroid -> cache -> LLM)
+    intent, tier = agent.intent_router.route(request, context)
+    print(f"[DEBUG] Classified intent: {intent} (tier: {tier})")
 
     # Handle based on intent
     if intent == "calendar":
-        return agent.calendar_agent.generate_reply(
+        reply = agent.calendar_agent.generate_reply(
             messages=[{"role": "user", "content": request}],
             sender=agent
         )
+        return {"intent": intent, "tier": tier, "reply": reply, "messages": None}
 
     elif intent == "search":
         # Get context from GraphRAG
@@ -139,9 +138,14 @@ def process_request(agent, request, user_id="user1", assistant_id=None):
         search_agent = get_search_agent(agent.context_builder)
         search_results = search_agent.search(request, graphrag_context['raw'])
         
-        # Get user context
-        user_context = get_user_context(mongo_user_id)
-        formatted_user_context = format_context_for_prompt(user_context)
+        # Get user context (fetched once for the whole turn), packed by relevance to the request
+        formatted_user_context, context_report = assemble_user_context(
+            user_context.as_dict(),
+            query=request,
+            embedding_service=agent.context_builder.graph_rag_engine.embedding_service
+        )
+        logging.debug(f"[CONTEXT] User context: {context_report['used_tokens']}/{context_report['budget']} tokens, "
+                      f"{[(s['name'], s['status']) for s in context_report['sections']]}")
         
         # Combine all context for final response
         final_context = f"""Based on the search results and user context, please provide a comprehensive response.
@@ -155,16 +159,14 @@ SEARCH RESULTS:
 
 Original request: {request}"""
 
-        return agent.generate_reply(
-            messages=[{
-                "role": "user",
-                "content": request
-            }, {
-                "role": "system",
-                "content": final_context
-            }],
-            sender=agent
-        )
+        messages = [{
+            "role": "user",
+            "content": request
+        }, {
+            "role": "system",
+            "content": final_context
+        }]
+        return {"intent": intent, "tier": tier, "reply": None, "messages": messages}
 
     else:  # basic
         # Use the personalized system prompt with conversation history
@@ -179,27 +181,78 @@ CONVERSATION HISTORY:
 
 Current request: {request}"""
 
-        response = agent.generate_reply(
-            messages=[{
-                "role": "user",
-                "content": request
-            }, {
-                "role": "system",
-                "content": system_context
-            }],
-            sender=agent
-        )
-        
-        # Update chat history
-        if not hasattr(agent, 'chat_history'):
-            agent.chat_history = []
-        agent.chat_history.append({"role": "user", "content": request})
-        agent.chat_history.append({"role": "assistant", "content": response})
-        
-        # Keep only last 10 messages in history
-        agent.chat_history = agent.chat_history[-10:]
-        
-        return response
+        messages = [{
+            "role": "user",
+            "content": request
+        }, {
+            "role": "system",
+            "content": system_context
+        }]
+        return {"intent": "basic", "tier": tier, "reply": None, "messages": messages}
+
+def _finish_turn(agent, turn, request, response):
+    """Record the exchange once the full reply is known."""
+    if turn["intent"] != "basic":
+        return
+    # Update chat history
+    if not hasattr(agent, 'chat_history'):
+        agent.chat_history = []
+    agent.chat_history.append({"role": "user", "content": request})
+    agent.chat_history.append({"role": "assistant", "content": response})
+    
+    # Keep only last 10 messages in history
+    agent.chat_history = agent.chat_history[-10:]
+
+def process_request(agent, request, user_id="user1", assistant_id=None):
+    """Process a user request through the primary agent, using intent classification and smart delegation."""
+    turn = _prepare_turn(agent, request, user_id)
+    if turn["messages"] is None:
+        return turn["reply"]
+    response = agent.generate_reply(messages=turn["messages"], sender=agent)
+    _finish_turn(agent, turn, request, response)
+    return response
+
+def stream_request(agent, request, user_id="user1", assistant_id=None):
+    """
+    Streaming variant of process_request: yields the reply as text chunks while
+    the LLM generates it. Replies produced by a sub-agent (calendar) arrive as a
+    single chunk.
+    """
+    turn = _prepare_turn(agent, request, user_id)
+    if turn["messages"] is None:
+        reply = turn["reply"]
+        if isinstance(reply, dict):
+            reply = reply.get("content") or ""
+        yield reply or ""
+        return
+    parts = []
+    for chunk in stream_completion(agent, turn["messages"]):
+        parts.append(chunk)
+        yield chunk
+    _finish_turn(agent, turn, request, "".join(parts))
+
+# One HTTP client per endpoint/key so streamed turns reuse connections
+_llm_clients = {}
+
+def stream_completion(agent, messages):
+    """
+    Stream a chat completion for messages with the agent's own system message and
+    LLM config (DeepSeek exposes the OpenAI-compatible API), yielding content deltas.
+    """
+    config = agent.llm_config["config_list"][0]
+    client_key = (config.get("base_url"), config.get("api_key"))
+    client = _llm_clients.get(client_key)
+    if client is None:
+        client = _llm_clients[client_key] = OpenAI(api_key=config.get("api_key"), base_url=config.get("base_url"))
+    stream = client.chat.completions.create(
+        model=config["model"],
+        messages=[{"role": "system", "content": agent.system_message}, *messages],
+        temperature=agent.llm_config.get("temperature"),
+        stream=True
+    )
+    for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
 
 def handle_email_tasks(agent, task, user_id="user1"):
     """Handle email-related tasks like fetching, reading, and drafting responses."""
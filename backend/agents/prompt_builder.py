@@ -1,32 +1,116 @@
-from typing import Dict, Any
+import logging
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
 from backend.data_services.mongo.user_repository import get_user_by_id
 from backend.data_services.mongo.assistant_repository import get_assistant_by_id
+from backend.data_services.mongo.assistant_data_service import format_context_for_prompt
+from backend.data_services.mongo.user_data_cache import data_version
+from backend.data_services.redis_cache import RedisCache
 
-def build_personalized_prompt(user_id: str, assistant_id: str = None) -> str:
+# Token budgets; counts are estimated at ~4 characters per token (no tokenizer dependency)
+SYSTEM_PROMPT_TOKEN_BUDGET = 1500
+USER_CONTEXT_TOKEN_BUDGET = 2000
+CHARS_PER_TOKEN = 4
+# A section is truncated into the remaining budget only if at least this much is left
+MIN_TRUNCATED_TOKENS = 40
+TRUNCATION_MARKER = "\n[...truncated]"
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+def make_section(name: str, text: str, priority: float = 0.5, required: bool = False) -> Dict[str, Any]:
     """
-    Build a personalized system prompt incorporating user information and assistant configuration.
-    
-    Args:
-        user_id: The user's ID
-        assistant_id: Optional assistant ID for specific assistant configuration
-    
+    A prompt section. Required sections are always included; the others compete
+    for the remaining budget by relevance to the request, weighted by priority.
+    """
+    return {"name": name, "text": text, "priority": priority, "required": required}
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """Cut text to max_tokens at a line boundary where possible."""
+    max_chars = max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER)
+    if max_chars <= 0:
+        return ""
+    cut = text[:max_chars]
+    if "\n" in cut:
+        cut = cut[:cut.rfind("\n")]
+    return cut + TRUNCATION_MARKER
+
+def _relevance(sections: List[Dict[str, Any]], query: Optional[str], embedding_service) -> List[Optional[float]]:
+    """Cosine similarity of each section to the query, or None without a query/embeddings."""
+    if not query or embedding_service is None or not sections:
+        return [None] * len(sections)
+    try:
+        vectors = embedding_service.get_embeddings([query] + [section["text"] for section in sections])
+    except Exception as e:
+        logging.warning(f"[PROMPT] Ranking by priority only, embeddings unavailable: {e}")
+        return [None] * len(sections)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+    return [float(score) for score in vectors[1:] @ vectors[0]]
+
+def assemble_prompt(
+    sections: List[Dict[str, Any]],
+    query: Optional[str] = None,
+    embedding_service=None,
+    budget: int = SYSTEM_PROMPT_TOKEN_BUDGET,
+    separator: str = "\n\n"
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Pack sections into a token budget.
+
+    Required sections go in first. Optional sections are ranked by relevance to
+    query (embedding similarity times priority; priority alone without a query)
+    and packed greedily: whole if they fit, truncated if a useful amount of
+    budget is left, otherwise dropped. Included sections keep their original order.
+
     Returns:
-        str: Personalized system prompt
+        (prompt, report) where report has the budget, tokens used and, per
+        section, its status ("included", "truncated" or "dropped"), tokens and score.
     """
-    # Get user information
-    user = get_user_by_id(user_id)
-    if not user:
-        raise ValueError(f"User {user_id} not found")
-    
-    # Get assistant configuration if provided
-    assistant_config = None
-    if assistant_id:
-        assistant_config = get_assistant_by_id(assistant_id)
-        if not assistant_config:
-            raise ValueError(f"Assistant {assistant_id} not found")
-    
+    separator_tokens = estimate_tokens(separator)
+    texts: Dict[int, str] = {}
+    entries: Dict[int, Dict[str, Any]] = {}
+    used = 0
+
+    optional = [i for i, section in enumerate(sections) if not section["required"] and section["text"]]
+    similarities = _relevance([sections[i] for i in optional], query, embedding_service)
+    scores = {
+        i: section_priority if similarity is None else max(similarity, 0.0) * section_priority
+        for i, similarity, section_priority in zip(optional, similarities, (sections[i]["priority"] for i in optional))
+    }
+
+    order = [i for i, section in enumerate(sections) if section["required"]]
+    order += sorted(optional, key=lambda i: scores[i], reverse=True)
+    for i in order:
+        section = sections[i]
+        tokens = estimate_tokens(section["text"]) + separator_tokens
+        entry = {"name": section["name"], "tokens": 0, "score": scores.get(i), "status": "dropped"}
+        if section["required"] or used + tokens <= budget:
+            texts[i] = section["text"]
+            entry.update(tokens=tokens, status="included")
+        elif budget - used - separator_tokens >= MIN_TRUNCATED_TOKENS:
+            texts[i] = _truncate(section["text"], budget - used - separator_tokens)
+            entry.update(tokens=estimate_tokens(texts[i]) + separator_tokens, status="truncated")
+        used += entry["tokens"]
+        entries[i] = entry
+
+    prompt = separator.join(texts[i] for i in sorted(texts))
+    report = {
+        "budget": budget,
+        "used_tokens": used,
+        "sections": [entries[i] for i in sorted(entries)],
+    }
+    return prompt, report
+
+def personalized_prompt_sections(user: Dict[str, Any], assistant_config: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """Sections of the personalized system prompt for a user (and assistant)."""
+    assistant_config = assistant_config or {}
+
     # Extract user information from resume
-    resume = user.get('resume', {})
+    resume = user.get('resume', {}) or {}
     user_info = {
         "name": f"{resume.get('first_name', '')} {resume.get('last_name', '')}".strip(),
         "summary": resume.get('summary', ''),
@@ -37,31 +121,25 @@ def build_personalized_prompt(user_id: str, assistant_id: str = None) -> str:
         "links": resume.get('links', []),
         "phone": resume.get('phone', '')
     }
-    
-    # Build the personalized prompt
-    prompt = f"""You are  {assistant_config.get('name', 'AI Assistant')}, a personal assistant for {user_info['name']}. You have deep knowledge about them and their background.
+
+    sections = [
+        make_section("identity", f"""You are  {assistant_config.get('name', 'AI Assistant')}, a personal assistant for {user_info['name']}. You have deep knowledge about them and their background.
 
 PERSONAL INFORMATION:
 - Name: {user_info['name']}
 - Contact: {user_info['phone']}
-- Professional Links: {', '.join(user_info['links'])}
-
-PROFESSIONAL SUMMARY:
-{user_info['summary']}
-
-WORK EXPERIENCE:
-{format_work_experience(user_info['work_experience'])}
-
-EDUCATION:
-{format_education(user_info['education'])}
-
-SKILLS:
-{format_skills(user_info['skills'])}
-
-LANGUAGES:
-{', '.join(user_info['languages'])}
-
-YOUR ROLE:
+- Professional Links: {', '.join(user_info['links'])}""", required=True),
+        make_section("summary", f"""PROFESSIONAL SUMMARY:
+{user_info['summary']}""", priority=0.9),
+        make_section("work_experience", f"""WORK EXPERIENCE:
+{format_work_experience(user_info['work_experience'])}""", priority=0.8),
+        make_section("education", f"""EDUCATION:
+{format_education(user_info['education'])}""", priority=0.5),
+        make_section("skills", f"""SKILLS:
+{format_skills(user_info['skills'])}""", priority=0.7),
+        make_section("languages", f"""LANGUAGES:
+{', '.join(user_info['languages'])}""", priority=0.3),
+        make_section("role", """YOUR ROLE:
 1. You are their personal assistant, 
 2. 
 3. Maintain a professional yet friendly tone
@@ -71,19 +149,172 @@ YOUR ROLE:
 IMPORTANT:
 - Always maintain professional confidentiality
 - Never share sensitive personal information
-- Confirm before taking actions on their behalf"""
+- Confirm before taking actions on their behalf""", required=True),
+    ]
 
     # Add assistant-specific configuration if provided
     if assistant_config:
-        prompt += f"""
-
-ASSISTANT CONFIGURATION:
+        sections.append(make_section("assistant_configuration", f"""ASSISTANT CONFIGURATION:
 - Name: {assistant_config.get('name', 'AI Assistant')}
 - Type: {assistant_config.get('type', 'General')}
 - Responsibilities: {', '.join(assistant_config.get('responsibilities', ['General assistance']))}
-- Additional Instructions: {assistant_config.get('instructions', '')}"""
+- Additional Instructions: {assistant_config.get('instructions', '')}""", required=True))
+    return sections
+
+def assemble_personalized_prompt(
+    user_id: str,
+    assistant_id: str = None,
+    query: Optional[str] = None,
+    embedding_service=None,
+    budget: int = SYSTEM_PROMPT_TOKEN_BUDGET
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Personalized system prompt within a token budget, plus the packing report.
+    Resume sections are ranked against query when one is given.
+    """
+    # Get user information
+    user = get_user_by_id(user_id)
+    if not user:
+        raise ValueError(f"User {user_id} not found")
+    
+    # Get assistant configuration if provided
+    assistant_config = None
+    if assistant_id:
+        assistant_config = get_assistant_by_id(assistant_id)
+        if not assistant_config:
+            raise ValueError(f"Assistant {assistant_id} not found")
+
+    return assemble_prompt(
+        personalized_prompt_sections(user, assistant_config),
+        query=query,
+        embedding_service=embedding_service,
+        budget=budget
+    )
+
+# Bump when the prompt template or budget changes so cached prompts are rebuilt
+PROMPT_FORMAT_VERSION = 1
+COMPILED_PROMPT_TTL = 24 * 3600
+
+class CompiledPromptCache:
+    """
+    Compiled system prompts per (user, assistant), keyed by a content version.
+
+    The version combines the "users" generation of the user and the "assistants"
+    generation of the assistant (see user_data_cache), which update_user and
+    update_assistant bump. A prompt is served from the in-process LRU or Redis and
+    rebuilt only when its version changes; stale versions simply age out.
+    """
+    def __init__(self, max_size: int = 1024, ttl: int = COMPILED_PROMPT_TTL, shared=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared = shared
+        self.local = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {"local_hits": 0, "shared_hits": 0, "builds": 0}
+
+    def key(self, user_id: str, assistant_id: Optional[str]) -> str:
+        version = f"{data_version('users', user_id)}-{data_version('assistants', assistant_id)}"
+        return f"prompt:v{PROMPT_FORMAT_VERSION}:{user_id}:{assistant_id}:{version}"
 
-    return prompt
+    def get_or_build(self, user_id: str, assistant_id: Optional[str], build) -> str:
+        try:
+            key = self.key(user_id, assistant_id)
+        except Exception as e:
+            logging.warning(f"[PROMPT_CACHE] Versions unavailable, building uncached: {e}")
+            return build()
+
+        with self.lock:
+            prompt = self.local.get(key)
+            if prompt is not None:
+                self.local.move_to_end(key)
+                self.counters["local_hits"] += 1
+                return prompt
+
+        prompt = None
+        if self.shared is not None:
+            try:
+                prompt = self.shared.get(key)
+            except Exception as e:
+                logging.warning(f"[PROMPT_CACHE] Shared tier unavailable: {e}")
+        if prompt is not None:
+            with self.lock:
+                self.counters["shared_hits"] += 1
+        else:
+            prompt = build()
+            with self.lock:
+                self.counters["builds"] += 1
+            if self.shared is not None:
+                try:
+                    self.shared.set(key, prompt, ttl=self.ttl)
+                except Exception as e:
+                    logging.warning(f"[PROMPT_CACHE] Failed to write shared tier: {e}")
+
+        with self.lock:
+            self.local[key] = prompt
+            if len(self.local) > self.max_size:
+                self.local.popitem(last=False)
+        return prompt
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {**self.counters, "local_size": len(self.local)}
+
+def _build_prompt_cache() -> CompiledPromptCache:
+    try:
+        shared = RedisCache()
+    except Exception as e:
+        logging.warning(f"[PROMPT_CACHE] Redis disabled for compiled prompts: {e}")
+        shared = None
+    return CompiledPromptCache(shared=shared)
+
+compiled_prompt_cache = _build_prompt_cache()
+
+def build_personalized_prompt(user_id: str, assistant_id: str = None) -> str:
+    """
+    Build a personalized system prompt incorporating user information and assistant configuration.
+    
+    Args:
+        user_id: The user's ID
+        assistant_id: Optional assistant ID for specific assistant configuration
+    
+    Returns:
+        str: Personalized system prompt, within SYSTEM_PROMPT_TOKEN_BUDGET. Served
+        from compiled_prompt_cache unless the user or assistant changed.
+    """
+    user_id = str(user_id)
+    assistant_id = str(assistant_id) if assistant_id else None
+    return compiled_prompt_cache.get_or_build(
+        user_id, assistant_id, lambda: assemble_personalized_prompt(user_id, assistant_id)[0]
+    )
+
+# Relative weight of each user-context collection when ranking against a request
+USER_CONTEXT_PRIORITIES = {
+    'resume': 0.9,
+    'tasks': 0.8,
+    'events': 0.8,
+    'contacts': 0.7,
+    'conversations': 0.6,
+    'messages': 0.6,
+    'businesses': 0.5,
+    'chats': 0.3,
+}
+
+def assemble_user_context(
+    context: Dict[str, Any],
+    query: Optional[str] = None,
+    embedding_service=None,
+    budget: int = USER_CONTEXT_TOKEN_BUDGET
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    format_context_for_prompt within a token budget: one section per collection,
+    ranked by relevance to the request. Returns (text, report) like assemble_prompt.
+    """
+    sections = [
+        make_section(name, format_context_for_prompt({name: data}).strip(), priority=USER_CONTEXT_PRIORITIES.get(name, 0.5))
+        for name, data in context.items()
+        if data
+    ]
+    return assemble_prompt(sections, query=query, embedding_service=embedding_service, budget=budget)
 
 def format_work_experience(work_experience: list) -> str:
     """Format work experience entries into a readable string."""
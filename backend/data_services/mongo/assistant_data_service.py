@@ -1,22 +1,93 @@
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional
 from datetime import datetime
 from bson import ObjectId
 from bson.errors import InvalidId as bson_errors
 from backend.data_services.mongo.mongo_client import get_database
 from backend.data_services.redis_cache import RedisCache
+from backend.data_services.mongo.user_data_cache import data_version
+
+# Entries are invalidated by repository writes; the TTL only bounds orphaned keys
+USER_DATA_TTL = 3600
+# Upper bound on the serialized size of a full user context (roughly prompt characters)
+USER_CONTEXT_MAX_CHARS = 24000
+
+# Per collection: source collection, fields the prompt uses, sort and limit. Most
+# collections take their most recent documents; events take the next upcoming ones
+# ("upcoming" filters on start_time >= now and sorts ascending). Every sort is
+# served by a (user_id, <sort field>) index created in init_db.
+COLLECTION_SPECS = {
+    'businesses': {
+        "collection": "businesses",
+        "projection": ["name", "description", "industry"],
+        "sort": "updated_at", "limit": 10,
+    },
+    'chats': {
+        "collection": "chats",
+        "projection": {"assistant_id": 1, "updated_at": 1, "messages": {"$slice": -3}},
+        "sort": "updated_at", "limit": 5,
+    },
+    'contacts': {
+        "collection": "contacts",
+        "projection": ["name", "email", "phone", "notes"],
+        "sort": "updated_at", "limit": 50,
+    },
+    'conversations': {
+        "collection": "conversations",
+        "projection": ["title", "status", "last_message", "last_message_at"],
+        "sort": "last_message_at", "limit": 20,
+    },
+    'events': {
+        "collection": "events",
+        "projection": ["title", "start_time", "end_time", "description"],
+        "sort": "start_time", "upcoming": True, "limit": 20,
+    },
+    'messages': {
+        "collection": "messages",
+        "projection": ["content", "sender", "timestamp"],
+        "sort": "timestamp", "limit": 50,
+    },
+    'tasks': {
+        "collection": "tasks",
+        "projection": ["title", "status", "due_date", "description"],
+        "sort": "updated_at", "limit": 30,
+    },
+}
+
+def _projection(fields) -> Dict[str, Any]:
+    projection = dict(fields) if isinstance(fields, dict) else {field: 1 for field in fields}
+    projection["_id"] = 0
+    return projection
+
+def apply_size_budget(context: Dict[str, Any], max_chars: int = USER_CONTEXT_MAX_CHARS) -> Dict[str, Any]:
+    """
+    Trim collection lists so the serialized context fits max_chars. Items are
+    admitted round-robin across collections, most recent first, so one large
+    collection cannot crowd out the others. The resume is always kept.
+    """
+    size = len(json.dumps(context.get('resume') or {}, default=str))
+    lists = {name: value for name, value in context.items() if name != 'resume' and isinstance(value, list)}
+    budgeted = {name: [] for name in lists}
+    position = 0
+    while any(position < len(items) for items in lists.values()):
+        for name, items in lists.items():
+            if position >= len(items):
+                continue
+            item_size = len(json.dumps(items[position], default=str))
+            if size + item_size <= max_chars:
+                budgeted[name].append(items[position])
+                size += item_size
+        position += 1
+    return {**context, **budgeted}
 
 class AssistantDataService:
     def __init__(self):
         self.db = get_database()
         self.redis_cache = RedisCache()
         self.allowed_collections = {
-            'businesses': 'business',
-            'chats': 'chat',
-            'contacts': 'contact',
-            'conversations': 'conversation',
-            'events': 'event',
-            'messages': 'message',
-            'tasks': 'task'
+            name: spec["collection"] for name, spec in COLLECTION_SPECS.items()
         }
 
     def get_user_data(self, user_id: str, collection: str, query: Optional[Dict] = None) -> List[Dict]:
@@ -26,37 +97,48 @@ class AssistantDataService:
         if collection not in self.allowed_collections:
             raise ValueError(f"Collection {collection} is not allowed for assistant access")
 
-        # Create cache key
-        cache_key = f"assistant_data:{user_id}:{collection}:{str(query)}"
+        # Create cache key; the version changes whenever a repository writes to this user's data
+        cache_key = f"assistant_data:{user_id}:{collection}:{str(query)}:{data_version(collection, user_id)}"
         
         # Try to get from cache first
         cached_data = self.redis_cache.get(cache_key)
-        if cached_data:
+        if cached_data is not None:
             return cached_data
 
-        # Build the query with user_id filter
-        mongo_query = {"user_id": user_id}
+        # Build the query with user_id filter (stored as ObjectId, or string on older documents)
+        user_ids = [user_id]
+        if ObjectId.is_valid(user_id):
+            user_ids.append(ObjectId(user_id))
+        mongo_query = {"user_id": {"$in": user_ids}}
         if query:
             mongo_query.update(query)
 
-        # Get data from MongoDB
-        collection_name = self.allowed_collections[collection]
-        data = list(self.db[collection_name].find(mongo_query))
+        # Most recent (or next upcoming) documents only, with just the fields the prompt uses
+        spec = COLLECTION_SPECS[collection]
+        direction = -1
+        if spec.get("upcoming"):
+            mongo_query.setdefault(spec["sort"], {"$gte": datetime.utcnow()})
+            direction = 1
+        cursor = (
+            self.db[spec["collection"]]
+            .find(mongo_query, _projection(spec["projection"]))
+            .sort(spec["sort"], direction)
+            .limit(spec["limit"])
+        )
+        data = list(cursor)
 
         # Cache the results
-        self.redis_cache.set(cache_key, data, ttl=300)  # Cache for 5 minutes
+        self.redis_cache.set(cache_key, data, ttl=USER_DATA_TTL)
 
         return data
 
-    def get_user_context(self, user_id: str) -> Dict[str, Any]:
+    def resolve_user_id(self, user_id: str) -> Optional[ObjectId]:
         """
-        Get comprehensive user context from all allowed collections.
+        Mongo _id for a user given an ObjectId string, email or Supabase id.
         """
-        context = {}
-        
         # Convert user_id to ObjectId if it's not already
         try:
-            mongo_user_id = ObjectId(user_id)
+            return ObjectId(user_id)
         except (bson_errors, TypeError):
             # If not a valid ObjectId, try to find user by other fields
             user_doc = self.db['user'].find_one({"$or": [
@@ -65,35 +147,36 @@ class AssistantDataService:
                 {"supabase_id": user_id}
             ]})
             if user_doc and "_id" in user_doc:
-                mongo_user_id = user_doc["_id"]
-            else:
-                print(f"[DEBUG] Could not find user with ID: {user_id}")
-                return context
+                return user_doc["_id"]
+            print(f"[DEBUG] Could not find user with ID: {user_id}")
+            return None
 
-        # Get user document
+    def get_user_resume(self, mongo_user_id: ObjectId) -> Optional[Dict[str, Any]]:
+        """
+        Resume fields of the user document, or None if there are none.
+        """
         user_doc = self.db['user'].find_one({"_id": mongo_user_id})
-        if user_doc:
-            # Extract all resume-related fields
-            resume_fields = [k for k in user_doc.keys() if k.startswith('resume_')]
-            if resume_fields:
-                context['resume'] = {
-                    field: user_doc[field] 
-                    for field in resume_fields 
-                    if user_doc[field] is not None
-                }
-                # Add raw text if available
-                if 'resume_rawText' in user_doc:
-                    context['resume']['raw_text'] = user_doc['resume_rawText']
-        
-        # Then get other collections
-        for collection in self.allowed_collections:
-            try:
-                data = self.get_user_data(str(mongo_user_id), collection)
-                context[collection] = data
-            except Exception as e:
-                print(f"Error fetching {collection} data: {str(e)}")
-                context[collection] = []
-        return context
+        if not user_doc:
+            return None
+        # Extract all resume-related fields
+        resume_fields = [k for k in user_doc.keys() if k.startswith('resume_')]
+        if not resume_fields:
+            return None
+        resume = {
+            field: user_doc[field] 
+            for field in resume_fields 
+            if user_doc[field] is not None
+        }
+        # Add raw text if available
+        if 'resume_rawText' in user_doc:
+            resume['raw_text'] = user_doc['resume_rawText']
+        return resume
+
+    def get_user_context(self, user_id: str) -> Dict[str, Any]:
+        """
+        Get comprehensive user context from all allowed collections.
+        """
+        return UserContext(user_id, service=self).as_dict()
 
     def format_context_for_prompt(self, context: Dict[str, Any]) -> str:
         """
@@ -186,6 +269,90 @@ class AssistantDataService:
         
         return "\n".join(formatted_context)
 
+class UserContext:
+    """
+    Request-scoped view of a user's assistant context.
+
+    Nothing is fetched up front: the resume and each collection are loaded on first
+    access and then shared by everything in the request (intent classification,
+    search, prompt formatting). Cross-request freshness comes from get_user_data's
+    write-invalidated cache.
+    """
+    def __init__(self, user_id: str, service: Optional[AssistantDataService] = None):
+        self.user_id = user_id
+        self.service = service or assistant_data_service
+        self._lock = threading.Lock()
+        self._mongo_user_id = None
+        self._resolved = False
+        self._data: Dict[str, Any] = {}
+
+    @property
+    def mongo_user_id(self) -> Optional[ObjectId]:
+        with self._lock:
+            if not self._resolved:
+                self._mongo_user_id = self.service.resolve_user_id(self.user_id)
+                self._resolved = True
+            return self._mongo_user_id
+
+    def resume(self) -> Optional[Dict[str, Any]]:
+        return self._load('resume', lambda uid: self.service.get_user_resume(uid))
+
+    def collection(self, name: str) -> List[Dict]:
+        """Documents of one allowed collection (empty on error)."""
+        def fetch(uid):
+            try:
+                return self.service.get_user_data(str(uid), name)
+            except Exception as e:
+                print(f"Error fetching {name} data: {str(e)}")
+                return []
+        return self._load(name, fetch) or []
+
+    def _load(self, key: str, fetch):
+        with self._lock:
+            if key in self._data:
+                return self._data[key]
+        mongo_user_id = self.mongo_user_id
+        value = fetch(mongo_user_id) if mongo_user_id is not None else None
+        with self._lock:
+            return self._data.setdefault(key, value)
+
+    def invalidate(self, collection: Optional[str] = None):
+        """Forget what this request loaded (one collection, or everything)."""
+        with self._lock:
+            if collection is None:
+                self._data.clear()
+            else:
+                self._data.pop(collection, None)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """
+        The full get_user_context() shape within USER_CONTEXT_MAX_CHARS. Whatever
+        is still missing is loaded concurrently, on threads owned by this call so
+        concurrent requests never queue behind each other.
+        """
+        if self.mongo_user_id is None:
+            return {}
+        collections = list(self.service.allowed_collections)
+        with self._lock:
+            missing = [key for key in ['resume'] + collections if key not in self._data]
+        if missing:
+            with ThreadPoolExecutor(max_workers=len(missing), thread_name_prefix="user-context") as pool:
+                for key in missing:
+                    if key == 'resume':
+                        pool.submit(self.resume)
+                    else:
+                        pool.submit(self.collection, key)
+        context = {}
+        resume = self.resume()
+        if resume:
+            context['resume'] = resume
+        for name in collections:
+            context[name] = self.collection(name)
+        return apply_size_budget(context)
+
+    def format_for_prompt(self) -> str:
+        return self.service.format_context_for_prompt(self.as_dict())
+
 # Create a singleton instance
 assistant_data_service = AssistantDataService()
 
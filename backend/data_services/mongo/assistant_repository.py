@@ -2,6 +2,7 @@ from .mongo_client import get_collection
 from .utils import to_objectid, to_datetime, privacy_filter
 from bson import ObjectId
 from datetime import datetime
+from .user_data_cache import invalidate_user_data
 
 def create_assistant(assistant_data: dict):
     assistants = get_collection("assistants")
@@ -32,13 +33,17 @@ def update_assistant(assistant_id, update_data: dict):
             update_data[k] = to_datetime(update_data[k])
     update_data["updated_at"] = datetime.utcnow()
     assistants.update_one({"_id": assistant_id}, {"$set": update_data})
+    # Versioned per assistant id: compiled system prompts using it are rebuilt on next use
+    invalidate_user_data("assistants", assistant_id)
     return assistants.find_one({"_id": assistant_id})
 
 def delete_assistant(assistant_id):
     assistants = get_collection("assistants")
     if isinstance(assistant_id, str):
         assistant_id = ObjectId(assistant_id)
-    return assistants.delete_one({"_id": assistant_id})
+    result = assistants.delete_one({"_id": assistant_id})
+    invalidate_user_data("assistants", assistant_id)
+    return result
 
 def list_assistants(filter_dict=None, user_id=None, limit=100):
     assistants = get_collection("assistants")
@@ -2,7 +2,8 @@ from .mongo_client import get_collection
 from .utils import to_objectid, to_datetime, privacy_filter
 from bson import ObjectId
 from datetime import datetime
-from backend.GraphRAG.graphrag.sync import sync_business_to_graph, delete_business_from_graph
+from backend.data_services.sync.graph_sync_outbox import enqueue_graph_sync
+from .user_data_cache import invalidate_user_data
 
 def create_business(business_data: dict):
     businesses = get_collection("businesses")
@@ -15,7 +16,8 @@ def create_business(business_data: dict):
     business_data["updated_at"] = datetime.utcnow()
     result = businesses.insert_one(business_data)
     business_doc = businesses.find_one({"_id": result.inserted_id})
-    sync_business_to_graph(business_doc)
+    enqueue_graph_sync("business", business_doc["_id"])
+    invalidate_user_data("businesses", business_doc.get("user_id"))
     return business_doc
 
 def get_business_by_id(business_id):
@@ -36,15 +38,19 @@ def update_business(business_id, update_data: dict):
     update_data["updated_at"] = datetime.utcnow()
     businesses.update_one({"_id": business_id}, {"$set": update_data})
     business_doc = businesses.find_one({"_id": business_id})
-    sync_business_to_graph(business_doc)
+    enqueue_graph_sync("business", business_doc["_id"])
+    invalidate_user_data("businesses", business_doc.get("user_id"))
     return business_doc
 
 def delete_business(business_id):
     businesses = get_collection("businesses")
     if isinstance(business_id, str):
         business_id = ObjectId(business_id)
+    business_doc = businesses.find_one({"_id": business_id}, {"user_id": 1})
     result = businesses.delete_one({"_id": business_id})
-    delete_business_from_graph(business_id)
+    enqueue_graph_sync("business", business_id, op="delete")
+    if business_doc:
+        invalidate_user_data("businesses", business_doc.get("user_id"))
     return result
 
 def list_businesses(filter_dict=None, user_id=None, limit=100):
@@ -2,7 +2,7 @@ from .mongo_client import get_collection
 from bson import ObjectId
 from datetime import datetime
 from .utils import privacy_filter
-from backend.GraphRAG.graphrag.sync import sync_channel_to_graph, delete_channel_from_graph
+from backend.data_services.sync.graph_sync_outbox import enqueue_graph_sync
 
 def create_channel(channel_data: dict):
     channels = get_collection("channels")
@@ -10,7 +10,7 @@ def create_channel(channel_data: dict):
     channel_data["updated_at"] = datetime.utcnow()
     result = channels.insert_one(channel_data)
     channel_doc = channels.find_one({"_id": result.inserted_id})
-    sync_channel_to_graph(channel_doc)
+    enqueue_graph_sync("channel", channel_doc["_id"])
     return channel_doc
 
 def get_channel_by_id(channel_id):
@@ -26,7 +26,7 @@ def update_channel(channel_id, update_data: dict):
     update_data["updated_at"] = datetime.utcnow()
     channels.update_one({"_id": channel_id}, {"$set": update_data})
     channel_doc = channels.find_one({"_id": channel_id})
-    sync_channel_to_graph(channel_doc)
+    enqueue_graph_sync("channel", channel_doc["_id"])
     return channel_doc
 
 def delete_channel(channel_id):
@@ -34,7 +34,7 @@ def delete_channel(channel_id):
     if isinstance(channel_id, str):
         channel_id = ObjectId(channel_id)
     result = channels.delete_one({"_id": channel_id})
-    delete_channel_from_graph(channel_id)
+    enqueue_graph_sync("channel", channel_id, op="delete")
     return result
 
 def list_channels(filter_dict=None, user_id=None, limit=100):
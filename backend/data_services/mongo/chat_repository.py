@@ -2,7 +2,8 @@ from .mongo_client import get_collection
 from .utils import to_objectid, to_datetime, privacy_filter
 from bson import ObjectId
 from datetime import datetime
-from backend.GraphRAG.graphrag.sync import sync_chat_to_graph
+from backend.data_services.sync.graph_sync_outbox import enqueue_graph_sync
+from .user_data_cache import invalidate_user_data
 
 def create_chat(chat_data: dict):
     chats = get_collection("chats")
@@ -10,7 +11,8 @@ def create_chat(chat_data: dict):
     chat_data["updated_at"] = datetime.utcnow()
     result = chats.insert_one(chat_data)
     chat_doc = chats.find_one({"_id": result.inserted_id})
-    sync_chat_to_graph(chat_doc)
+    enqueue_graph_sync("chat", chat_doc["_id"])
+    invalidate_user_data("chats", chat_doc.get("user_id"))
     return chat_doc
 
 def add_message(chat_id: str, message: dict) -> dict:
@@ -44,6 +46,7 @@ def add_message(chat_id: str, message: dict) -> dict:
             "$set": {"updated_at": chat["updated_at"]}
         }
     )
+    invalidate_user_data("chats", chat.get("user_id"))
     
     return chat
 
@@ -2,7 +2,8 @@ from .mongo_client import get_collection
 from .utils import to_objectid, to_datetime, privacy_filter
 from bson import ObjectId
 from datetime import datetime
-from backend.GraphRAG.graphrag.sync import sync_contact_to_graph, delete_contact_from_graph
+from backend.data_services.sync.graph_sync_outbox import enqueue_graph_sync
+from .user_data_cache import invalidate_user_data
 
 def create_contact(contact_data: dict):
     contacts = get_collection("contacts")
@@ -15,7 +16,8 @@ def create_contact(contact_data: dict):
     contact_data["updated_at"] = datetime.utcnow()
     result = contacts.insert_one(contact_data)
     contact_doc = contacts.find_one({"_id": result.inserted_id})
-    sync_contact_to_graph(contact_doc)
+    enqueue_graph_sync("contact", contact_doc["_id"])
+    invalidate_user_data("contacts", contact_doc.get("user_id"))
     return contact_doc
 
 def get_contact_by_id(contact_id):
@@ -36,15 +38,19 @@ def update_contact(contact_id, update_data: dict):
     update_data["updated_at"] = datetime.utcnow()
     contacts.update_one({"_id": contact_id}, {"$set": update_data})
     contact_doc = contacts.find_one({"_id": contact_id})
-    sync_contact_to_graph(contact_doc)
+    enqueue_graph_sync("contact", contact_doc["_id"])
+    invalidate_user_data("contacts", contact_doc.get("user_id"))
     return contact_doc
 
 def delete_contact(contact_id):
     contacts = get_collection("contacts")
     if isinstance(contact_id, str):
         contact_id = ObjectId(contact_id)
+    contact_doc = contacts.find_one({"_id": contact_id}, {"user_id": 1})
     result = contacts.delete_one({"_id": contact_id})
-    delete_contact_from_graph(contact_id)
+    enqueue_graph_sync("contact", contact_id, op="delete")
+    if contact_doc:
+        invalidate_user_data("contacts", contact_doc.get("user_id"))
     return result
 
 def list_contacts(filter_dict=None, user_id=None, limit=100):
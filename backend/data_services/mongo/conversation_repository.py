@@ -2,7 +2,8 @@ from .mongo_client import get_collection
 from .utils import to_objectid, to_datetime, privacy_filter
 from bson import ObjectId
 from datetime import datetime
-from backend.GraphRAG.graphrag.sync import sync_conversation_to_graph, delete_conversation_from_graph
+from backend.data_services.sync.graph_sync_outbox import enqueue_graph_sync
+from .user_data_cache import invalidate_user_data
 
 def create_conversation(conversation_data: dict):
     conversations = get_collection("conversations")
@@ -15,7 +16,8 @@ def create_conversation(conversation_data: dict):
     conversation_data["updated_at"] = datetime.utcnow()
     result = conversations.insert_one(conversation_data)
     conversation_doc = conversations.find_one({"_id": result.inserted_id})
-    sync_conversation_to_graph(conversation_doc)
+    enqueue_graph_sync("conversation", conversation_doc["_id"])
+    invalidate_user_data("conversations", conversation_doc.get("user_id"))
     return conversation_doc
 
 def get_conversation_by_id(conversation_id):
@@ -36,15 +38,19 @@ def update_conversation(conversation_id, update_data: dict):
     update_data["updated_at"] = datetime.utcnow()
     conversations.update_one({"_id": conversation_id}, {"$set": update_data})
     conversation_doc = conversations.find_one({"_id": conversation_id})
-    sync_conversation_to_graph(conversation_doc)
+    enqueue_graph_sync("conversation", conversation_doc["_id"])
+    invalidate_user_data("conversations", conversation_doc.get("user_id"))
     return conversation_doc
 
 def delete_conversation(conversation_id):
     conversations = get_collection("conversations")
     if isinstance(conversation_id, str):
         conversation_id = ObjectId(conversation_id)
+    conversation_doc = conversations.find_one({"_id": conversation_id}, {"user_id": 1})
     result = conversations.delete_one({"_id": conversation_id})
-    delete_conversation_from_graph(conversation_id)
+    enqueue_graph_sync("conversation", conversation_id, op="delete")
+    if conversation_doc:
+        invalidate_user_data("conversations", conversation_doc.get("user_id"))
     return result
 
 def list_conversations(filter_dict=None, user_id=None, limit=100):
@@ -2,7 +2,8 @@ from .mongo_client import get_collection
 from .utils import to_objectid, to_datetime, privacy_filter
 from bson import ObjectId
 from datetime import datetime
-from backend.GraphRAG.graphrag.sync import sync_event_to_graph, delete_event_from_graph
+from backend.data_services.sync.graph_sync_outbox import enqueue_graph_sync
+from .user_data_cache import invalidate_user_data
 
 def create_event(event_data: dict):
     events = get_collection("events")
@@ -15,7 +16,8 @@ def create_event(event_data: dict):
     event_data["updated_at"] = datetime.utcnow()
     result = events.insert_one(event_data)
     event_doc = events.find_one({"_id": result.inserted_id})
-    sync_event_to_graph(event_doc)
+    enqueue_graph_sync("event", event_doc["_id"])
+    invalidate_user_data("events", event_doc.get("user_id"))
     return event_doc
 
 def get_event_by_id(event_id):
@@ -36,15 +38,19 @@ def update_event(event_id, update_data: dict):
     update_data["updated_at"] = datetime.utcnow()
     events.update_one({"_id": event_id}, {"$set": update_data})
     event_doc = events.find_one({"_id": event_id})
-    sync_event_to_graph(event_doc)
+    enqueue_graph_sync("event", event_doc["_id"])
+    invalidate_user_data("events", event_doc.get("user_id"))
     return event_doc
 
 def delete_event(event_id):
     events = get_collection("events")
     if isinstance(event_id, str):
         event_id = ObjectId(event_id)
+    event_doc = events.find_one({"_id": event_id}, {"user_id": 1})
     result = events.delete_one({"_id": event_id})
-    delete_event_from_graph(event_id)
+    enqueue_graph_sync("event", event_id, op="delete")
+    if event_doc:
+        invalidate_user_data("events", event_doc.get("user_id"))
     return result
 
 def list_events(filter_dict=None, user_id=None, limit=100):
@@ -5,7 +5,7 @@ from validation import apply_collection_validations
 def create_collections_and_indexes():
     db = get_database()
     collections = [
-        "users", "businesses", "contacts", "conversations", "messages", "events", "assistants", "channels", "tasks", "payment_methods", "invoices", "notifications", "user_activity", "analytics", "job_queue", "settings", "email_signatures", "chats", "plans"
+        "users", "businesses", "contacts", "conversations", "messages", "events", "assistants", "channels", "tasks", "payment_methods", "invoices", "notifications", "user_activity", "analytics", "job_queue", "settings", "email_signatures", "chats", "plans", "graph_sync_outbox"
     ]
     # Create collections if not exist
     for coll in collections:
@@ -26,10 +26,12 @@ def create_collections_and_indexes():
     db.users.create_index({"last_login": -1})
     # Businesses
     db.businesses.create_index({"user_id": 1})
+    db.businesses.create_index({"user_id": 1, "updated_at": -1})
     db.businesses.create_index({"name": 1})
     db.businesses.create_index({"neo4j_entity_id": 1})
     # Contacts
     db.contacts.create_index({"user_id": 1})
+    db.contacts.create_index({"user_id": 1, "updated_at": -1})
     db.contacts.create_index({"email": 1})
     db.contacts.create_index({"phone": 1})
     db.contacts.create_index({"neo4j_entity_id": 1})
@@ -37,6 +39,7 @@ def create_collections_and_indexes():
     db.contacts.create_index({"lead_status.is_lead": 1})
     # Conversations
     db.conversations.create_index({"user_id": 1, "status": 1, "last_message_at": -1})
+    db.conversations.create_index({"user_id": 1, "last_message_at": -1})
     db.conversations.create_index({"contact_id": 1})
     db.conversations.create_index({"channel_id": 1})
     db.conversations.create_index({"privacy_key": 1})
@@ -58,6 +61,7 @@ def create_collections_and_indexes():
     db.assistants.create_index({"user_id": 1})
     db.channels.create_index({"user_id": 1, "type": 1})
     db.tasks.create_index({"user_id": 1, "status": 1, "due_date": 1})
+    db.tasks.create_index({"user_id": 1, "updated_at": -1})
     # Text indexes
     db.messages.create_index({"content.text": "text"})
     db.conversations.create_index({"context_summary.text": "text"})
@@ -67,8 +71,13 @@ def create_collections_and_indexes():
     db.notifications.create_index({"created_at": 1}, expireAfterSeconds=2592000)  # 30 days
     # Chats
     db.chats.create_index({"user_id": 1})
+    db.chats.create_index({"user_id": 1, "updated_at": -1})
     db.chats.create_index({"assistant_id": 1})
     db.chats.create_index({"created_at": -1})
+    # Graph sync outbox: claim order and cleanup of applied records
+    db.graph_sync_outbox.create_index({"status": 1, "next_attempt_at": 1, "created_at": 1})
+    db.graph_sync_outbox.create_index({"entity": 1, "doc_id": 1, "status": 1})
+    db.graph_sync_outbox.create_index({"completed_at": 1}, expireAfterSeconds=86400)  # 1 day
     # Plans
     db.plans.create_index({"stripe_price_id": 1})
     db.plans.create_index({"name": 1})
@@ -2,7 +2,8 @@ from .mongo_client import get_collection
 from .utils import to_objectid, to_datetime, privacy_filter
 from bson import ObjectId
 from datetime import datetime
-from backend.GraphRAG.graphrag.sync import sync_message_to_graph, delete_message_from_graph
+from backend.data_services.sync.graph_sync_outbox import enqueue_graph_sync
+from .user_data_cache import invalidate_user_data
 
 def create_message(message_data: dict):
     messages = get_collection("messages")
@@ -15,7 +16,8 @@ def create_message(message_data: dict):
     message_data["updated_at"] = datetime.utcnow()
     result = messages.insert_one(message_data)
     message_doc = messages.find_one({"_id": result.inserted_id})
-    sync_message_to_graph(message_doc)
+    enqueue_graph_sync("message", message_doc["_id"])
+    invalidate_user_data("messages", message_doc.get("user_id"))
     return message_doc
 
 def get_message_by_id(message_id):
@@ -36,15 +38,19 @@ def update_message(message_id, update_data: dict):
     update_data["updated_at"] = datetime.utcnow()
     messages.update_one({"_id": message_id}, {"$set": update_data})
     message_doc = messages.find_one({"_id": message_id})
-    sync_message_to_graph(message_doc)
+    enqueue_graph_sync("message", message_doc["_id"])
+    invalidate_user_data("messages", message_doc.get("user_id"))
     return message_doc
 
 def delete_message(message_id):
     messages = get_collection("messages")
     if isinstance(message_id, str):
         message_id = ObjectId(message_id)
+    message_doc = messages.find_one({"_id": message_id}, {"user_id": 1})
     result = messages.delete_one({"_id": message_id})
-    delete_message_from_graph(message_id)
+    enqueue_graph_sync("message", message_id, op="delete")
+    if message_doc:
+        invalidate_user_data("messages", message_doc.get("user_id"))
     return result
 
 def list_messages(filter_dict=None, user_id=None, limit=100):
@@ -2,7 +2,8 @@ from .mongo_client import get_collection
 from .utils import to_datetime, privacy_filter
 from bson import ObjectId
 from datetime import datetime
-from backend.GraphRAG.graphrag.sync import sync_task_to_graph, delete_task_from_graph
+from backend.data_services.sync.graph_sync_outbox import enqueue_graph_sync
+from .user_data_cache import invalidate_user_data
 
 def create_task(task_data: dict):
     tasks = get_collection("tasks")
@@ -13,7 +14,8 @@ def create_task(task_data: dict):
     task_data["updated_at"] = datetime.utcnow()
     result = tasks.insert_one(task_data)
     task_doc = tasks.find_one({"_id": result.inserted_id})
-    sync_task_to_graph(task_doc)
+    enqueue_graph_sync("task", task_doc["_id"])
+    invalidate_user_data("tasks", task_doc.get("user_id"))
     return task_doc
 
 def get_task_by_id(task_id):
@@ -32,15 +34,19 @@ def update_task(task_id, update_data: dict):
     update_data["updated_at"] = datetime.utcnow()
     tasks.update_one({"_id": task_id}, {"$set": update_data})
     task_doc = tasks.find_one({"_id": task_id})
-    sync_task_to_graph(task_doc)
+    enqueue_graph_sync("task", task_doc["_id"])
+    invalidate_user_data("tasks", task_doc.get("user_id"))
     return task_doc
 
 def delete_task(task_id):
     tasks = get_collection("tasks")
     if isinstance(task_id, str):
         task_id = ObjectId(task_id)
+    task_doc = tasks.find_one({"_id": task_id}, {"user_id": 1})
     result = tasks.delete_one({"_id": task_id})
-    delete_task_from_graph(task_id)
+    enqueue_graph_sync("task", task_id, op="delete")
+    if task_doc:
+        invalidate_user_data("tasks", task_doc.get("user_id"))
     return result
 
 def list_tasks(filter_dict=None, user_id=None, limit=100):
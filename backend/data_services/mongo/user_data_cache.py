@@ -0,0 +1,47 @@
+"""
+Write-driven invalidation for the assistant's cached per-user collection data.
+
+Cache entries embed two generation counters kept in Redis: one per collection
+and one per (collection, user). Repository writes bump the counter with
+invalidate_user_data(), which orphans every affected entry at once without
+scanning keys; orphaned entries simply age out through their TTL.
+
+The same counters version compiled system prompts: "users" is scoped by user id
+and "assistants" by assistant id.
+"""
+import logging
+from typing import Optional
+
+from backend.data_services.redis_cache import RedisCache
+
+GENERATION_PREFIX = "assistant_data:gen"
+
+_redis = None
+
+def _client():
+    global _redis
+    if _redis is None:
+        _redis = RedisCache().client
+    return _redis
+
+def _generation_keys(collection: str, user_id) -> list:
+    return [f"{GENERATION_PREFIX}:{collection}", f"{GENERATION_PREFIX}:{collection}:{user_id}"]
+
+def data_version(collection: str, user_id) -> str:
+    """Current generation of a user's data in collection, for use in cache keys."""
+    values = _client().mget(_generation_keys(collection, str(user_id)))
+    return ".".join((v or b"0").decode() for v in values)
+
+def invalidate_user_data(collection: str, user_id: Optional[object] = None):
+    """
+    Invalidate cached data for collection after a write. With user_id only that
+    user's entries go; without it, every user's entries for the collection do.
+    Failures are logged and never fail the write itself.
+    """
+    try:
+        if user_id is None:
+            _client().incr(f"{GENERATION_PREFIX}:{collection}")
+        else:
+            _client().incr(_generation_keys(collection, str(user_id))[1])
+    except Exception as e:
+        logging.warning(f"[USER_DATA_CACHE] Could not invalidate {collection} for {user_id}: {e}")
@@ -4,7 +4,8 @@ from bson import ObjectId
 from datetime import datetime
 from bson.errors import InvalidId
 from .business_repository import create_business
-from backend.GraphRAG.graphrag.sync import sync_user_to_graph, delete_user_from_graph
+from backend.data_services.sync.graph_sync_outbox import enqueue_graph_sync
+from .user_data_cache import invalidate_user_data
 import logging
 
 def create_user(user_data: dict):
@@ -21,7 +22,7 @@ def create_user(user_data: dict):
         user_data["last_name"] = " ".join(parts[1:]) if len(parts) > 1 else ""
     result = users.insert_one(user_data)
     user_doc = users.find_one({"_id": result.inserted_id})
-    sync_user_to_graph(user_doc)
+    enqueue_graph_sync("user", user_doc["_id"])
     return user_doc
 
 def get_user_by_id(user_id):
@@ -69,7 +70,9 @@ def update_user(user_id, update_data: dict):
     else:
         users.update_one(query, {"$set": update_data})
     user_doc = users.find_one(query)
-    sync_user_to_graph(user_doc)
+    enqueue_graph_sync("user", user_doc["_id"])
+    # Compiled system prompts for this user are rebuilt on next use
+    invalidate_user_data("users", user_doc["_id"])
     return user_doc
 
 def delete_user(user_id):
@@ -77,7 +80,8 @@ def delete_user(user_id):
     if isinstance(user_id, str):
         user_id = ObjectId(user_id)
     result = users.delete_one({"_id": user_id})
-    delete_user_from_graph(user_id)
+    enqueue_graph_sync("user", user_id, op="delete")
+    invalidate_user_data("users", user_id)
     return result
 
 def list_users(filter_dict=None, user_id=None, limit=100):
@@ -0,0 +1,291 @@
+"""
+Durable outbox for Mongo -> Neo4j graph sync.
+
+Repository writes call enqueue_graph_sync(), which inserts a small record into the
+graph_sync_outbox collection instead of talking to Neo4j inline. A pool of
+background workers claims pending records in batches, re-reads the current Mongo
+document and applies it with the sync_*_to_graph functions. Failures are retried
+with exponential backoff and parked as 'failed' after GRAPH_SYNC_MAX_ATTEMPTS.
+
+Records of one document are applied in order: a worker only keeps a claimed
+record when no other worker holds an older record of the same document, so an
+upsert that read the document just before a delete cannot be applied after it.
+"""
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument
+
+from backend.data_services.mongo.mongo_client import get_collection
+from backend.GraphRAG.graphrag.sync import (
+    sync_user_to_graph, delete_user_from_graph,
+    sync_business_to_graph, delete_business_from_graph,
+    sync_contact_to_graph, delete_contact_from_graph,
+    sync_conversation_to_graph, delete_conversation_from_graph,
+    sync_message_to_graph, delete_message_from_graph,
+    sync_event_to_graph, delete_event_from_graph,
+    sync_channel_to_graph, delete_channel_from_graph,
+    sync_task_to_graph, delete_task_from_graph,
+    sync_chat_to_graph, delete_chat_from_graph,
+)
+
+OUTBOX_COLLECTION = "graph_sync_outbox"
+GRAPH_SYNC_WORKERS = int(os.getenv("GRAPH_SYNC_WORKERS", 2))
+GRAPH_SYNC_BATCH_SIZE = int(os.getenv("GRAPH_SYNC_BATCH_SIZE", 50))
+GRAPH_SYNC_POLL_INTERVAL = float(os.getenv("GRAPH_SYNC_POLL_INTERVAL", 0.5))
+GRAPH_SYNC_MAX_ATTEMPTS = int(os.getenv("GRAPH_SYNC_MAX_ATTEMPTS", 8))
+GRAPH_SYNC_BACKOFF_BASE = float(os.getenv("GRAPH_SYNC_BACKOFF_BASE", 1.0))
+GRAPH_SYNC_BACKOFF_MAX = float(os.getenv("GRAPH_SYNC_BACKOFF_MAX", 300.0))
+# A claimed record whose worker died becomes claimable again after this many seconds
+GRAPH_SYNC_LEASE_SECONDS = int(os.getenv("GRAPH_SYNC_LEASE_SECONDS", 60))
+
+# entity -> (source collection, upsert function, delete function)
+ENTITY_HANDLERS = {
+    "user": ("users", sync_user_to_graph, delete_user_from_graph),
+    "business": ("businesses", sync_business_to_graph, delete_business_from_graph),
+    "contact": ("contacts", sync_contact_to_graph, delete_contact_from_graph),
+    "conversation": ("conversations", sync_conversation_to_graph, delete_conversation_from_graph),
+    "message": ("messages", sync_message_to_graph, delete_message_from_graph),
+    "event": ("events", sync_event_to_graph, delete_event_from_graph),
+    "channel": ("channels", sync_channel_to_graph, delete_channel_from_graph),
+    "task": ("tasks", sync_task_to_graph, delete_task_from_graph),
+    "chat": ("chats", sync_chat_to_graph, delete_chat_from_graph),
+}
+
+def enqueue_graph_sync(entity: str, doc_id, op: str = "upsert"):
+    """
+    Record that the graph copy of a Mongo document must be upserted or deleted.
+    Only the id is stored; the worker reads the latest document when it drains.
+    """
+    if entity not in ENTITY_HANDLERS:
+        raise ValueError(f"Unknown graph sync entity: {entity}")
+    if op not in ("upsert", "delete"):
+        raise ValueError(f"Unknown graph sync operation: {op}")
+    now = datetime.utcnow()
+    get_collection(OUTBOX_COLLECTION).insert_one({
+        "entity": entity,
+        "doc_id": doc_id,
+        "op": op,
+        "status": "pending",
+        "attempts": 0,
+        "next_attempt_at": now,
+        "created_at": now,
+        "updated_at": now,
+    })
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff in seconds for a record that has failed `attempts` times."""
+    return min(GRAPH_SYNC_BACKOFF_BASE * (2 ** max(attempts - 1, 0)), GRAPH_SYNC_BACKOFF_MAX)
+
+class OutboxMetrics:
+    """Thread-safe counters plus a sliding window for throughput."""
+    def __init__(self, window_seconds: int = 60):
+        self.window_seconds = window_seconds
+        self.lock = threading.Lock()
+        self.counters = {"processed": 0, "retried": 0, "failed": 0, "batches": 0}
+        self._completions = deque()
+
+    def record(self, processed: int = 0, retried: int = 0, failed: int = 0):
+        now = time.time()
+        with self.lock:
+            self.counters["processed"] += processed
+            self.counters["retried"] += retried
+            self.counters["failed"] += failed
+            self.counters["batches"] += 1
+            if processed:
+                self._completions.append((now, processed))
+            self._trim(now)
+
+    def throughput(self) -> float:
+        """Records applied per second over the sliding window."""
+        now = time.time()
+        with self.lock:
+            self._trim(now)
+            return sum(n for _, n in self._completions) / self.window_seconds
+
+    def _trim(self, now):
+        while self._completions and self._completions[0][0] < now - self.window_seconds:
+            self._completions.popleft()
+
+metrics = OutboxMetrics()
+
+def _claim_batch(worker_id: str, batch_size: int) -> list:
+    outbox = get_collection(OUTBOX_COLLECTION)
+    now = datetime.utcnow()
+    claimed = []
+    deferred = []
+    for _ in range(batch_size):
+        ready = {"$or": [
+            {"status": "pending", "next_attempt_at": {"$lte": now}},
+            {"status": "processing", "locked_until": {"$lt": now}},
+        ]}
+        if deferred:
+            # Documents another worker is applying wait for the next batch
+            ready = {"$and": [ready, {"$nor": [{"entity": e, "doc_id": d} for e, d in deferred]}]}
+        record = outbox.find_one_and_update(
+            ready,
+            {"$set": {
+                "status": "processing",
+                "locked_by": worker_id,
+                "locked_until": now + timedelta(seconds=GRAPH_SYNC_LEASE_SECONDS),
+                "updated_at": now,
+            }},
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if record is None:
+            break
+        if _held_elsewhere(outbox, record, worker_id, now):
+            outbox.update_one(
+                {"_id": record["_id"], "locked_by": worker_id},
+                {"$set": {"status": "pending", "updated_at": now},
+                 "$unset": {"locked_by": "", "locked_until": ""}}
+            )
+            deferred.append((record["entity"], record["doc_id"]))
+            continue
+        claimed.append(record)
+    return claimed
+
+def _held_elsewhere(outbox, record: dict, worker_id: str, now: datetime) -> bool:
+    """
+    True when another worker holds an older record (live lease) of the same document.
+    Of two workers racing on one document, only the one holding the oldest record keeps it.
+    """
+    return outbox.find_one({
+        "entity": record["entity"],
+        "doc_id": record["doc_id"],
+        "_id": {"$ne": record["_id"]},
+        "status": "processing",
+        "locked_by": {"$ne": worker_id},
+        "locked_until": {"$gte": now},
+        "created_at": {"$lte": record["created_at"]},
+    }) is not None
+
+def _apply(entity: str, doc_id, op: str):
+    collection_name, sync_fn, delete_fn = ENTITY_HANDLERS[entity]
+    if op == "delete":
+        delete_fn(doc_id)
+        return
+    doc = get_collection(collection_name).find_one({"_id": doc_id})
+    if doc is None:
+        # Deleted after the upsert was queued; the delete record handles the graph
+        return
+    sync_fn(doc)
+
+def process_batch(worker_id: str = "inline", batch_size: int = GRAPH_SYNC_BATCH_SIZE) -> int:
+    """
+    Claim and apply one batch of outbox records. Returns the number of records claimed.
+    Records for the same document are coalesced so only the latest operation runs.
+    """
+    records = _claim_batch(worker_id, batch_size)
+    if not records:
+        return 0
+    outbox = get_collection(OUTBOX_COLLECTION)
+    latest = {}
+    for record in records:
+        latest.setdefault((record["entity"], record["doc_id"]), []).append(record)
+
+    processed = retried = failed = 0
+    for (entity, doc_id), group in latest.items():
+        op = group[-1]["op"]
+        ids = [r["_id"] for r in group]
+        now = datetime.utcnow()
+        try:
+            _apply(entity, doc_id, op)
+            outbox.update_many(
+                {"_id": {"$in": ids}},
+                {"$set": {"status": "done", "completed_at": now, "updated_at": now},
+                 "$unset": {"locked_by": "", "locked_until": ""}}
+            )
+            processed += len(ids)
+        except Exception as e:
+            attempts = max(r.get("attempts", 0) for r in group) + 1
+            if attempts >= GRAPH_SYNC_MAX_ATTEMPTS:
+                status, failed = "failed", failed + len(ids)
+                logging.error(f"[GRAPH_SYNC] Giving up on {entity} {doc_id} after {attempts} attempts: {e}")
+            else:
+                status, retried = "pending", retried + len(ids)
+                logging.warning(f"[GRAPH_SYNC] {entity} {doc_id} failed (attempt {attempts}), retrying: {e}")
+            outbox.update_many(
+                {"_id": {"$in": ids}},
+                {"$set": {
+                    "status": status,
+                    "attempts": attempts,
+                    "last_error": str(e),
+                    "next_attempt_at": now + timedelta(seconds=backoff_delay(attempts)),
+                    "updated_at": now,
+                },
+                 "$unset": {"locked_by": "", "locked_until": ""}}
+            )
+    metrics.record(processed=processed, retried=retried, failed=failed)
+    return len(records)
+
+def drain_outbox(max_batches: int = 100) -> int:
+    """Synchronously apply every ready record (used by scripts and tests). Returns records claimed."""
+    total = 0
+    for _ in range(max_batches):
+        claimed = process_batch()
+        if not claimed:
+            break
+        total += claimed
+    return total
+
+def get_outbox_metrics() -> dict:
+    """Lag (age of the oldest ready record), backlog size and throughput."""
+    outbox = get_collection(OUTBOX_COLLECTION)
+    now = datetime.utcnow()
+    oldest = outbox.find_one({"status": {"$in": ["pending", "processing"]}}, sort=[("created_at", 1)])
+    with metrics.lock:
+        counters = dict(metrics.counters)
+    return {
+        "lag_seconds": (now - oldest["created_at"]).total_seconds() if oldest else 0.0,
+        "pending": outbox.count_documents({"status": {"$in": ["pending", "processing"]}}),
+        "failed": outbox.count_documents({"status": "failed"}),
+        "throughput_per_second": metrics.throughput(),
+        **{f"total_{k}": v for k, v in counters.items()},
+    }
+
+class GraphSyncWorkerPool:
+    """Background threads that drain the outbox until stop() is called."""
+    def __init__(self, workers: int = GRAPH_SYNC_WORKERS, batch_size: int = GRAPH_SYNC_BATCH_SIZE,
+                 poll_interval: float = GRAPH_SYNC_POLL_INTERVAL):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, args=(f"{os.getpid()}-{i}",), daemon=True,
+                                 name=f"graph-sync-{i}")
+            t.start()
+            self._threads.append(t)
+        logging.info(f"[GRAPH_SYNC] Started {self.workers} outbox workers")
+
+    def stop(self, timeout: float = 10.0):
+        """Finish in-flight batches and stop. Unclaimed records stay in the outbox."""
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=timeout)
+        self._threads = []
+        logging.info("[GRAPH_SYNC] Outbox workers stopped")
+
+    def _run(self, worker_id: str):
+        while not self._stop.is_set():
+            try:
+                claimed = process_batch(worker_id, self.batch_size)
+            except Exception as e:
+                logging.error(f"[GRAPH_SYNC] Worker {worker_id} error: {e}")
+                claimed = 0
+            if claimed < self.batch_size:
+                self._stop.wait(self.poll_interval)
+
+worker_pool = GraphSyncWorkerPool()
@@ -14,6 +14,13 @@ from .routers.auth_utils import get_current_user, security
 import logging
 from dotenv import load_dotenv
 from backend.routers import resume_parser
+from backend.GraphRAG.graphrag.db.graph_db import close_shared_drivers, close_shared_async_drivers
+from backend.GraphRAG.graphrag.db.vector_db import close_shared_async_qdrant
+from backend.data_services.sync.graph_sync_outbox import worker_pool as graph_sync_workers, get_outbox_metrics
+from backend.GraphRAG.graphrag.embeddings.embedding_cache import embedding_cache
+from backend.agents.app_container import app_container
+from backend.agents.prompt_builder import compiled_prompt_cache
+from starlette.concurrency import run_in_threadpool
 
 load_dotenv()
 # Configure logging first
@@ -100,6 +107,24 @@ async def root():
 async def health_check():
     return {"status": "healthy", "timestamp": "2025-05-23"}
 
+@app.get("/metrics/graph-sync")
+def graph_sync_metrics():
+    return get_outbox_metrics()
+
+@app.get("/metrics/embedding-cache")
+def embedding_cache_metrics():
+    return embedding_cache.stats()
+
+@app.get("/metrics/intent-router")
+def intent_router_metrics():
+    if app_container.intent_router is None:
+        return {}
+    return app_container.intent_router.stats()
+
+@app.get("/metrics/prompt-cache")
+def prompt_cache_metrics():
+    return compiled_prompt_cache.stats()
+
 # Test endpoint to verify CORS
 @app.get("/test-cors")
 async def test_cors():
@@ -121,8 +146,19 @@ async def show_routes():
             logger.info(f"  {route.path} [{methods}]")
         except Exception as e:
             logger.error(f"Error processing route: {e}")
+    graph_sync_workers.start()
+    # Build the engine, toolset and classifier once instead of per chat connection
+    try:
+        await run_in_threadpool(app_container.startup)
+    except Exception as e:
+        logger.error(f"Failed to build shared agent resources, will retry on first chat: {e}")
     logger.info("🚀 SERVER READY")
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    logger.info("🛑 MUNTU AI API SHUTTING DOWN")
\ No newline at end of file
+    logger.info("🛑 MUNTU AI API SHUTTING DOWN")
+    graph_sync_workers.stop()
+    app_container.shutdown()
+    await close_shared_async_drivers()
+    await close_shared_async_qdrant()
+    close_shared_drivers()
\ No newline at end of file
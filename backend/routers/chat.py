@@ -1,6 +1,7 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Body
+from starlette.concurrency import run_in_threadpool, iterate_in_threadpool
 from typing import Dict, List
-from backend.agents.primary_agent import get_primary_agent, process_request
+from backend.agents.primary_agent import get_primary_agent, stream_request
 import json
 from backend.data_services.mongo.chat_repository import create_chat, add_message, list_chats, get_chat_by_id
 from bson import ObjectId
@@ -74,8 +75,8 @@ async def websocket_endpoint(websocket: WebSocket, chat_id: str):
         user_id = chat.get('user_id')
         messages = chat.get('messages', [])
         
-        # Instantiate the primary agent with the assistant config
-        agent = get_primary_agent(assistant_id=assistant_id, user_id=user_id)
+        # Per-chat agent on the app-scoped shared resources (prompt + history only)
+        agent = await run_in_threadpool(get_primary_agent, assistant_id=assistant_id, user_id=user_id)
         active_connections[chat_id] = websocket
         active_agents[chat_id] = agent
         conversation_history[chat_id] = messages.copy()
@@ -114,16 +115,25 @@ async def websocket_endpoint(websocket: WebSocket, chat_id: str):
                 print(f"User ID: {user_id}")
                 print(f"Assistant ID: {assistant_id}")
                 
-                response = process_request(
+                # Stream the reply as it is generated; the blocking LLM/DB work runs off the event loop
+                response_parts = []
+                async for chunk in iterate_in_threadpool(stream_request(
                     agent,
                     message_data["content"],
                     user_id=user_id,
                     assistant_id=assistant_id
-                )
+                )):
+                    response_parts.append(chunk)
+                    await websocket.send_json({
+                        "type": "delta",
+                        "sender": agent.name,
+                        "content": chunk
+                    })
+                response = "".join(response_parts)
                 
                 print(f"Response: {response}")
                 
-                # Add agent's response to history and DB
+                # Persist the complete reply once generation has finished
                 assistant_message = {
                     "sender": agent.name,
                     "text": response,
@@ -134,7 +144,7 @@ async def websocket_endpoint(websocket: WebSocket, chat_id: str):
                 conversation_history[chat_id].append(assistant_message)
                 add_message(chat_id, assistant_message)
                 
-                # Send response back to client
+                # Final frame carries the full text, as before streaming
                 created_at = assistant_message["created_at"]
                 await websocket.send_json({
                     "type": "message",
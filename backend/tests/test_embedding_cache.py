@@ -0,0 +1,94 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import numpy as np
+from backend.GraphRAG.graphrag.embeddings.embedding_cache import EmbeddingCache, make_cache_key
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+    def mget(self, keys):
+        return [self.store.get(k) for k in keys]
+    def pipeline(self, transaction=False):
+        return self
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+    def execute(self):
+        pass
+
+def test_cache_key_is_stable_and_model_scoped():
+    assert make_cache_key("m:1", "  Hello   world ") == make_cache_key("m:1", "Hello world")
+    assert make_cache_key("m:1", "Hello") != make_cache_key("m:2", "Hello")
+
+def test_cache_tiers_and_hit_rate():
+    shared = FakeRedis()
+    writer = EmbeddingCache(max_size=10, shared=shared)
+    writer.set_many("m", ["a"], [[0.5, 0.25]])
+    # The shared tier holds raw float32 bytes
+    assert list(shared.store.values())[0] == np.array([0.5, 0.25], dtype=np.float32).tobytes()
+
+    # A second process only sees the shared tier
+    reader = EmbeddingCache(max_size=10, shared=shared)
+    first = reader.get_many("m", ["a", "b"])
+    assert first[0].tolist() == [0.5, 0.25] and first[1] is None
+    reader.get_many("m", ["a"])
+    stats = reader.stats()
+    assert (stats["local_hits"], stats["shared_hits"], stats["misses"]) == (1, 1, 1)
+    assert abs(stats["hit_rate"] - 2 / 3) < 1e-9
+
+def test_local_tier_evicts_least_recently_used():
+    cache = EmbeddingCache(max_size=2)
+    cache.set_many("m", ["a", "b"], [[1.0], [2.0]])
+    cache.get_many("m", ["a"])
+    cache.set_many("m", ["c"], [[3.0]])
+    assert cache.get_many("m", ["b"]) == [None]
+
+def test_find_similar_texts_scores_with_float32_matrix():
+    import asyncio
+    from backend.GraphRAG.graphrag.embeddings.embedding import EmbeddingService
+    vectors = {"q": [1.0, 0.0], "a": [0.6, 0.8], "b": [1.0, 0.0], "c": [0.0, 1.0]}
+    service = EmbeddingService(cache=EmbeddingCache(), embedding_dim=2)
+    service._model = object()
+    service._embed_batch = lambda texts: np.array([vectors[t] for t in texts], dtype=np.float32)
+
+    matrix = service.get_embeddings(["a", "b"])
+    assert matrix.dtype == np.float32 and matrix.shape == (2, 2)
+    results = asyncio.run(service.find_similar_texts("q", ["a", "b", "c"], top_k=2))
+    assert [r["text"] for r in results] == ["b", "a"]
+    assert isinstance(results[0]["similarity"], float)
+
+def test_top_k_chunked_matches_full_scan():
+    from backend.GraphRAG.graphrag.embeddings.embedding import EmbeddingService
+    rng = np.random.default_rng(0)
+    matrix = rng.standard_normal((50, 4)).astype(np.float32)
+    texts = [str(i) for i in range(50)]
+    service = EmbeddingService(cache=EmbeddingCache(), embedding_dim=4)
+    service._model = object()
+    service._embed_batch = lambda batch: matrix[[int(t) for t in batch]]
+    query = matrix[7]
+
+    full_idx, full_scores = service.rank_texts(query, texts, top_k=5)
+    chunk_idx, chunk_scores = service.rank_texts(query, texts, top_k=5, chunk_size=8)
+    assert full_idx.tolist() == chunk_idx.tolist()
+    assert np.allclose(full_scores, chunk_scores)
+    assert full_idx.tolist() == np.argsort(-(matrix @ query))[:5].tolist()
+
+def test_cache_hit_does_not_load_model():
+    from backend.GraphRAG.graphrag.embeddings.embedding import EmbeddingService
+
+    class ExplodingEmbeddingService(EmbeddingService):
+        @property
+        def model(self):
+            raise AssertionError("model must not be loaded on a cache hit")
+
+    cache = EmbeddingCache(max_size=10, shared=None)
+    service = ExplodingEmbeddingService(cache=cache)
+    cache.set_many(service.cache_model_id, ["hello"], [np.ones(3, dtype=np.float32)])
+    assert service.get_embedding("hello").tolist() == [1.0, 1.0, 1.0]
+
+def test_model_version_is_part_of_the_cache_key():
+    from backend.GraphRAG.graphrag.embeddings.embedding import EmbeddingService
+    old = EmbeddingService(cache=EmbeddingCache(), model_version="1")
+    new = EmbeddingService(cache=EmbeddingCache(), model_version="2")
+    assert old.cache_model_id != new.cache_model_id
+    assert "2" in new.cache_model_id.split(":")
@@ -0,0 +1,77 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import pytest
+from backend.data_services.sync import graph_sync_outbox as outbox
+
+class DummyOutbox:
+    def __init__(self):
+        self.updates = []
+    def update_many(self, filter_dict, update):
+        self.updates.append((filter_dict["_id"]["$in"], update["$set"]))
+
+def test_backoff_delay_grows_and_caps():
+    assert outbox.backoff_delay(1) == outbox.GRAPH_SYNC_BACKOFF_BASE
+    assert outbox.backoff_delay(3) == outbox.GRAPH_SYNC_BACKOFF_BASE * 4
+    assert outbox.backoff_delay(100) == outbox.GRAPH_SYNC_BACKOFF_MAX
+
+def test_process_batch_coalesces_and_retries(monkeypatch):
+    records = [
+        {"_id": 1, "entity": "message", "doc_id": "m1", "op": "upsert", "attempts": 0},
+        {"_id": 2, "entity": "message", "doc_id": "m1", "op": "delete", "attempts": 0},
+        {"_id": 3, "entity": "contact", "doc_id": "c1", "op": "upsert", "attempts": 0},
+    ]
+    applied = []
+    def fake_apply(entity, doc_id, op):
+        applied.append((entity, doc_id, op))
+        if entity == "contact":
+            raise RuntimeError("neo4j unavailable")
+    dummy = DummyOutbox()
+    monkeypatch.setattr(outbox, "_claim_batch", lambda worker_id, batch_size: records)
+    monkeypatch.setattr(outbox, "_apply", fake_apply)
+    monkeypatch.setattr(outbox, "get_collection", lambda name: dummy)
+
+    assert outbox.process_batch() == 3
+    # Both message records collapse into the latest operation
+    assert applied == [("message", "m1", "delete"), ("contact", "c1", "upsert")]
+    done_ids, done_set = dummy.updates[0]
+    assert done_ids == [1, 2] and done_set["status"] == "done"
+    retry_ids, retry_set = dummy.updates[1]
+    assert retry_ids == [3] and retry_set["status"] == "pending" and retry_set["attempts"] == 1
+
+class ClaimOutbox:
+    """Hands out queued records in order; `held` are records leased by another worker."""
+    def __init__(self, queue, held):
+        self.queue = list(queue)
+        self.held = held
+        self.released = []
+    def find_one_and_update(self, filter_dict, update, sort=None, return_document=None):
+        deferred = filter_dict["$and"][1]["$nor"] if "$and" in filter_dict else []
+        for record in self.queue:
+            if {"entity": record["entity"], "doc_id": record["doc_id"]} not in deferred:
+                self.queue.remove(record)
+                return record
+        return None
+    def find_one(self, filter_dict):
+        for record in self.held:
+            if (record["entity"], record["doc_id"]) == (filter_dict["entity"], filter_dict["doc_id"]) \
+                    and record["created_at"] <= filter_dict["created_at"]["$lte"]:
+                return record
+        return None
+    def update_one(self, filter_dict, update):
+        self.released.append(filter_dict["_id"])
+
+def test_claim_skips_documents_held_by_another_worker(monkeypatch):
+    held = [{"_id": 1, "entity": "message", "doc_id": "m1", "op": "upsert", "created_at": 1}]
+    queue = [
+        {"_id": 2, "entity": "message", "doc_id": "m1", "op": "delete", "created_at": 2},
+        {"_id": 3, "entity": "message", "doc_id": "m1", "op": "upsert", "created_at": 3},
+        {"_id": 4, "entity": "contact", "doc_id": "c1", "op": "upsert", "created_at": 4},
+    ]
+    dummy = ClaimOutbox(queue, held)
+    monkeypatch.setattr(outbox, "get_collection", lambda name: dummy)
+
+    claimed = outbox._claim_batch("w2", 10)
+    # The delete waits for the other worker's upsert instead of racing it
+    assert [r["_id"] for r in claimed] == [4]
+    assert dummy.released == [2]
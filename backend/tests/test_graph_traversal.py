@@ -0,0 +1,59 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from backend.GraphRAG.graphrag.engine.graph_traversal import GraphTraversal
+
+# a - b - c, plus a cycle edge c - a
+EDGES = [("a", "b"), ("b", "c"), ("c", "a")]
+
+class MockGraphDB:
+    def __init__(self):
+        self.queries = []
+    def run_query(self, query, params=None):
+        self.queries.append(params)
+        records = []
+        for node_id in params["frontier"]:
+            for x, y in EDGES:
+                for src, dst in ((x, y), (y, x)):
+                    if src == node_id and dst not in params["visited"]:
+                        records.append({"m": {"id": dst}, "r": {"id": f"{x}-{y}"}})
+        return records[:params["limit"]]
+
+def test_frontier_traversal_issues_one_query_per_hop():
+    graph_db = MockGraphDB()
+    result = GraphTraversal(graph_db).traverse_from_seeds(["a"], max_hops=2)
+    assert len(graph_db.queries) <= 2
+    assert sorted(n["id"] for n in result["nodes"]) == ["b", "c"]
+    # Seeds are never returned again and each relationship appears once
+    assert len(result["relationships"]) == len({id(r) for r in result["relationships"]})
+
+def test_frontier_traversal_respects_node_cap():
+    result = GraphTraversal(MockGraphDB()).traverse_from_seeds(["a"], max_hops=3, max_nodes_per_hop=1)
+    assert len(result["nodes"]) == 1
+
+class TaskGraphDB:
+    def __init__(self):
+        self.calls = []
+    def run_query(self, query, params=None):
+        self.calls.append(params)
+        return [{"entity_id": "p1", "tasks": [{"id": "t1", "status": "pending"}]},
+                {"entity_id": "p2", "tasks": []}]
+
+def test_find_related_tasks_bulk_uses_one_parameterized_query():
+    graph_db = TaskGraphDB()
+    task_map = GraphTraversal(graph_db).find_related_tasks_bulk(["p1", "p2", "p1"], ["pending"])
+    assert len(graph_db.calls) == 1
+    assert graph_db.calls[0] == {"entity_ids": ["p1", "p2"], "statuses": ["pending"]}
+    assert task_map == {"p1": [{"task": {"id": "t1", "status": "pending"}}]}
+
+class AsyncMockGraphDB(MockGraphDB):
+    async def run_query(self, query, params=None):
+        return MockGraphDB.run_query(self, query, params)
+
+def test_async_traversal_matches_sync():
+    import asyncio
+    sync_result = GraphTraversal(MockGraphDB()).traverse_from_seeds(["a"], max_hops=2)
+    async_db = AsyncMockGraphDB()
+    async_result = asyncio.run(GraphTraversal(None, async_db).atraverse_from_seeds(["a"], max_hops=2))
+    assert [n["id"] for n in async_result["nodes"]] == [n["id"] for n in sync_result["nodes"]]
+    assert len(async_db.queries) <= 2
@@ -0,0 +1,66 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import numpy as np
+from backend.agents.intent_classifier import IntentRouter
+
+KEYWORDS = ["hello", "find", "meeting"]
+
+class KeywordEmbeddingService:
+    """One dimension per keyword, plus a constant so unknown text is equidistant."""
+    def get_embedding(self, text):
+        text = text.lower()
+        return np.array([float(k in text) for k in KEYWORDS] + [0.1], dtype=np.float32)
+    def get_embeddings(self, texts):
+        return np.stack([self.get_embedding(t) for t in texts])
+
+class MockClassifier:
+    def __init__(self):
+        self.calls = 0
+    def generate_reply(self, messages, sender=None):
+        self.calls += 1
+        return "search"
+
+EXAMPLES = {
+    "basic": ["hello there", "hello"],
+    "search": ["find my notes", "find the file"],
+    "calendar": ["book a meeting", "meeting tomorrow"],
+}
+
+def test_router_answers_clear_intents_locally():
+    classifier = MockClassifier()
+    router = IntentRouter(classifier, KeywordEmbeddingService(), examples=EXAMPLES)
+    assert router.route("Hello!") == ("basic", "local")
+    assert router.route("Set up a meeting") == ("calendar", "local")
+    assert classifier.calls == 0
+
+def test_router_falls_back_to_llm_and_caches():
+    classifier = MockClassifier()
+    router = IntentRouter(classifier, KeywordEmbeddingService(), examples=EXAMPLES)
+    assert router.route("What about  the Q3 numbers?") == ("search", "llm")
+    assert router.route("what about the q3 numbers?") == ("search", "cache")
+    assert classifier.calls == 1
+    assert router.stats()["llm"] == 1 and router.stats()["cache"] == 1
+
+def test_router_cache_is_scoped_to_recent_history():
+    classifier = MockClassifier()
+    router = IntentRouter(classifier, KeywordEmbeddingService(), examples=EXAMPLES)
+    about_files = {"history": [{"role": "user", "content": "where is the report?"},
+                               {"role": "assistant", "content": "Shall I look for it?"}]}
+    about_meetings = {"history": [{"role": "user", "content": "am I free friday?"},
+                                  {"role": "assistant", "content": "Shall I book it?"}]}
+    assert router.route("yes, do it", about_files) == ("search", "llm")
+    assert router.route("yes, do it", about_meetings) == ("search", "llm")
+    assert router.route("Yes, do it", about_files) == ("search", "cache")
+    assert classifier.calls == 2
+
+def test_short_follow_up_with_history_skips_local_tier():
+    classifier = MockClassifier()
+    router = IntentRouter(classifier, KeywordEmbeddingService(), examples=EXAMPLES)
+    history = {"history": [{"role": "user", "content": "find my Q3 report"},
+                           {"role": "assistant", "content": "Should I search your drive?"}]}
+    assert router.route("Hello, yes please", {"history": []}) == ("basic", "local")
+    assert router.route("Hello, yes please", history) == ("search", "llm")
+    # Longer messages carry their own intent and stay local
+    assert router.route("Book a meeting with the design team tomorrow", history) == ("calendar", "local")
+    assert classifier.calls == 1
@@ -0,0 +1,51 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import numpy as np
+from backend.agents.prompt_builder import assemble_prompt, make_section, estimate_tokens
+
+class KeywordEmbeddingService:
+    def get_embeddings(self, texts):
+        return np.array([[float("meeting" in t.lower()), float("python" in t.lower()), 0.1] for t in texts])
+
+SECTIONS = [
+    make_section("identity", "You are the assistant.", required=True),
+    make_section("events", "EVENTS:\n" + "\n".join(f"Meeting {i} with the team" for i in range(40))),
+    make_section("skills", "SKILLS:\nPython, SQL", priority=0.9),
+    make_section("languages", "LANGUAGES:\nEnglish", priority=0.1),
+]
+
+def test_assemble_prompt_respects_budget_and_reports():
+    prompt, report = assemble_prompt(SECTIONS, budget=120)
+    assert report["used_tokens"] <= 120
+    assert estimate_tokens(prompt) <= 120
+    statuses = {s["name"]: s["status"] for s in report["sections"]}
+    assert statuses["identity"] == "included"
+    assert statuses["skills"] == "included"
+    assert statuses["events"] == "truncated"
+    # Included sections keep their original order
+    assert prompt.index("You are the assistant") < prompt.index("EVENTS") < prompt.index("SKILLS")
+
+def test_assemble_prompt_ranks_by_relevance_to_query():
+    prompt, report = assemble_prompt(
+        SECTIONS, query="When is my next meeting?", embedding_service=KeywordEmbeddingService(), budget=60
+    )
+    statuses = {s["name"]: s["status"] for s in report["sections"]}
+    assert statuses["events"] in ("included", "truncated")
+    assert statuses["skills"] == "dropped"
+
+def test_compiled_prompt_cache_rebuilds_only_on_version_change(monkeypatch):
+    from backend.agents import prompt_builder
+    versions = {("users", "u1"): "0.0", ("assistants", "a1"): "0.0"}
+    monkeypatch.setattr(prompt_builder, "data_version", lambda collection, scope: versions[(collection, scope)])
+    cache = prompt_builder.CompiledPromptCache()
+    builds = []
+    def build():
+        builds.append(1)
+        return f"prompt {len(builds)}"
+    assert cache.get_or_build("u1", "a1", build) == "prompt 1"
+    assert cache.get_or_build("u1", "a1", build) == "prompt 1"
+    # update_user bumps the user's generation
+    versions[("users", "u1")] = "0.1"
+    assert cache.get_or_build("u1", "a1", build) == "prompt 2"
+    assert cache.stats()["builds"] == 2 and cache.stats()["local_hits"] == 1
@@ -0,0 +1,89 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import asyncio
+import time
+from backend.GraphRAG.graphrag.engine.retrieval_planner import RetrievalPlanner
+
+class MockTraversal:
+    def __init__(self, task_delay=0.0):
+        self.task_delay = task_delay
+        self.async_graph_db = object()
+    def traverse_from_seeds(self, seed_node_ids, max_hops=2):
+        time.sleep(0.2)
+        return {"nodes": [{"id": "n1"}], "relationships": [{"source": "s1", "target": "n1"}]}
+    def find_related_tasks_bulk(self, entity_ids, status_filter=None):
+        time.sleep(self.task_delay or 0.2)
+        return {eid: [{"task": {"id": f"t-{eid}"}}] for eid in entity_ids}
+    async def atraverse_from_seeds(self, seed_node_ids, max_hops=2):
+        await asyncio.sleep(0.2)
+        return {"nodes": [{"id": "n1"}], "relationships": [{"source": "s1", "target": "n1"}]}
+    async def afind_related_tasks_bulk(self, entity_ids, status_filter=None):
+        await asyncio.sleep(self.task_delay or 0.2)
+        return {eid: [{"task": {"id": f"t-{eid}"}}] for eid in entity_ids}
+
+class MockEngine:
+    def __init__(self, task_delay=0.0):
+        self.graph_traversal = MockTraversal(task_delay)
+    def _async_traversal(self):
+        return self.graph_traversal
+    def semantic_search(self, query_text, filters=None):
+        return [{"id": "s1", "score": 0.9, "payload": {}}]
+    async def asemantic_search(self, query_text, filters=None):
+        return self.semantic_search(query_text, filters)
+    def _format_results(self, hybrid_results):
+        return {"results": hybrid_results["results"], "graph_summary": {
+            "total_nodes": len(hybrid_results["context"]["nodes"])}}
+
+def test_planner_runs_traversal_and_seed_tasks_concurrently():
+    planner = RetrievalPlanner(MockEngine())
+    start = time.perf_counter()
+    result = planner.run("query", extras={"profile": lambda: {"name": "Ada"}})
+    # traversal || seed tasks (0.2s), then expanded-node tasks (0.2s)
+    assert time.perf_counter() - start < 0.55
+    assert result["partial"] is False
+    assert set(result["task_context"]) == {"s1", "n1"}
+    assert result["extras"] == {"profile": {"name": "Ada"}}
+
+def test_planner_returns_partial_context_on_stage_timeout():
+    planner = RetrievalPlanner(MockEngine(task_delay=1.0), timeouts={"seed_tasks": 0.05, "context_tasks": 0.05})
+    result = planner.run("query")
+    assert result["partial"] is True
+    assert result["stages"]["seed_tasks"]["status"] == "timeout"
+    assert result["stages"]["traversal"]["status"] == "ok"
+    assert result["graph_summary"]["total_nodes"] == 1
+    assert result["task_context"] == {}
+
+def test_async_planner_returns_partial_context_on_stage_timeout():
+    planner = RetrievalPlanner(MockEngine(task_delay=1.0), timeouts={"seed_tasks": 0.05, "context_tasks": 0.05})
+    start = time.perf_counter()
+    result = asyncio.run(planner.arun("query"))
+    assert time.perf_counter() - start < 0.5
+    assert result["partial"] is True
+    assert result["stages"]["context_tasks"]["status"] == "timeout"
+    assert result["graph_summary"]["total_nodes"] == 1
+
+def test_stage_budget_counts_from_submission_not_from_wait():
+    planner = RetrievalPlanner(MockEngine(), timeouts={"extras": 0.3})
+    def slow_profile():
+        time.sleep(0.5)
+        return {"name": "Ada"}
+    start = time.perf_counter()
+    result = planner.run("query", extras={"profile": slow_profile, "prefs": lambda: {"tz": "UTC"}})
+    # The extras deadline (0.3s after submission) has passed by the time retrieval (0.4s) is done,
+    # so the slow extra is given up on immediately instead of getting another 0.3s
+    assert time.perf_counter() - start < 0.5
+    assert result["stages"]["profile"]["status"] == "timeout"
+    assert result["extras"] == {"profile": None, "prefs": {"tz": "UTC"}}
+
+def test_cached_result_with_extras_has_uncached_shape():
+    planner = RetrievalPlanner(MockEngine(), timeouts={"extras": 0.05})
+    cached = planner.run("query")
+    def slow_profile():
+        time.sleep(0.3)
+        return {"name": "Ada"}
+    result = planner.merge_extras(cached, planner.run_extras({"profile": slow_profile}))
+    assert set(result["stages"]) == {"vector", "traversal", "seed_tasks", "context_tasks", "profile"}
+    assert result["stages"]["profile"]["status"] == "timeout"
+    assert result["partial"] is True
+    assert result["extras"] == {"profile": None}
@@ -0,0 +1,90 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import pytest
+from backend.GraphRAG.graphrag.db.graph_db import Neo4jWrapper
+from backend.GraphRAG.graphrag.engine.rag_engine import GraphRAGEngine, merge_typed_hits
+
+class MockEmbeddingService:
+    dimension = 3
+    def __init__(self):
+        self.batches = []
+    def _embed_batch(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(t)), 1.0, 0.0] for t in texts]
+
+class MockGraphDB:
+    validate_node = staticmethod(Neo4jWrapper.validate_node)
+    validate_relationship = staticmethod(Neo4jWrapper.validate_relationship)
+    def __init__(self, fail_labels=()):
+        self.node_calls = []
+        self.rel_calls = []
+        self.fail_labels = set(fail_labels)
+    def create_nodes(self, label, rows):
+        if label in self.fail_labels:
+            raise RuntimeError(f"write failed for {label}")
+        self.node_calls.append((label, rows))
+        return [r["id"] for r in rows]
+    def create_relationships(self, from_label, to_label, rel_type, rows):
+        self.rel_calls.append((from_label, to_label, rel_type, rows))
+        return len(rows)
+
+class MockVectorDB:
+    def __init__(self):
+        self.upserts = []
+        self.ensured = []
+    def ensure_collection(self, collection_name, dimension, **kwargs):
+        self.ensured.append((collection_name, dimension))
+        return False
+    def upsert_embeddings(self, collection, ids, vectors, payloads, wait=True):
+        self.upserts.append((collection, ids, vectors, payloads))
+
+def make_engine(graph_db=None):
+    return GraphRAGEngine(
+        graph_db=graph_db or MockGraphDB(),
+        vector_db=MockVectorDB(),
+        embedding_service=MockEmbeddingService()
+    )
+
+def test_store_documents_batches_all_stages():
+    engine = make_engine()
+    docs = [
+        {"text": "Alice is a data scientist", "metadata": {"name": "Alice"}, "node_type": "Person"},
+        {"text": "Bob is a product manager", "metadata": {"name": "Bob"}, "node_type": "Person"},
+        {"text": "Report for Q2", "metadata": {}, "node_type": "Message"},
+    ]
+    assert engine.vector_db.ensured == [("muntu_knowledge", 3)]
+    result = engine.store_documents(docs, chunk_size=2)
+    assert result["failed"] == []
+    assert all(result["ids"])
+    # One forward pass for every document
+    assert len(engine.embedding_service.batches) == 1
+    # One UNWIND per node type
+    assert sorted(label for label, _ in engine.graph_db.node_calls) == ["Message", "Person"]
+    # Two upsert chunks of at most 2 points
+    assert [len(u[1]) for u in engine.vector_db.upserts] == [2, 1]
+
+def test_store_documents_reports_per_item_failures():
+    engine = make_engine(MockGraphDB(fail_labels={"Message"}))
+    docs = [
+        {"text": "Alice", "metadata": {"name": "Alice"}, "node_type": "Person"},
+        {"text": "Bad", "metadata": {}, "node_type": "Alien"},
+        {"text": "Hello", "metadata": {}, "node_type": "Message"},
+    ]
+    result = engine.store_documents(docs)
+    assert result["ids"][0] is not None
+    assert result["ids"][1] is None
+    assert result["ids"][2] is None
+    stages = {f["index"]: f["stage"] for f in result["failed"]}
+    assert stages == {1: "validate", 2: "graph"}
+
+def test_merge_typed_hits_normalizes_and_applies_quotas():
+    hits = {
+        # Person scores are systematically lower than Event scores
+        "Person": [{"id": "p1", "score": 0.55}, {"id": "p2", "score": 0.50}, {"id": "p3", "score": 0.45}],
+        "Event": [{"id": "e1", "score": 0.90}, {"id": "e2", "score": 0.80}],
+    }
+    merged = merge_typed_hits(hits, {"Person": 2, "Event": 2}, limit=3)
+    assert [h["id"] for h in merged] == ["e1", "p1", "e2"]
+    assert {h["node_type"] for h in merged} == {"Person", "Event"}
+    assert merged[0]["normalized_score"] == 1.0
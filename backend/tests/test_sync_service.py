@@ -19,6 +19,7 @@ from backend.data_services.mongo.task_repository import create_task, delete_task
 from backend.data_services.mongo.chat_repository import create_chat
 from backend.data_services.mongo.mongo_client import get_collection
 from backend.GraphRAG.graphrag.db.graph_db import Neo4jWrapper
+from backend.data_services.sync.graph_sync_outbox import drain_outbox
 
 def delete_all_sync_users():
     """
@@ -51,27 +52,35 @@ def test_full_sync_for_all_entities():
         })
         user_id = str(user_doc["_id"])
         graph_db = Neo4jWrapper()
+        drain_outbox()
         assert graph_db.get_node("User", {"id": user_id}), "User node not created"
         business_doc = create_business({"user_id": user_id, "name": "Sync Test Business"})
         business_id = str(business_doc["_id"])
+        drain_outbox()
         assert graph_db.get_node("Organization", {"id": business_id}), "Business node not created"
         contact_doc = create_contact({"user_id": user_id, "name": "Sync Test Contact", "email": f"contact_{uuid4()}@example.com"})
         contact_id = str(contact_doc["_id"])
+        drain_outbox()
         assert graph_db.get_node("Person", {"id": contact_id}), "Contact node not created"
         conversation_doc = create_conversation({"user_id": user_id, "title": "Sync Test Conversation", "status": "active"})
         conversation_id = str(conversation_doc["_id"])
+        drain_outbox()
         assert graph_db.get_node("Thread", {"id": conversation_id}), "Conversation node not created"
         message_doc = create_message({"conversation_id": conversation_id, "timestamp": datetime.utcnow(), "content": {"text": "Hello from sync test!"}})
         message_id = str(message_doc["_id"])
+        drain_outbox()
         assert graph_db.get_node("Message", {"id": message_id}), "Message node not created"
         event_doc = create_event({"user_id": user_id, "title": "Sync Test Event", "start_time": datetime.utcnow(), "created_at": datetime.utcnow()})
         event_id = str(event_doc["_id"])
+        drain_outbox()
         assert graph_db.get_node("Event", {"id": event_id}), "Event node not created"
         channel_doc = create_channel({"name": f"Sync Test Channel {uuid4()}", "type": "test", "user_id": user_id, "created_at": datetime.utcnow()})
         channel_id = str(channel_doc["_id"])
+        drain_outbox()
         assert graph_db.get_node("Channel", {"id": channel_id}), "Channel node not created"
         task_doc = create_task({"title": "Sync Test Task", "user_id": user_id, "created_at": datetime.utcnow()})
         task_id = str(task_doc["_id"])
+        drain_outbox()
         assert graph_db.get_node("Task", {"id": task_id}), "Task node not created"
         chat_doc = create_chat({
             "user_id": user_id,
@@ -81,6 +90,7 @@ def test_full_sync_for_all_entities():
             "created_at": datetime.utcnow()
         })
         chat_id = str(chat_doc["_id"])
+        drain_outbox()
         assert graph_db.get_node("Thread", {"id": chat_id}), "Chat node not created"
         # Clean up (delete in reverse order)
         delete_task(task_id)
@@ -91,6 +101,7 @@ def test_full_sync_for_all_entities():
         delete_contact(contact_id)
         delete_business(business_id)
         delete_user(user_id)
+        drain_outbox()
         graph_db.close()
     finally:
         # Always clean up all Sync users
@@ -0,0 +1,55 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from bson import ObjectId
+from backend.data_services.mongo.assistant_data_service import UserContext, apply_size_budget
+
+USER_ID = ObjectId()
+
+class MockDataService:
+    allowed_collections = {'tasks': 'task', 'events': 'event'}
+    def __init__(self):
+        self.calls = []
+    def resolve_user_id(self, user_id):
+        self.calls.append(("resolve", user_id))
+        return USER_ID
+    def get_user_resume(self, mongo_user_id):
+        self.calls.append(("resume", mongo_user_id))
+        return {"raw_text": "Engineer"}
+    def get_user_data(self, user_id, collection):
+        self.calls.append(("data", collection))
+        return [{"title": f"{collection}-1"}]
+    def format_context_for_prompt(self, context):
+        return ",".join(sorted(context))
+
+def test_user_context_is_lazy_and_fetched_once():
+    service = MockDataService()
+    context = UserContext(str(USER_ID), service=service)
+    assert service.calls == []
+    assert context.collection('tasks') == [{"title": "tasks-1"}]
+    context.collection('tasks')
+    assert context.format_for_prompt() == "events,resume,tasks"
+    context.format_for_prompt()
+    assert service.calls.count(("data", "tasks")) == 1
+    assert service.calls.count(("data", "events")) == 1
+    assert len([c for c in service.calls if c[0] == "resolve"]) == 1
+
+def test_user_context_invalidate_refetches_collection():
+    service = MockDataService()
+    context = UserContext(str(USER_ID), service=service)
+    context.collection('tasks')
+    context.invalidate('tasks')
+    context.collection('tasks')
+    assert service.calls.count(("data", "tasks")) == 2
+
+def test_size_budget_is_shared_round_robin():
+    context = {
+        'resume': {"raw_text": "Engineer"},
+        'messages': [{"content": "x" * 40} for _ in range(10)],
+        'tasks': [{"title": "t" * 40} for _ in range(2)],
+    }
+    budgeted = apply_size_budget(context, max_chars=250)
+    # The large collection cannot starve the small one; the resume is always kept
+    assert len(budgeted['tasks']) == 2
+    assert 0 < len(budgeted['messages']) < 10
+    assert budgeted['resume'] == context['resume']
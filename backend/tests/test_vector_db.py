@@ -0,0 +1,195 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from types import SimpleNamespace
+import pytest
+from backend.GraphRAG.graphrag.db import vector_db
+from qdrant_client.http import models
+from backend.GraphRAG.graphrag.db.vector_db import QdrantWrapper, build_payload_filter
+
+class FakeQdrantClient:
+    def __init__(self, existing=None):
+        self.collections = dict(existing or {})
+        self.calls = []
+    def collection_exists(self, name):
+        self.calls.append(("exists", name))
+        return name in self.collections
+    def get_collection(self, name):
+        vectors = SimpleNamespace(size=self.collections[name])
+        return SimpleNamespace(config=SimpleNamespace(params=SimpleNamespace(vectors=vectors)))
+    def create_collection(self, collection_name, vectors_config, **kwargs):
+        self.calls.append(("create", collection_name))
+        self.collections[collection_name] = vectors_config.size
+    def create_payload_index(self, collection_name, field_name, field_schema):
+        self.calls.append(("index", field_name))
+
+def make_wrapper(client, url="http://test"):
+    wrapper = QdrantWrapper.__new__(QdrantWrapper)
+    wrapper.url = url
+    wrapper.client = client
+    return wrapper
+
+@pytest.fixture(autouse=True)
+def reset_provisioned():
+    vector_db._provisioned_collections.clear()
+    yield
+    vector_db._provisioned_collections.clear()
+
+def test_ensure_collection_creates_once_per_process():
+    client = FakeQdrantClient()
+    assert make_wrapper(client).ensure_collection("docs", 384) is True
+    # A second wrapper in the same process does not touch Qdrant again
+    assert make_wrapper(client).ensure_collection("docs", 384) is False
+    assert client.calls == [("exists", "docs"), ("create", "docs"), ("index", "user_id"), ("index", "node_type")]
+
+def test_ensure_collection_keeps_existing_and_rejects_mismatch():
+    client = FakeQdrantClient(existing={"docs": 384, "old": 768})
+    assert make_wrapper(client).ensure_collection("docs", 384) is False
+    with pytest.raises(ValueError):
+        make_wrapper(client).ensure_collection("old", 384)
+    assert ("create", "docs") not in client.calls
+
+def test_build_payload_filter():
+    assert build_payload_filter(None) is None
+    assert build_payload_filter({"user_id": None}) is None
+    query_filter = build_payload_filter({
+        "user_id": "u1",
+        "node_type": ["Task", "Event"],
+        "created_at": {"gte": 10},
+    })
+    user, node_type, created = query_filter.must
+    assert user.key == "user_id" and user.match == models.MatchValue(value="u1")
+    assert node_type.match == models.MatchAny(any=["Task", "Event"])
+    assert created.range == models.Range(gte=10)
+
+class SearchRecorder:
+    def __init__(self):
+        self.kwargs = None
+    def search(self, **kwargs):
+        self.kwargs = kwargs
+        return []
+
+def test_search_vectors_forwards_tuning_parameters():
+    client = SearchRecorder()
+    make_wrapper(client).search_vectors(
+        "docs", [0.1, 0.2], limit=3, score_threshold=0.7, hnsw_ef=128,
+        with_payload={"exclude": ["text"]}
+    )
+    assert client.kwargs["score_threshold"] == 0.7
+    assert client.kwargs["search_params"] == models.SearchParams(hnsw_ef=128, exact=False)
+    assert client.kwargs["with_payload"] == models.PayloadSelectorExclude(exclude=["text"])
+    assert client.kwargs["with_vectors"] is False
+
+    make_wrapper(client).search_vectors("docs", [0.1, 0.2], exact=True, with_payload=["id"])
+    assert client.kwargs["search_params"].exact is True
+    assert client.kwargs["with_payload"] == ["id"]
+
+def test_storage_options_from_settings_with_overrides(monkeypatch):
+    settings = SimpleNamespace(
+        QDRANT_QUANTIZATION="none", QDRANT_QUANTIZATION_ALWAYS_RAM=True, QDRANT_SCALAR_QUANTILE=0.99,
+        QDRANT_PRODUCT_COMPRESSION="x16", QDRANT_ON_DISK_VECTORS=False, QDRANT_ON_DISK_PAYLOAD=False,
+        QDRANT_HNSW_M=16, QDRANT_HNSW_EF_CONSTRUCT=100,
+        QDRANT_COLLECTION_OPTIONS={"Message": {"quantization": "scalar", "on_disk_vectors": True, "hnsw_m": 32}},
+    )
+    monkeypatch.setattr(vector_db, "get_settings", lambda: settings)
+    assert vector_db.storage_options("Person")["quantization_config"] is None
+    message = vector_db.storage_options("Message")
+    assert message["quantization_config"].scalar.type == models.ScalarType.INT8
+    assert message["hnsw_config"].m == 32
+    assert vector_db.vector_params("Message", 384).on_disk is True
+
+class AliasClient(FakeQdrantClient):
+    def __init__(self, existing=None, points=None):
+        super().__init__(existing)
+        self.aliases = {}
+        self.points = dict(points or {})
+    def get_aliases(self):
+        return SimpleNamespace(aliases=[SimpleNamespace(alias_name=a, collection_name=c) for a, c in self.aliases.items()])
+    def update_collection_aliases(self, change_aliases_operations):
+        for op in change_aliases_operations:
+            if isinstance(op, models.DeleteAliasOperation):
+                self.aliases.pop(op.delete_alias.alias_name)
+            else:
+                self.aliases[op.create_alias.alias_name] = op.create_alias.collection_name
+    def scroll(self, collection_name, limit, offset, with_payload, with_vectors, scroll_filter=None):
+        points = self.points.get(collection_name, {})
+        if scroll_filter is not None:
+            since = scroll_filter.must[0].range.gte
+            points = {i: p for i, p in points.items() if p.get("indexed_at") and p["indexed_at"] >= since}
+        items = [SimpleNamespace(id=i, payload=p, vector=[0.5, 0.5]) for i, p in points.items()]
+        return items, None
+    def delete(self, collection_name, points_selector):
+        self.calls.append(("delete_points", collection_name, list(points_selector.points)))
+    def delete_collection(self, name):
+        self.collections.pop(name, None)
+
+class RegistryEmbeddings:
+    def __init__(self, version, dimension, on_embed=None):
+        self.model_version, self.dimension = version, dimension
+        self.embedded = []
+        self.on_embed = on_embed
+    def get_embeddings(self, texts):
+        self.embedded.extend(texts)
+        if self.on_embed:
+            self.on_embed()
+            self.on_embed = None
+        return [[0.0] * self.dimension for _ in texts]
+
+class RegistryVectorDB:
+    def __init__(self, client):
+        self.client = client
+        self.url = "http://test"
+        self.upserts = []
+    ensure_collection = QdrantWrapper.ensure_collection
+    def upsert_embeddings(self, collection, ids, vectors, payloads):
+        self.upserts.append((collection, list(ids)))
+
+def make_registries(client, points, on_embed=None):
+    from backend.GraphRAG.graphrag.db.collection_registry import CollectionRegistry
+    node_types = {"Person": {"id": "string", "name": "string", "embedding_id": "string"},
+                  "User": {"id": "string", "name": "string"}}
+    old = CollectionRegistry(RegistryVectorDB(client), RegistryEmbeddings("model-a", 768), node_types)
+    # Only node types with embedding_id get collections
+    assert old.ensure_all() == {"Person": "created"}
+    old_collection = client.aliases["Person"]
+    assert client.collections[old_collection] == 768
+    client.points[old_collection] = dict(points)
+    vector_db = RegistryVectorDB(client)
+    embeddings = RegistryEmbeddings("model-b", 384, on_embed)
+    return old_collection, CollectionRegistry(vector_db, embeddings, node_types), vector_db, embeddings
+
+def test_registry_creates_aliases_and_migrates_on_model_change():
+    client = AliasClient()
+    old_collection, new, vector_db, embeddings = make_registries(
+        client, {"p1": {"name": "Alice"}, "p2": {"name": "Bob"}})
+    assert new.ensure("Person") == "stale"
+    assert new.ensure("Person", migrate=True) == "migrated"
+    new_collection = client.aliases["Person"]
+    assert new_collection != old_collection and client.collections[new_collection] == 384
+    assert old_collection not in client.collections
+    assert sorted(embeddings.embedded) == ["Alice", "Bob"]
+    assert vector_db.upserts[0] == (new_collection, ["p1", "p2"])
+
+def test_migration_never_drops_points_it_cannot_reembed():
+    client = AliasClient()
+    old_collection, new, vector_db, embeddings = make_registries(
+        client, {"p1": {"name": "Alice"}, "p2": {"id": "p2"}})
+    assert new.migrate("Person") == 1
+    assert embeddings.embedded == ["Alice"]
+    # p2 has no text: the alias moves, but the old collection (with p2) is kept
+    assert client.aliases["Person"] != old_collection
+    assert old_collection in client.collections
+    assert "p2" in client.points[old_collection]
+
+def test_migration_catches_up_on_writes_made_during_the_bulk_pass():
+    from datetime import datetime, timezone
+    client = AliasClient()
+    def concurrent_write():
+        # A writer upserts through the alias (the old collection) mid-migration
+        client.points[old_collection]["p3"] = {
+            "name": "Carol", "indexed_at": datetime.now(timezone.utc)}
+    old_collection, new, vector_db, embeddings = make_registries(
+        client, {"p1": {"name": "Alice"}}, on_embed=concurrent_write)
+    assert new.migrate("Person") == 2
+    new_collection = client.aliases["Person"]
+    assert (new_collection, ["p3"]) in vector_db.upserts
@@ -0,0 +1,76 @@
+import sys
+import os
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+import threading
+import pytest
+from backend.GraphRAG.graphrag.engine.rag_engine import WriteQueue
+
+class MockGraphDB:
+    def __init__(self):
+        self.calls = []
+    def upsert_nodes(self, label, rows):
+        self.calls.append(("upsert_nodes", label, len(rows)))
+    def create_relationships(self, from_label, to_label, rel_type, rows):
+        self.calls.append(("create_relationships", rel_type, len(rows)))
+    def update_nodes(self, label, rows):
+        self.calls.append(("update_nodes", label, len(rows)))
+
+def test_write_queue_groups_into_bulk_statements():
+    graph_db = MockGraphDB()
+    queue = WriteQueue(graph_db=graph_db, batch_size=100, flush_interval=60)
+    queue.push({"type": "relationship_create", "data": {
+        "from_label": "User", "to_label": "Person", "rel_type": "USER_KNOWS", "from_id": "u1", "to_id": "p1"}})
+    for i in range(3):
+        queue.push({"type": "node_upsert", "data": {"label": "Person", "properties": {"id": f"p{i}"}}})
+    queue.push({"type": "property_update", "data": {"label": "Person", "id": "p1", "properties": {"name": "Bob"}}})
+    queue.close()
+    # Nodes are written before relationships, one statement per group
+    assert graph_db.calls == [
+        ("upsert_nodes", "Person", 3),
+        ("create_relationships", "USER_KNOWS", 1),
+        ("update_nodes", "Person", 1),
+    ]
+    assert queue.stats["written"] == 5
+
+class SlowGraphDB(MockGraphDB):
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+    def upsert_nodes(self, label, rows):
+        self.release.wait(5)
+        super().upsert_nodes(label, rows)
+
+def test_write_queue_backpressure_times_out():
+    graph_db = SlowGraphDB()
+    queue = WriteQueue(graph_db=graph_db, max_size=1, batch_size=10, flush_interval=60)
+    queue.push({"type": "node_upsert", "data": {"label": "Person", "properties": {"id": "p1"}}})
+    # A full queue wakes the flusher, which takes p1 and then blocks on the slow write
+    queue.push({"type": "node_upsert", "data": {"label": "Person", "properties": {"id": "p2"}}}, timeout=2)
+    with pytest.raises(TimeoutError):
+        queue.push({"type": "node_upsert", "data": {"label": "Person", "properties": {"id": "p3"}}}, timeout=0.2)
+    graph_db.release.set()
+    queue.close()
+    assert queue.stats["written"] == 2
+
+def test_write_queue_rejects_unknown_type():
+    queue = WriteQueue(graph_db=MockGraphDB())
+    with pytest.raises(ValueError):
+        queue.push({"type": "drop_database", "data": {}})
+
+def test_write_queue_rejects_missing_keys():
+    queue = WriteQueue(graph_db=MockGraphDB())
+    with pytest.raises(ValueError):
+        queue.push({"type": "node_upsert", "data": {"properties": {"id": "p1"}}})
+    with pytest.raises(ValueError):
+        queue.push({"type": "relationship_create", "data": {"from_label": "User", "to_label": "Person"}})
+
+def test_write_queue_malformed_op_does_not_fail_batch():
+    graph_db = MockGraphDB()
+    queue = WriteQueue(graph_db=graph_db, flush_interval=60)
+    queue.push({"type": "node_upsert", "data": {"label": "Person", "properties": {"id": "p1"}}})
+    # Bypasses push() validation, as a caller mutating data after queueing could
+    queue.queue.append({"type": "property_update", "data": {"label": "Person"}})
+    queue.close()
+    assert graph_db.calls == [("upsert_nodes", "Person", 1)]
+    assert queue.stats["written"] == 1
+    assert queue.stats["failed"] == 1
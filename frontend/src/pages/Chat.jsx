@@ -99,20 +99,38 @@ const Chat = () => {
   useEffect(() => {
     if (selected === null || !chatList[selected]?._id) return;
     websocketService.connectToChat(chatList[selected]._id);
+    // Streamed replies arrive as 'delta' frames that grow one in-progress bubble;
+    // the final 'message' frame replaces that bubble with the complete reply
+    const updateIncoming = (update) => {
+      setMessagesPerChat(prev => {
+        const updated = [...prev];
+        updated[selected] = update(updated[selected] || []);
+        return updated;
+      });
+      setCurrentMessages(update);
+    };
     const handleMessage = (data) => {
-      if (data.type === 'message') {
+      const time = data.time || new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' });
+      if (data.type === 'delta') {
+        updateIncoming(messages => {
+          const last = messages[messages.length - 1];
+          if (last && last.streaming) {
+            return [...messages.slice(0, -1), { ...last, text: last.text + data.content }];
+          }
+          return [...messages, { sender: data.sender, text: data.content, position: 'incoming', time, streaming: true }];
+        });
+      } else if (data.type === 'message') {
         const newMessage = {
           sender: data.sender,
           text: data.content,
           position: 'incoming',
-          time: data.time || new Date().toLocaleTimeString([], { hour: '2-digit', minute: '2-digit' })
+          time
         };
-        setMessagesPerChat(prev => {
-          const updated = [...prev];
-          updated[selected] = [...(updated[selected] || []), newMessage];
-          return updated;
+        updateIncoming(messages => {
+          const last = messages[messages.length - 1];
+          const base = last && last.streaming ? messages.slice(0, -1) : messages;
+          return [...base, newMessage];
         });
-        setCurrentMessages(prev => [...prev, newMessage]);
       }
     };
     websocketService.addMessageHandler(handleMessage);